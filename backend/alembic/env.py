@@ -21,6 +21,16 @@ from app.core.config import settings # noqa
 
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    # Партиции accountingrecord создаются приложением (app/db/partitions.py), в моделях их нет
+    if type_ == "table" and name is not None and name.startswith("accountingrecord_"):
+        return False
+    # Триграммные индексы создаются миграцией только при наличии pg_trgm, в моделях их нет
+    if type_ == "index" and name is not None and name.endswith("_trgm"):
+        return False
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -50,6 +60,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -70,7 +81,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,32 @@
+"""add accounting_id sequence
+
+Revision ID: add_accounting_id_sequence
+Revises: add_balance_ledger
+Create Date: 2025-08-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_accounting_id_sequence'
+down_revision = 'add_balance_ledger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('accountingrecord_accounting_id_seq')))
+    # Продолжаем нумерацию с текущего максимума
+    op.execute("""
+        SELECT setval(
+            'accountingrecord_accounting_id_seq',
+            COALESCE((SELECT max(accounting_id) FROM accountingrecord), 0) + 1,
+            false
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('accountingrecord_accounting_id_seq')))
@@ -0,0 +1,62 @@
+"""add balance ledger tables
+
+Revision ID: add_balance_ledger
+Revises: rename_accounting_record_user_id
+Create Date: 2025-08-04 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_balance_ledger'
+down_revision = 'rename_accounting_record_user_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('locationbalance',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('record_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['location_id'], ['location.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'location_id')
+    )
+    op.create_table('spherebalance',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('sphere_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('record_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sphere_id'], ['sphere.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'sphere_id')
+    )
+
+    # Заполняем балансы из существующих записей
+    op.execute("""
+        INSERT INTO locationbalance (owner_id, location_id, balance, record_count)
+        SELECT owner_id, location_id,
+               SUM(CASE WHEN operation_type = 'INCOME' THEN sum ELSE -sum END),
+               COUNT(id)
+        FROM accountingrecord
+        WHERE location_id IS NOT NULL
+        GROUP BY owner_id, location_id
+    """)
+    op.execute("""
+        INSERT INTO spherebalance (owner_id, sphere_id, balance, record_count)
+        SELECT owner_id, sphere_id,
+               SUM(CASE WHEN operation_type = 'INCOME' THEN sum ELSE -sum END),
+               COUNT(id)
+        FROM accountingrecord
+        WHERE sphere_id IS NOT NULL AND NOT is_transfer
+        GROUP BY owner_id, sphere_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('spherebalance')
+    op.drop_table('locationbalance')
@@ -0,0 +1,31 @@
+"""store job result files in the database
+
+Revision ID: add_job_result_chunk
+Revises: add_job_table
+Create Date: 2025-08-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_job_result_chunk'
+down_revision = 'add_job_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Файлы результатов задач хранятся в базе, чтобы их мог отдать любой процесс приложения
+    op.create_table('jobresultchunk',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['job.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'seq')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('jobresultchunk')
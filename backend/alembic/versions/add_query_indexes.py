@@ -0,0 +1,48 @@
+"""add composite and foreign key indexes
+
+Revision ID: add_query_indexes
+Revises: add_accounting_id_sequence
+Create Date: 2025-08-06 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_query_indexes'
+down_revision = 'add_accounting_id_sequence'
+branch_labels = None
+depends_on = None
+
+
+# (имя индекса, таблица, колонки)
+INDEXES = [
+    # Список записей, keyset-пагинация и экспорт: WHERE owner_id = ? ORDER BY date, id
+    ('ix_accountingrecord_owner_id_date_id', 'accountingrecord', ['owner_id', 'date', 'id']),
+    # ON DELETE SET NULL при удалении сферы/счёта
+    ('ix_accountingrecord_sphere_id', 'accountingrecord', ['sphere_id']),
+    ('ix_accountingrecord_location_id', 'accountingrecord', ['location_id']),
+    ('ix_locationbalance_location_id', 'locationbalance', ['location_id']),
+    ('ix_spherebalance_sphere_id', 'spherebalance', ['sphere_id']),
+    # Ресурсы пользователя (индекс прав доступа, каскадное удаление пользователя)
+    ('ix_sphere_owner_id', 'sphere', ['owner_id']),
+    ('ix_location_owner_id', 'location', ['owner_id']),
+    # Первичные ключи таблиц доступа начинаются с id ресурса; для поиска по пользователю нужен обратный порядок
+    ('ix_sphere_readers_association_user_id', 'sphere_readers_association', ['user_id', 'sphere_id']),
+    ('ix_sphere_editors_association_user_id', 'sphere_editors_association', ['user_id', 'sphere_id']),
+    ('ix_location_readers_association_user_id', 'location_readers_association', ['user_id', 'location_id']),
+    ('ix_location_editors_association_user_id', 'location_editors_association', ['user_id', 'location_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
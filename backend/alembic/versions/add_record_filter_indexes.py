@@ -0,0 +1,41 @@
+"""add indexes for filtered record lists
+
+Revision ID: add_record_filter_indexes
+Revises: add_record_search
+Create Date: 2025-08-14 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_record_filter_indexes'
+down_revision = 'add_record_search'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_accountingrecord_owner_id_sphere_id_date_id', ['owner_id', 'sphere_id', 'date', 'id']),
+    ('ix_accountingrecord_owner_id_location_id_date_id', ['owner_id', 'location_id', 'date', 'id']),
+    ('ix_accountingrecord_owner_id_operation_type_date_id', ['owner_id', 'operation_type', 'date', 'id']),
+    ('ix_accountingrecord_owner_id_sum', ['owner_id', 'sum']),
+]
+
+
+def upgrade() -> None:
+    # Индекс на секционированной таблице создаётся во всех секциях (без CONCURRENTLY)
+    for name, columns in INDEXES:
+        op.create_index(name, 'accountingrecord', columns)
+    # Частичный индекс: переводов немного, обычные записи выбираются по ix_accountingrecord_owner_id_date_id
+    op.create_index(
+        'ix_accountingrecord_owner_id_date_id_transfers', 'accountingrecord', ['owner_id', 'date', 'id'],
+        postgresql_where=sa.text('is_transfer'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_accountingrecord_owner_id_date_id_transfers', table_name='accountingrecord')
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='accountingrecord')
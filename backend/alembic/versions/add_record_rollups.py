@@ -0,0 +1,63 @@
+"""add daily and monthly record rollups
+
+Revision ID: add_record_rollups
+Revises: add_query_indexes
+Create Date: 2025-08-07 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_record_rollups'
+down_revision = 'add_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+ROLLUPS = [('dailyrollup', 'day'), ('monthlyrollup', 'month')]
+
+
+def upgrade() -> None:
+    operation_type = postgresql.ENUM('INCOME', 'SPEND', name='operationtype', create_type=False)
+    for table, granularity in ROLLUPS:
+        op.create_table(table,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.Date(), nullable=False),
+        sa.Column('sphere_id', sa.Integer(), nullable=True),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('operation_type', operation_type, nullable=False),
+        sa.Column('is_transfer', sa.Boolean(), nullable=False),
+        sa.Column('total', sa.Numeric(precision=16, scale=2), nullable=False),
+        sa.Column('record_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['sphere_id'], ['sphere.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['location_id'], ['location.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        # sphere_id может быть NULL (сфера удалена), поэтому NULLS NOT DISTINCT (PostgreSQL 15+)
+        op.create_index(
+            f'ux_{table}_key', table,
+            ['owner_id', 'period', 'sphere_id', 'location_id', 'operation_type', 'is_transfer'],
+            unique=True, postgresql_nulls_not_distinct=True,
+        )
+        op.create_index(f'ix_{table}_sphere_id', table, ['sphere_id'])
+        op.create_index(f'ix_{table}_location_id', table, ['location_id'])
+
+        # Заполняем агрегаты из существующих записей (периоды считаются по UTC)
+        op.execute(f"""
+            INSERT INTO {table} (owner_id, period, sphere_id, location_id, operation_type, is_transfer, total, record_count)
+            SELECT owner_id, date_trunc('{granularity}', timezone('UTC', date))::date,
+                   sphere_id, location_id, operation_type, is_transfer,
+                   SUM(sum), COUNT(id)
+            FROM accountingrecord
+            GROUP BY 1, 2, 3, 4, 5, 6
+        """)
+
+
+def downgrade() -> None:
+    for table, _ in reversed(ROLLUPS):
+        op.drop_table(table)
@@ -0,0 +1,53 @@
+"""add record search vector and trigram indexes
+
+Revision ID: add_record_search
+Revises: add_user_data_version
+Create Date: 2025-08-13 10:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_record_search'
+down_revision = 'add_user_data_version'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+TRIGRAM_INDEXES = [
+    ('ix_accountingrecord_description_trgm', 'accountingrecord', 'description'),
+    ('ix_sphere_name_trgm', 'sphere', 'name'),
+    ('ix_location_name_trgm', 'location', 'name'),
+]
+
+
+def upgrade() -> None:
+    # Генерируемый столбец добавляется в секционированную таблицу и переписывает все секции
+    op.add_column('accountingrecord', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('russian', coalesce(description, ''))", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_accountingrecord_search_vector', 'accountingrecord', ['search_vector'], postgresql_using='gin')
+
+    # pg_trgm входит в contrib; без него поиск работает только по словам (см. CRUDAccountingRecord.search_for_user)
+    bind = op.get_bind()
+    if not bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar():
+        logger.warning("pg_trgm is not available; fuzzy record search is disabled")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {table} USING gin ({column} gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    for name, _, _ in TRIGRAM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.drop_index('ix_accountingrecord_search_vector', table_name='accountingrecord')
+    op.drop_column('accountingrecord', 'search_vector')
@@ -0,0 +1,30 @@
+"""add user data version counters
+
+Revision ID: add_user_data_version
+Revises: partition_accountingrecord
+Create Date: 2025-08-11 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_data_version'
+down_revision = 'partition_accountingrecord'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Строки создаются при первой записи; отсутствие строки означает версию 0
+    op.create_table('userdataversion',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('userdataversion')
@@ -0,0 +1,95 @@
+"""partition accountingrecord by date
+
+Revision ID: partition_accountingrecord
+Revises: add_record_rollups
+Create Date: 2025-08-08 10:00:00.000000
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'partition_accountingrecord'
+down_revision = 'add_record_rollups'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = "id, accounting_id, owner_id, operation_type, is_transfer, sphere_id, location_id, sum, description, date"
+
+INDEXES = [
+    ('ix_accountingrecord_id', ['id']),
+    ('ix_accountingrecord_accounting_id', ['accounting_id']),
+    ('ix_accountingrecord_owner_id_date_id', ['owner_id', 'date', 'id']),
+    ('ix_accountingrecord_sphere_id', ['sphere_id']),
+    ('ix_accountingrecord_location_id', ['location_id']),
+]
+
+
+def _create_record_table(**kwargs) -> None:
+    op.create_table('accountingrecord',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('accountingrecord_id_seq'::regclass)"), nullable=False),
+    sa.Column('accounting_id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('operation_type', postgresql.ENUM('INCOME', 'SPEND', name='operationtype', create_type=False), nullable=False),
+    sa.Column('is_transfer', sa.Boolean(), nullable=False),
+    sa.Column('sphere_id', sa.Integer(), nullable=True),
+    sa.Column('location_id', sa.Integer(), nullable=False),
+    sa.Column('sum', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=True),
+    sa.Column('date', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], name='accountingrecord_user_id_fkey'),
+    sa.ForeignKeyConstraint(['sphere_id'], ['sphere.id'], name='accountingrecord_sphere_id_fkey', ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['location_id'], ['location.id'], name='accountingrecord_location_id_fkey', ondelete='SET NULL'),
+    **kwargs
+    )
+
+
+def _replace_record_table(primary_key: list[str], create_partitions=None, **kwargs) -> None:
+    # Новая таблица создаётся рядом со старой, данные копируются, старая удаляется.
+    # Последовательность id переживает обе таблицы.
+    op.execute("ALTER SEQUENCE accountingrecord_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE accountingrecord RENAME TO accountingrecord_old")
+    _create_record_table(**kwargs)
+    if create_partitions:
+        create_partitions()
+    op.execute(f"INSERT INTO accountingrecord ({COLUMNS}) SELECT {COLUMNS} FROM accountingrecord_old")
+    op.execute("DROP TABLE accountingrecord_old")
+    op.execute("ALTER SEQUENCE accountingrecord_id_seq OWNED BY accountingrecord.id")
+
+    # Имена индексов освободились вместе со старой таблицей
+    op.create_primary_key('accountingrecord_pkey', 'accountingrecord', primary_key)
+    for name, columns in INDEXES:
+        op.create_index(name, 'accountingrecord', columns)
+
+
+def _create_yearly_partitions() -> None:
+    # По партиции на каждый год (UTC) от самой ранней записи до следующего года;
+    # дальше партиции создаёт приложение (app/db/partitions.py)
+    first_year = op.get_bind().execute(sa.text(
+        "SELECT extract(year FROM min(date) AT TIME ZONE 'UTC') FROM accountingrecord_old"
+    )).scalar()
+    current_year = datetime.now(timezone.utc).year
+    for year in range(int(first_year or current_year), current_year + 2):
+        op.execute(
+            f"CREATE TABLE accountingrecord_y{year} PARTITION OF accountingrecord "
+            f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') TO ('{year + 1}-01-01 00:00:00+00')"
+        )
+    op.execute("CREATE TABLE accountingrecord_default PARTITION OF accountingrecord DEFAULT")
+
+
+def upgrade() -> None:
+    # Ключ партиционирования обязан входить в первичный ключ
+    _replace_record_table(
+        ['id', 'date'],
+        create_partitions=_create_yearly_partitions,
+        postgresql_partition_by='RANGE (date)',
+    )
+
+
+def downgrade() -> None:
+    _replace_record_table(['id'])
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, spheres, locations, records, dashboard, admin
+from app.api.v1.endpoints import auth, users, spheres, locations, records, dashboard, admin, jobs
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -9,4 +9,5 @@ api_router.include_router(spheres.router, prefix="/spheres", tags=["Spheres"])
 api_router.include_router(locations.router, prefix="/locations", tags=["Locations"])
 api_router.include_router(records.router, prefix="/records", tags=["Records"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
-api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
\ No newline at end of file
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
\ No newline at end of file
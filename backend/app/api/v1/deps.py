@@ -1,16 +1,20 @@
+import hashlib
 from typing import AsyncGenerator, Callable
-from fastapi import Depends, HTTPException, status, Query
+from fastapi import Depends, HTTPException, Path, Request, Response, status, Query
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 
 from app.core import security
 from app.core.config import settings
 from app.crud import user as user_crud
+from app.crud.acl import acl as acl_crud
 from app.crud.base import CRUDBase
-from app.db.session import get_db_session
+from app.crud.data_version import data_version as data_version_crud
+from app.db.session import WRITE_LSN_COOKIE, AsyncSessionLocal, get_db_session, get_read_engine, parse_write_lsn
 from app.models import User, Sphere, Location
 from app.schemas.token import TokenPayload
 
@@ -40,23 +44,62 @@ async def get_current_user(
         raise credentials_exception
         
     # User making the request based on the token
-    requesting_user = await user_crud.user.get_by_login(db, login=token_data.sub)
+    requesting_user = await user_crud.user.get_by_login_cached(db, login=token_data.sub)
     if not requesting_user:
         raise credentials_exception
 
     # If admin wants to view as another user
     if as_user_id and requesting_user.is_admin:
-        effective_user = await user_crud.user.get(db, id=as_user_id)
+        effective_user = await user_crud.user.get_cached(db, id=as_user_id)
         if not effective_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with id {as_user_id} not found",
             )
+        # Writes made through this session count towards the user's read-your-writes window
+        db.info["user_id"] = effective_user.id
         return effective_user
 
     # Default case: return the user from the token
+    db.info["user_id"] = requesting_user.id
     return requesting_user
 
+async def get_read_db_session(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only endpoints: bound to a healthy read replica when one is configured,
+    or to the primary if there is none or no replica has the client's last write yet.
+    """
+    min_lsn = parse_write_lsn(request.cookies.get(WRITE_LSN_COOKIE))
+    async with AsyncSessionLocal(bind=get_read_engine(current_user.id, min_lsn)) as session:
+        yield session
+
+async def check_data_etag(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_session),
+    current_user: User = Depends(get_current_user),
+) -> None:
+    """
+    Conditional GET for endpoints whose response depends only on the user's data version:
+    sets a strong ETag and answers a matching If-None-Match with 304 before the endpoint runs.
+    The version is read before the data, so a concurrent write can only make the ETag stale
+    (and the next request refetch), never pair new data with an old ETag.
+    """
+    version = await data_version_crud.get(db, user_id=current_user.id)
+    resource = hashlib.blake2b(f"{request.url.path}?{request.url.query}".encode(), digest_size=8).hexdigest()
+    etag = f'"{current_user.id}-{version}-{resource}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in candidates or etag in candidates:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
 async def get_current_admin_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -71,32 +114,21 @@ async def get_current_admin_user(
 # Новая фабрика зависимостей
 def get_resource_with_permissions_factory(
     crud_repo: CRUDBase,
-    permission_level: str  # "read" or "edit"
+    permission_level: str  # "read", "edit" or "owner"
 ) -> Callable:
+    # "sphere" / "location": both the ACL index kind and the path parameter prefix
+    kind = crud_repo.model.__tablename__
+
     async def get_resource(
-        resource_id: int,
+        resource_id: int = Path(..., alias=f"{kind}_id"),
         db: AsyncSession = Depends(get_db_session),
         current_user: User = Depends(get_current_user),
     ):
-        # Eager load relationships needed for permission checks
-        query_options = [
-            selectinload(crud_repo.model.owner),
-            selectinload(crud_repo.model.readers),
-            selectinload(crud_repo.model.editors),
-        ]
-        
-        # Загружаем ресурс с предзагрузкой связей
-        result = await db.execute(
-            crud_repo.model.__table__.select()
-            .where(crud_repo.model.id == resource_id)
-            .options(*query_options)
-        )
         resource = (await db.execute(
             select(crud_repo.model)
             .where(crud_repo.model.id == resource_id)
-            .options(*query_options))
-        ).scalars().first()
-
+            .options(joinedload(crud_repo.model.owner))
+        )).scalars().first()
 
         if not resource:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found")
@@ -107,13 +139,12 @@ def get_resource_with_permissions_factory(
         if current_user.id == resource.owner_id:
             return resource
 
-        user_is_reader = any(reader.id == current_user.id for reader in resource.readers)
-        user_is_editor = any(editor.id == current_user.id for editor in resource.editors)
+        level = await acl_crud.get_level(db, user_id=current_user.id, kind=kind, resource_id=resource_id)
 
-        if permission_level == "read" and (user_is_reader or user_is_editor):
+        if permission_level == "read" and level is not None:
             return resource
         
-        if permission_level == "edit" and user_is_editor:
+        if permission_level == "edit" and level in ("edit", "owner"):
             return resource
 
         raise HTTPException(
@@ -128,5 +159,7 @@ from app.crud.location import location as location_crud
 
 get_sphere_with_read_permission = get_resource_with_permissions_factory(sphere_crud, "read")
 get_sphere_with_edit_permission = get_resource_with_permissions_factory(sphere_crud, "edit")
+get_sphere_with_owner_permission = get_resource_with_permissions_factory(sphere_crud, "owner")
 get_location_with_read_permission = get_resource_with_permissions_factory(location_crud, "read")
-get_location_with_edit_permission = get_resource_with_permissions_factory(location_crud, "edit")
\ No newline at end of file
+get_location_with_edit_permission = get_resource_with_permissions_factory(location_crud, "edit")
+get_location_with_owner_permission = get_resource_with_permissions_factory(location_crud, "owner")
\ No newline at end of file
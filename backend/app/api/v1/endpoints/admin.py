@@ -1,20 +1,51 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.deps import get_current_admin_user, get_db_session
+from app.api.v1.deps import get_current_admin_user, get_db_session, get_read_db_session
+from app.core.cache import caches
+from app.core.security import password_hasher
 from app.crud.user import user as user_crud
+from app.db.pool import pools
 from app.models import User
+from app.schemas.admin import CacheStats, PasswordHasherStats, PoolStats
 from app.schemas.user import UserRead
 
 router = APIRouter()
 
 @router.get("/users", response_model=list[UserRead])
 async def read_users(
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     current_admin: User = Depends(get_current_admin_user),
 ):
     """
     Retrieve all users. (Admin only)
     """
     users = await user_crud.get_all(db)
-    return users
\ No newline at end of file
+    return users
+
+@router.get("/caches", response_model=list[CacheStats])
+async def read_cache_stats(
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    Hit/miss counters of the in-process caches of this worker. (Admin only)
+    """
+    return [cache.stats() for cache in caches.values()]
+
+@router.get("/password-hasher", response_model=PasswordHasherStats)
+async def read_password_hasher_stats(
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    Load of the bcrypt thread pool of this worker. (Admin only)
+    """
+    return password_hasher.stats()
+
+@router.get("/db-pools", response_model=list[PoolStats])
+async def read_pool_stats(
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    Connection pool usage of this worker: connections in use, overflow and checkout waits. (Admin only)
+    """
+    return [metrics.stats() for metrics in pools.values()]
@@ -22,7 +22,7 @@ async def login_for_access_token(
     OAuth2 compatible token login, get an access token for future requests.
     """
     user = await user_crud.get_by_login(db, login=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user or not await security.password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect login or password",
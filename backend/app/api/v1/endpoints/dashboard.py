@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.deps import get_current_user, get_db_session
+from app.api.v1.deps import check_data_etag, get_current_user, get_read_db_session
 from app.crud.dashboard import dashboard as dashboard_crud
 from app.models import User
-from app.schemas.dashboard import DashboardData
+from app.schemas.dashboard import DashboardData, DashboardTimeseries
 
 router = APIRouter()
 
-@router.get("/", response_model=DashboardData)
+@router.get("/", response_model=DashboardData, dependencies=[Depends(check_data_etag)])
 async def read_dashboard_data(
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -18,4 +20,29 @@ async def read_dashboard_data(
     If an admin uses `as_user_id` query param, the data will be for that user.
     """
     data = await dashboard_crud.get_dashboard_data(db, user_id=current_user.id)
-    return data
\ No newline at end of file
+    return data
+
+@router.get("/timeseries", response_model=DashboardTimeseries, dependencies=[Depends(check_data_etag)])
+async def read_dashboard_timeseries(
+    db: AsyncSession = Depends(get_read_db_session),
+    current_user: User = Depends(get_current_user),
+    granularity: Literal["day", "month"] = Query("month"),
+    date_from: date | None = Query(None, description="First day to include"),
+    date_to: date | None = Query(None, description="First day to exclude"),
+    group_by: Literal["sphere", "location"] | None = Query(None),
+    include_transfers: bool = Query(False),
+):
+    """
+    Income and spend per day or month for the current user, optionally split by sphere or location.
+    Served from pre-aggregated rollups. Periods (UTC) overlapping [date_from, date_to) are included.
+    Transfers are excluded unless `include_transfers` is set.
+    """
+    return await dashboard_crud.get_timeseries(
+        db,
+        user_id=current_user.id,
+        granularity=granularity,
+        date_from=date_from,
+        date_to=date_to,
+        group_by=group_by,
+        include_transfers=include_transfers,
+    )
\ No newline at end of file
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.deps import get_current_user, get_db_session
+from app.core.jobs import job_runner
+from app.crud.job import job as job_crud
+from app.db.session import AsyncSessionLocal
+from app.models import Job, User
+from app.models.job import JobStatus
+from app.schemas.job import BalanceRebuildJob, JobCreate, JobRead
+
+router = APIRouter()
+
+async def _get_job(db: AsyncSession, job_id: int, user: User) -> Job:
+    job = await job_crud.get(db, id=job_id)
+    if not job or (job.owner_id != user.id and not user.is_admin):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.post("/", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    *,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+    job_in: JobCreate,
+):
+    """
+    Queue a background job and return it right away; poll GET /jobs/{id} for its progress.
+    Rebuilding balances is admin only.
+    """
+    if isinstance(job_in, BalanceRebuildJob) and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges",
+        )
+    params = job_in.model_dump(mode="json", exclude={"kind"})
+    job = await job_crud.enqueue(db, kind=job_in.kind, owner_id=current_user.id, params=params)
+    job_runner.wake()
+    return job
+
+@router.get("/", response_model=list[JobRead])
+async def read_jobs(
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    The current user's most recent jobs, newest first.
+    """
+    return await job_crud.get_multi_for_owner(db, owner_id=current_user.id)
+
+@router.get("/{job_id}", response_model=JobRead)
+async def read_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get a job with its progress and, once finished, its result or error.
+    """
+    return await _get_job(db, job_id, current_user)
+
+@router.post("/{job_id}/cancel", response_model=JobRead)
+async def cancel_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Cancel a job. A queued job is cancelled right away; a running one stops shortly after,
+    until then it stays running with cancel_requested set.
+    """
+    await _get_job(db, job_id, current_user)
+    job = await job_crud.request_cancel(db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The job has already finished")
+    return job
+
+async def _result_body(job_id: int):
+    # The response body outlives the request-scoped session, so the cursor gets its own
+    async with AsyncSessionLocal() as db:
+        async for chunk in job_crud.stream_result(db, job_id=job_id):
+            yield chunk
+
+@router.get("/{job_id}/result")
+async def download_job_result(
+    job_id: int,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download the file produced by a finished export job.
+    """
+    job = await _get_job(db, job_id, current_user)
+    if job.status != JobStatus.SUCCEEDED or not job.result or "format" not in job.result:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The job has no result file")
+    format = job.result["format"]
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _result_body(job.id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="records.{format}"'},
+    )
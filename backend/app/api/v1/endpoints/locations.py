@@ -1,16 +1,16 @@
 from fastapi import APIRouter, Depends, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.deps import get_current_user, get_db_session, get_location_with_read_permission, get_location_with_edit_permission
+from app.api.v1.deps import check_data_etag, get_current_user, get_db_session, get_read_db_session, get_location_with_read_permission, get_location_with_edit_permission, get_location_with_owner_permission
 from app.crud.location import location as location_crud
 from app.models import User, Location
 from app.schemas.location import LocationCreate, LocationRead, LocationUpdate
 
 router = APIRouter()
 
-@router.get("/", response_model=list[LocationRead])
+@router.get("/", response_model=list[LocationRead], dependencies=[Depends(check_data_etag)])
 async def read_locations(
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -59,7 +59,7 @@ async def update_location(
 async def delete_location(
     *,
     db: AsyncSession = Depends(get_db_session),
-    location_to_delete: Location = Depends(get_location_with_edit_permission)
+    location_to_delete: Location = Depends(get_location_with_owner_permission)
 ):
     """
     Delete a location.
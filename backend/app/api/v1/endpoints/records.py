@@ -1,49 +1,139 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from datetime import datetime
+from typing import Any, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.deps import get_current_user, get_db_session
+from app.api.v1.deps import check_data_etag, get_current_user, get_db_session, get_read_db_session
+from app.core.encoding import FastJSONResponse
+from app.core.streaming import encode_csv, encode_ndjson, iter_csv_rows, iter_ndjson_rows
 from app.crud.accounting_record import record as record_crud
-from app.crud.sphere import sphere as sphere_crud
-from app.crud.location import location as location_crud
+from app.crud.permission import permission as permission_crud
+from app.crud.record_batch import record_batch as record_batch_crud
+from app.crud.record_import import record_import as record_import_crud
+from app.db.session import WRITE_LSN_COOKIE, AsyncSessionLocal, get_read_engine, parse_write_lsn
 from app.models import User
-from app.schemas.accounting_record import RecordCreate, RecordRead, PaginatedRecordRead
+from app.models.accounting_record import OperationType
+from app.schemas.accounting_record import (
+    RecordCreate, RecordRead, PaginatedRecordRead, CursorPaginatedRecordRead, RecordImportResult,
+    CompactPaginatedRecordRead, CompactCursorPaginatedRecordRead, RecordBatch, RecordBatchResult, RecordFilter,
+)
 
 router = APIRouter()
 
-async def _validate_resource_permissions(db: AsyncSession, user: User, sphere_ids: list[int] = [], location_ids: list[int] = []):
+async def _validate_resource_permissions(db: AsyncSession, user: User, record_in: RecordCreate):
     """
-    Helper to check if a user has EDIT permissions on all provided spheres and locations.
+    Helper to check if a user has EDIT permissions on all spheres and locations the record references.
     """
-    for sphere_id in set(sphere_ids):
-        sphere = await sphere_crud.get(db, id=sphere_id)
-        if not sphere:
-            raise HTTPException(status.HTTP_404_NOT_FOUND, f"Sphere with id {sphere_id} not found.")
-        if user.id != sphere.owner_id and not any(editor.id == user.id for editor in sphere.editors) and not user.is_admin:
-            raise HTTPException(status.HTTP_403_FORBIDDEN, f"You don't have edit permissions for sphere '{sphere.name}'.")
-    
-    for location_id in set(location_ids):
-        location = await location_crud.get(db, id=location_id)
-        if not location:
-            raise HTTPException(status.HTTP_404_NOT_FOUND, f"Location with id {location_id} not found.")
-        if user.id != location.owner_id and not any(editor.id == user.id for editor in location.editors) and not user.is_admin:
-            raise HTTPException(status.HTTP_403_FORBIDDEN, f"You don't have edit permissions for location '{location.name}'.")
+    sphere_ids, location_ids = record_crud.get_resource_ids(record_in)
+    denial = await permission_crud.check_edit(db, user=user, sphere_ids=sphere_ids, location_ids=location_ids)
+    if denial:
+        code = status.HTTP_404_NOT_FOUND if denial.reason == "not_found" else status.HTTP_403_FORBIDDEN
+        raise HTTPException(code, denial.detail)
+
+
+def _record_filter(
+    sphere_id: int | None = Query(None, description="Only records of this sphere"),
+    location_id: int | None = Query(None, description="Only records of this location"),
+    operation_type: OperationType | None = Query(None, description="Only incomes or only spends"),
+    is_transfer: bool | None = Query(None, description="Only transfer legs, or only regular records"),
+    date_from: datetime | None = Query(None, description="Only records on or after this moment"),
+    date_to: datetime | None = Query(None, description="Only records before this moment"),
+    sum_min: float | None = Query(None, ge=0, description="Only records with at least this sum"),
+    sum_max: float | None = Query(None, ge=0, description="Only records with at most this sum"),
+) -> RecordFilter:
+    try:
+        return RecordFilter(
+            sphere_id=sphere_id, location_id=location_id, operation_type=operation_type, is_transfer=is_transfer,
+            date_from=date_from, date_to=date_to, sum_min=sum_min, sum_max=sum_max,
+        )
+    except ValidationError as e:
+        # Inconsistent ranges; reported like any other invalid query parameter
+        raise RequestValidationError(
+            [{**error, "loc": ("query", *error["loc"])} for error in e.errors(include_url=False, include_context=False)]
+        )
 
 
-@router.get("/", response_model=PaginatedRecordRead)
+@router.get(
+    "/",
+    response_model=PaginatedRecordRead | CursorPaginatedRecordRead | CompactPaginatedRecordRead | CompactCursorPaginatedRecordRead,
+    dependencies=[Depends(check_data_etag)],
+)
 async def read_records(
-    db: AsyncSession = Depends(get_db_session),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_session),
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(20, ge=1, le=100, description="Page size"),
+    pagination: Literal["page", "cursor"] = Query("page", description="Pagination mode"),
+    cursor: str | None = Query(None, description="Cursor mode: `next_cursor`/`prev_cursor` from a previous response"),
+    include_total: bool = Query(False, description="Cursor mode: also compute the total number of records"),
+    view: Literal["full", "compact"] = Query("full", description="Response shape"),
+    filters: RecordFilter = Depends(_record_filter),
 ):
     """
     Retrieve paginated financial records for the current user.
+    Filters (sphere, location, operation type, transfer flag, date and sum ranges) are combined
+    with AND; totals and cursors apply to the filtered records.
+    - **pagination: "page"**: Classic page/size pagination with total count.
+    - **pagination: "cursor"**: Keyset pagination; every page costs the same regardless of depth.
+    - **view: "full"**: Every record embeds its sphere and location with their owners.
+    - **view: "compact"**: Records carry `sphere_id`/`location_id`; the referenced spheres, locations
+      and users are returned once each in the `spheres`, `locations` and `users` maps.
     """
-    paginated_records = await record_crud.get_multi_for_user_paginated(
-        db, user_id=current_user.id, page=page, size=size
-    )
-    return paginated_records
+    compact = view == "compact"
+    if pagination == "cursor":
+        try:
+            records_page = await record_crud.get_multi_for_user_keyset(
+                db, user_id=current_user.id, size=size, cursor=cursor, with_total=include_total,
+                compact=compact, filters=filters,
+            )
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    else:
+        records_page = await record_crud.get_multi_for_user_paginated(
+            db, user_id=current_user.id, page=page, size=size, compact=compact, filters=filters
+        )
+
+    if compact:
+        # Plain data from column queries: encoded directly, without response-model validation
+        return FastJSONResponse(await record_crud.with_references(db, records_page), headers=response.headers)
+    return records_page
+
+
+@router.get(
+    "/search",
+    response_model=CursorPaginatedRecordRead | CompactCursorPaginatedRecordRead,
+    dependencies=[Depends(check_data_etag)],
+)
+async def search_records(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_session),
+    current_user: User = Depends(get_current_user),
+    q: str = Query(..., min_length=1, max_length=100, description="Words to look for"),
+    size: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: str | None = Query(None, description="`next_cursor` from a previous response"),
+    view: Literal["full", "compact"] = Query("full", description="Response shape, as in `GET /records`"),
+):
+    """
+    Search the current user's records by description and by sphere and location names.
+    Records whose description or sphere/location name contains every word of `q` (in any
+    grammatical form; the last word may be incomplete) are returned, best matches first; where
+    the server supports it, misspelled words match too. Pages are cursor-based, as in `GET /records?pagination=cursor`.
+    """
+    compact = view == "compact"
+    try:
+        records_page = await record_crud.search_for_user(
+            db, user_id=current_user.id, query=q, size=size, cursor=cursor, compact=compact
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if compact:
+        return FastJSONResponse(await record_crud.with_references(db, records_page), headers=response.headers)
+    return records_page
 
 
 @router.post("/", response_model=list[RecordRead], status_code=status.HTTP_201_CREATED)
@@ -59,26 +149,98 @@ async def create_record(
     - **type: "Spend"**: Creates a single spend record.
     - **type: "Transfer"**: Creates a pair of records (spend + income) to represent a transfer.
     """
-    spheres_to_check = []
-    locations_to_check = []
-
-    if record_in.type in ["Income", "Spend"]:
-        spheres_to_check.append(record_in.sphere_id)
-        locations_to_check.append(record_in.location_id)
-    elif record_in.type == "Transfer":
-        if record_in.transfer_type == "location":
-            spheres_to_check.append(record_in.sphere_id)
-            locations_to_check.extend([record_in.from_location_id, record_in.to_location_id])
-        elif record_in.transfer_type == "sphere":
-            spheres_to_check.extend([record_in.from_sphere_id, record_in.to_sphere_id])
-            locations_to_check.append(record_in.location_id)
-
-    await _validate_resource_permissions(db, current_user, sphere_ids=spheres_to_check, location_ids=locations_to_check)
+    await _validate_resource_permissions(db, current_user, record_in)
     
     created_records = await record_crud.create_record(db, obj_in=record_in, owner_id=current_user.id)
     return created_records
 
 
+@router.post("/batch", response_model=RecordBatchResult)
+async def batch_records(
+    batch: RecordBatch,
+    response: Response,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Create, update and delete several records in one transaction.
+    Each operation behaves like the corresponding single-record endpoint:
+    - **op: "create"**: `record` as in `POST /records`.
+    - **op: "update"**: `id` and `record` as in `PUT /records/{id}`.
+    - **op: "delete"**: `id` as in `DELETE /records/{id}`.
+
+    Results are reported per operation, in request order. If any operation fails its checks,
+    none is applied and the response status is 400.
+    """
+    result = await record_batch_crud.execute(db, operations=batch.operations, user=current_user)
+    if not result["applied"]:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    return result
+
+
+@router.post("/import", response_model=RecordImportResult)
+async def import_records(
+    request: Request,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_user),
+    format: Literal["csv", "ndjson"] | None = Query(None, description="Body format; taken from Content-Type if omitted"),
+):
+    """
+    Bulk import records from the request body, streamed as CSV (with a header line) or NDJSON.
+    Every row has the same fields as `POST /records`. Invalid rows and rows referencing
+    spheres or locations without edit permission are skipped and reported; the rest
+    are imported in a single transaction.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "json" in content_type:
+            format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass the format parameter",
+            )
+
+    parse_rows = iter_csv_rows if format == "csv" else iter_ndjson_rows
+    try:
+        return await record_import_crud.import_rows(db, rows=parse_rows(request.stream()), user=current_user)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request body must be UTF-8 encoded")
+
+
+async def _export_body(
+    user_id: int, min_lsn: int | None, format: str, date_from: datetime | None, date_to: datetime | None
+):
+    # The response body outlives the request-scoped session, so the cursor gets its own
+    async with AsyncSessionLocal(bind=get_read_engine(user_id, min_lsn)) as db:
+        batches = record_crud.stream_for_export(db, user_id=user_id, date_from=date_from, date_to=date_to)
+        encode = encode_csv if format == "csv" else encode_ndjson
+        async for chunk in encode(batches, record_crud.export_columns):
+            yield chunk
+
+
+@router.get("/export")
+async def export_records(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    format: Literal["csv", "ndjson"] = Query("csv", description="Output format"),
+    date_from: datetime | None = Query(None, description="Only records on or after this moment"),
+    date_to: datetime | None = Query(None, description="Only records before this moment"),
+):
+    """
+    Stream the full record history of the current user as CSV or NDJSON.
+    Sphere and location are flattened to id and name columns.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_body(current_user.id, parse_write_lsn(request.cookies.get(WRITE_LSN_COOKIE)), format, date_from, date_to),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="records.{format}"'},
+    )
+
+
 @router.get("/{record_id}", response_model=RecordRead)
 async def read_record(
     record_id: int,
@@ -88,7 +250,8 @@ async def read_record(
     """
     Get a specific record by ID.
     """
-    record = await record_crud.get(db, id=record_id)
+    # Sphere and location (with their owners) have to be loaded up front in async code
+    record = next(iter(await record_crud.get_multi_by_ids(db, [record_id])), None)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Record not found")
     if record.owner_id != current_user.id and not current_user.is_admin:
@@ -114,21 +277,7 @@ async def update_record(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     
     # Validate permissions for new resources
-    spheres_to_check = []
-    locations_to_check = []
-
-    if record_in.type in ["Income", "Spend"]:
-        spheres_to_check.append(record_in.sphere_id)
-        locations_to_check.append(record_in.location_id)
-    elif record_in.type == "Transfer":
-        if record_in.transfer_type == "location":
-            spheres_to_check.append(record_in.sphere_id)
-            locations_to_check.extend([record_in.from_location_id, record_in.to_location_id])
-        elif record_in.transfer_type == "sphere":
-            spheres_to_check.extend([record_in.from_sphere_id, record_in.to_sphere_id])
-            locations_to_check.append(record_in.location_id)
-
-    await _validate_resource_permissions(db, current_user, sphere_ids=spheres_to_check, location_ids=locations_to_check)
+    await _validate_resource_permissions(db, current_user, record_in)
     
     updated_record = await record_crud.update_record(db, db_obj=record, obj_in=record_in)
     return updated_record
@@ -2,16 +2,16 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.deps import get_current_user, get_db_session, get_sphere_with_read_permission, get_sphere_with_edit_permission
+from app.api.v1.deps import check_data_etag, get_current_user, get_db_session, get_read_db_session, get_sphere_with_read_permission, get_sphere_with_edit_permission, get_sphere_with_owner_permission
 from app.crud.sphere import sphere as sphere_crud
 from app.models import User, Sphere
 from app.schemas.sphere import SphereCreate, SphereRead, SphereUpdate
 
 router = APIRouter()
 
-@router.get("/", response_model=list[SphereRead])
+@router.get("/", response_model=list[SphereRead], dependencies=[Depends(check_data_etag)])
 async def read_spheres(
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -60,7 +60,7 @@ async def update_sphere(
 async def delete_sphere(
     *,
     db: AsyncSession = Depends(get_db_session),
-    sphere_to_delete: Sphere = Depends(get_sphere_with_edit_permission)
+    sphere_to_delete: Sphere = Depends(get_sphere_with_owner_permission)
 ):
     """
     Delete a sphere.
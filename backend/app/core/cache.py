@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.core.metrics import CACHE_LOOKUPS
+
+# All caches by name, for stats reporting
+caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry and hit/miss counters.
+    Each worker process has its own copy, so the TTL bounds how long another
+    worker can serve an entry that was invalidated elsewhere.
+    A TTL of 0 disables the cache.
+    """
+
+    def __init__(self, name: str, *, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._hit_metric = CACHE_LOOKUPS.labels(name, "hit")
+        self._miss_metric = CACHE_LOOKUPS.labels(name, "miss")
+        caches[name] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            self._miss_metric.inc()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._hit_metric.inc()
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
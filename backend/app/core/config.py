@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn, computed_field
 
@@ -17,6 +19,66 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_PORT: int
 
+    # Connection pool of each engine (primary and every replica), per worker process.
+    # Size workers so that workers * engines * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below max_connections.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # -1 disables recycling
+    # asyncpg prepared statement cache per connection; 0 behind pgbouncer in transaction mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # "always" pings on every checkout, "idle" only connections idle longer than
+    # DB_POOL_PRE_PING_IDLE_SECONDS, "never" relies on recycling and error handling
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 30
+
+    # bcrypt thread pool (per worker process)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Authenticated user cache (per worker process)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+
+    # Sphere/location permission index (per worker process, checked against userdataversion)
+    ACL_CACHE_TTL_SECONDS: float = 30
+    ACL_CACHE_MAX_SIZE: int = 10000
+
+    # Yearly accountingrecord partitions to keep ahead of the current year
+    RECORD_PARTITION_YEARS_AHEAD: int = 1
+    PARTITION_MAINTENANCE_INTERVAL_SECONDS: float = 6 * 3600
+
+    # Prometheus metrics at /metrics (see app/core/metrics.py for multiple workers)
+    METRICS_ENABLED: bool = True
+
+    # Per-request SQL profiler (app/core/profiling.py), off by default
+    SQL_PROFILER_ENABLED: bool = False
+    SQL_PROFILE_SLOW_REQUEST_MS: float = 500
+    SQL_PROFILE_REPEAT_THRESHOLD: int = 5
+    # Return the profile summary in an X-SQL-Profile response header
+    SQL_PROFILE_HEADER: bool = False
+
+    # Background jobs (app/core/jobs.py), run by every worker process that has the runner enabled.
+    # Each running job holds a connection of the primary pool for its whole duration.
+    JOB_RUNNER_ENABLED: bool = True
+    JOB_WORKER_CONCURRENCY: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 2
+    # Progress writes and cancellation checks of a running job, at most this often
+    JOB_PROGRESS_INTERVAL_SECONDS: float = 1
+    # Running jobs without a heartbeat for this long (their worker died) are marked failed
+    JOB_HEARTBEAT_TIMEOUT_SECONDS: float = 60
+    # Finished jobs and their result files (stored in jobresultchunk) are deleted after this many days
+    JOB_RETENTION_DAYS: float = 7
+
+    # Read replicas: comma-separated SQLAlchemy URIs (postgresql+asyncpg://...), empty = primary only
+    DATABASE_REPLICA_URIS: str = ""
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 5
+    REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS: float = 2
+    REPLICA_MAX_LAG_SECONDS: float = 10
+    # How long a user's reads stay on the primary after they commit a write, in the worker process
+    # that served the write; other workers rely on the write_lsn cookie (see WriteLSNMiddleware)
+    READ_YOUR_WRITES_SECONDS: float = 5
+
     @computed_field
     @property
     def ASYNC_DATABASE_URI(self) -> PostgresDsn:
@@ -29,6 +91,10 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @property
+    def replica_uris(self) -> list[str]:
+        return [uri.strip() for uri in self.DATABASE_REPLICA_URIS.split(",") if uri.strip()]
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Awaitable, Callable
+
+from app.core.config import settings
+from app.crud.job import job as job_crud
+from app.db.session import AsyncSessionLocal
+from app.models.job import JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Jobs are rows of the job table (app/models/job.py); every worker process with the runner
+# enabled claims queued rows, runs their handler as an asyncio task and stores the outcome.
+# There is no broker: claims are serialized in Postgres, so any number of workers can share the queue.
+
+class JobCancelled(Exception):
+    """Raised inside a handler once its cancellation was requested."""
+
+
+class JobError(Exception):
+    """A handler failure whose message is shown to the user; other exceptions are reported as an internal error."""
+
+
+@dataclass
+class JobHandler:
+    kind: str
+    func: Callable[["JobContext"], Awaitable[dict | None]]
+    # Running jobs of this kind across all workers
+    max_concurrency: int
+
+
+handlers: dict[str, JobHandler] = {}
+
+def job_handler(kind: str, *, max_concurrency: int = 1):
+    """ Register `func(ctx) -> result dict` as the handler of jobs of `kind`. """
+    def register(func):
+        handlers[kind] = JobHandler(kind, func, max_concurrency)
+        return func
+    return register
+
+
+class JobContext:
+    """ What a handler gets: the job's parameters and a way to report progress. """
+
+    def __init__(self, job_id: int, owner_id: int, params: dict[str, Any], worker: str):
+        self.job_id = job_id
+        self.owner_id = owner_id
+        self.params = params
+        self.worker = worker
+        self._reported_at = 0.0
+
+    async def progress(self, fraction: float, message: str | None = None, *, force: bool = False) -> None:
+        """
+        Report progress (0..1). Writes are throttled to JOB_PROGRESS_INTERVAL_SECONDS unless forced;
+        each write also checks for cancellation and raises JobCancelled if it was requested
+        (or if the job is no longer this worker's, see CRUDJob.fail_stale).
+        """
+        now = time.monotonic()
+        if not force and now - self._reported_at < settings.JOB_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._reported_at = now
+        async with AsyncSessionLocal() as db:
+            stop = await job_crud.report_progress(
+                db, job_id=self.job_id, worker=self.worker, progress=min(max(fraction, 0.0), 1.0), message=message
+            )
+        if stop:
+            raise JobCancelled()
+
+
+class JobRunner:
+    """
+    Claims and runs jobs in this process, at most `concurrency` at a time. Also keeps the
+    heartbeats of its jobs fresh, fails jobs of workers that died and purges old jobs.
+    """
+
+    def __init__(self, concurrency: int | None = None):
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: dict[int, asyncio.Task] = {}
+        # Jobs whose task was stopped by poll (cancelled, or no longer this worker's) rather than by shutdown
+        self._cancelled: set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._purged_at = 0.0
+
+    def wake(self) -> None:
+        """ Poll right away instead of at the next interval, e.g. after enqueueing a job. """
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        """ Poll for as long as the process runs; on cancellation the running jobs are put back in the queue. """
+        try:
+            while True:
+                try:
+                    await self.poll()
+                except Exception:
+                    logger.exception("Job runner poll failed")
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL_SECONDS)
+                except TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def poll(self) -> None:
+        async with AsyncSessionLocal() as db:
+            if self._tasks:
+                for job_id in await job_crud.heartbeat(db, job_ids=list(self._tasks), worker=self.worker):
+                    # Handlers that do not report progress often are stopped here; so are jobs
+                    # that fail_stale gave up on while this worker was still running them
+                    self._cancelled.add(job_id)
+                    self._tasks[job_id].cancel()
+            await job_crud.fail_stale(db, timeout_seconds=settings.JOB_HEARTBEAT_TIMEOUT_SECONDS)
+            if time.monotonic() - self._purged_at > 3600:
+                self._purged_at = time.monotonic()
+                await job_crud.purge(db, older_than=timedelta(days=settings.JOB_RETENTION_DAYS))
+
+            limits = {kind: handler.max_concurrency for kind, handler in handlers.items()}
+            while len(self._tasks) < self.concurrency:
+                job = await job_crud.claim(db, limits=limits, worker=self.worker)
+                if job is None:
+                    break
+                self._tasks[job.id] = asyncio.create_task(self._execute(job.id, job.kind, job.owner_id, job.params))
+
+    async def wait(self) -> None:
+        """ Wait until the jobs started so far have finished. """
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _execute(self, job_id: int, kind: str, owner_id: int, params: dict) -> None:
+        status, result, error = JobStatus.SUCCEEDED, None, None
+        try:
+            result = await handlers[kind].func(JobContext(job_id, owner_id, params, self.worker))
+        except JobCancelled:
+            status = JobStatus.CANCELLED
+        except asyncio.CancelledError:
+            if job_id not in self._cancelled:
+                # Shutdown: another worker picks the job up again
+                async with AsyncSessionLocal() as db:
+                    await job_crud.requeue(db, job_ids=[job_id], worker=self.worker)
+                self._tasks.pop(job_id, None)
+                raise
+            status = JobStatus.CANCELLED
+        except JobError as e:
+            status, error = JobStatus.FAILED, str(e)
+        except Exception:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            status, error = JobStatus.FAILED, "Internal error"
+        try:
+            async with AsyncSessionLocal() as db:
+                if not await job_crud.finish(db, job_id=job_id, worker=self.worker, status=status, result=result, error=error):
+                    logger.warning("Job %s (%s) was taken from this worker before it finished", job_id, kind)
+        finally:
+            self._tasks.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+job_runner = JobRunner()
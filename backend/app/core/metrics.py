@@ -0,0 +1,132 @@
+import functools
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Prometheus metrics of the API.
+# With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by
+# the workers (before they start): every worker writes its samples there and /metrics,
+# whichever worker serves it, aggregates all of them.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served", ["method"], multiprocess_mode="livesum"
+)
+DB_STATEMENTS = Counter(
+    "db_statements_total", "SQL statements executed", ["engine", "operation"]
+)
+DB_LATENCY = Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time", ["engine", "operation"],
+    buckets=DB_LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "In-process cache lookups; hit ratio = hit / (hit + miss)", ["cache", "result"]
+)
+
+# Requests that matched no route share one label value to keep cardinality bounded
+UNMATCHED_ROUTE = "<unmatched>"
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY"}
+
+
+class PrometheusMiddleware:
+    """ Records latency, status and in-flight count of every HTTP request, labelled by route template. """
+
+    def __init__(self, app: ASGIApp, *, excluded_paths: tuple[str, ...] = ()):
+        self.app = app
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            requests, latency = _request_metrics(method, _route_template(scope), status_code)
+            requests.inc()
+            latency.observe(elapsed)
+
+
+@functools.lru_cache(maxsize=4096)
+def _request_metrics(method: str, route: str, status_code: int) -> tuple:
+    # labels() takes a lock and builds a key on every call; the children never change
+    return HTTP_REQUESTS.labels(method, route, str(status_code)), HTTP_LATENCY.labels(method, route)
+
+
+def _route_template(scope: Scope) -> str:
+    # The router stores the matched route in the scope. Routes of included routers may carry
+    # their path relative to the router prefix; the prefix is then the part of the request
+    # path in front of the route's own segments.
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    segments = scope["path"].split("/")
+    return "/".join(segments[:len(segments) - template.count("/")]) + template
+
+
+@functools.lru_cache(maxsize=None)
+def _statement_metrics(engine: str, operation: str) -> tuple:
+    return DB_STATEMENTS.labels(engine, operation), DB_LATENCY.labels(engine, operation)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """ Count and time the statements executed through `engine` under engine=`name`. """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("metrics_started")
+        operation = statement.lstrip()[:7].split(None, 1)[0].upper()
+        if operation not in _OPERATIONS:
+            operation = "OTHER"
+        statements, latency = _statement_metrics(name, operation)
+        statements.inc()
+        latency.observe(elapsed)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """ Exposition of all metrics (of all workers in multiprocess mode) and its content type. """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead() -> None:
+    """ Drop this worker's in-flight gauge samples when it shuts down (multiprocess mode). """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,49 @@
+import base64
+import json
+from datetime import datetime
+from typing import Literal
+
+CursorDirection = Literal["next", "prev"]
+
+
+def encode_cursor(direction: CursorDirection, date: datetime, id: int) -> str:
+    """
+    Pack a keyset position (date, id) and the paging direction into an opaque token.
+    """
+    payload = json.dumps({"d": direction, "t": date.isoformat(), "i": id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[CursorDirection, datetime, int]:
+    """
+    Inverse of `encode_cursor`. Raises ValueError for malformed or tampered tokens.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(payload["t"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_search_cursor(rank: float, date: datetime, id: int) -> str:
+    """
+    Pack a search keyset position (rank, date, id) into an opaque token.
+    """
+    payload = json.dumps({"r": rank, "t": date.isoformat(), "i": id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, datetime, int]:
+    """
+    Inverse of `encode_search_cursor`. Raises ValueError for malformed or tampered tokens.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(payload["r"]), datetime.fromisoformat(payload["t"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,146 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Opt-in per-request SQL profiler (SQL_PROFILER_ENABLED). Every statement executed while a
+# request is served is recorded with its duration and the application code that issued it;
+# statement shapes that repeat within one request (the N+1 pattern) are flagged.
+# Requests slower than SQL_PROFILE_SLOW_REQUEST_MS or with repeated shapes are logged;
+# with SQL_PROFILE_HEADER a summary is also returned in the X-SQL-Profile header.
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+# Middleware and other plumbing; statements are issued from the api, crud and db packages
+_SKIPPED_DIR = os.path.join(APP_DIR, "core") + os.sep
+CALL_SITE_DEPTH = 3
+
+# Runs of bind parameters (expanded IN lists, multi-row VALUES) vary in length between calls
+_PARAM_RUN = re.compile(r"\$\d+(?:::[\w ]+)?(?:\s*,\s*\$\d+(?:::[\w ]+)?)*")
+_VALUES_RUN = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+
+@dataclass
+class StatementRecord:
+    statement: str
+    seconds: float
+    call_site: str
+
+
+@dataclass
+class SQLProfile:
+    statements: list[StatementRecord] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(s.seconds for s in self.statements)
+
+    def repeated(self, threshold: int | None = None) -> list[tuple[str, list[StatementRecord]]]:
+        """ Statement shapes executed at least `threshold` times, most frequent first. """
+        if threshold is None:
+            threshold = settings.SQL_PROFILE_REPEAT_THRESHOLD
+        by_shape: dict[str, list[StatementRecord]] = defaultdict(list)
+        for record in self.statements:
+            by_shape[statement_shape(record.statement)].append(record)
+        repeated = [(shape, records) for shape, records in by_shape.items() if len(records) >= threshold]
+        return sorted(repeated, key=lambda item: len(item[1]), reverse=True)
+
+    def summary(self) -> str:
+        return (
+            f"statements={len(self.statements)}; db_ms={self.total_seconds * 1000:.1f}; "
+            f"repeated={len(self.repeated())}"
+        )
+
+    def report(self) -> str:
+        lines = [self.summary()]
+        for shape, records in self.repeated():
+            sites = sorted({r.call_site for r in records})
+            lines.append(
+                f"  repeated x{len(records)} ({sum(r.seconds for r in records) * 1000:.1f} ms) from {', '.join(sites)}: {shape[:300]}"
+            )
+        for record in sorted(self.statements, key=lambda r: r.seconds, reverse=True)[:5]:
+            lines.append(f"  {record.seconds * 1000:.1f} ms from {record.call_site}: {record.statement[:300]}")
+        return "\n".join(lines)
+
+
+current_profile: ContextVar[SQLProfile | None] = ContextVar("sql_profile", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    shape = _PARAM_RUN.sub("?", statement)
+    return _VALUES_RUN.sub(r"\1", shape)
+
+
+def _call_site() -> str:
+    # Inside SQLAlchemy's greenlet the caller's coroutine frames are on the parent greenlet
+    frames = []
+    current = greenlet.getcurrent()
+    for frame in (sys._getframe(1), current.parent.gr_frame if current.parent else None):
+        while frame is not None and len(frames) < CALL_SITE_DEPTH:
+            filename = frame.f_code.co_filename
+            if filename.startswith(APP_DIR) and not filename.startswith(_SKIPPED_DIR):
+                frames.append(f"{filename[len(APP_DIR):]}:{frame.f_lineno} {frame.f_code.co_name}")
+            frame = frame.f_back
+    return " < ".join(frames) or "?"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info["profile_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is None or "profile_started" not in conn.info:
+        return
+    elapsed = time.perf_counter() - conn.info.pop("profile_started")
+    profile.statements.append(StatementRecord(statement, elapsed, _call_site()))
+
+
+class SQLProfilerMiddleware:
+    """ Profiles the SQL of each HTTP request while SQL_PROFILER_ENABLED is set. """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.SQL_PROFILER_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        profile = SQLProfile()
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.SQL_PROFILE_HEADER:
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-sql-profile", profile.summary().encode()),
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= settings.SQL_PROFILE_SLOW_REQUEST_MS or profile.repeated():
+                logger.warning(
+                    "SQL profile of %s %s (%.1f ms): %s",
+                    scope["method"], scope["path"], elapsed_ms, profile.report(),
+                )
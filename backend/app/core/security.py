@@ -1,5 +1,8 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Callable, TypeVar, Union
 
 from jose import jwt
 from passlib.context import CryptContext
@@ -10,6 +13,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = settings.ALGORITHM
 
+T = TypeVar("T")
+
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta | None = None
 ) -> str:
@@ -27,4 +32,78 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashing operations are already waiting."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool so it never blocks the event loop.
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    At most `max_workers` operations run at once; at most `max_pending` more may wait,
+    further callers get PasswordHasherBusy instead of queueing without bound.
+    """
+
+    def __init__(self, *, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._slots = asyncio.Semaphore(max_workers)
+        self._waiting = 0
+        self.calls = 0
+        self.rejected = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if self._waiting >= self.max_pending and self._slots.locked():
+            self.rejected += 1
+            raise PasswordHasherBusy()
+
+        enqueued = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            started = time.perf_counter()
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            finished = time.perf_counter()
+        finally:
+            self._slots.release()
+
+        queued = started - enqueued
+        self.calls += 1
+        self.queue_seconds_total += queued
+        self.queue_seconds_max = max(self.queue_seconds_max, queued)
+        self.run_seconds_total += finished - started
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "waiting": self._waiting,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "queue_seconds_avg": self.queue_seconds_total / self.calls if self.calls else 0.0,
+            "queue_seconds_max": self.queue_seconds_max,
+            "run_seconds_avg": self.run_seconds_total / self.calls if self.calls else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
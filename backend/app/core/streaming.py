@@ -0,0 +1,127 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Sequence
+
+
+class RowParseError(ValueError):
+    """A single input row could not be decoded; the rest of the stream is still usable."""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a byte stream into decoded lines without buffering more than one chunk.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict[str, Any] | RowParseError]]:
+    """
+    Yield (line number, object) for every non-empty line of an NDJSON stream.
+    Undecodable lines are yielded as RowParseError instead of aborting the stream.
+    """
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            yield line_no, RowParseError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(value, dict):
+            yield line_no, RowParseError("Expected a JSON object")
+            continue
+        yield line_no, value
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict[str, Any] | RowParseError]]:
+    """
+    Yield (row number, mapping) for every data row of a CSV stream with a header line.
+    Empty cells are omitted so that schema defaults apply. Quoted fields may span lines.
+    """
+    header: list[str] | None = None
+    pending: list[str] = []
+    row_no = 0
+    async for line in iter_lines(chunks):
+        pending.append(line)
+        # An odd number of quotes means a quoted field continues on the next line
+        if sum(part.count('"') for part in pending) % 2:
+            continue
+        fields = next(csv.reader(part + "\n" for part in pending), [])
+        pending = []
+
+        if header is None:
+            header = [name.strip().lstrip("\ufeff") for name in fields]
+            continue
+        if not any(field.strip() for field in fields):
+            continue
+        row_no += 1
+        if len(fields) != len(header):
+            yield row_no, RowParseError(f"Expected {len(header)} fields, got {len(fields)}")
+            continue
+        yield row_no, {name: value for name, value in zip(header, fields) if value != ""}
+
+    if pending:
+        yield row_no + 1, RowParseError("Unterminated quoted field")
+
+
+def _plain(value: Any) -> Any:
+    """ JSON/CSV-friendly representation of a database value. """
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, Decimal):
+        return str(value)
+    return _plain(value)
+
+
+async def encode_csv(batches: AsyncIterator[Sequence[Any]], columns: Sequence[str]) -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows (sequences ordered like `columns`) as CSV with a header line.
+    One output chunk is produced per batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    async for batch in batches:
+        for row in batch:
+            writer.writerow([_csv_cell(v) for v in row])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def encode_ndjson(batches: AsyncIterator[Sequence[Any]], columns: Sequence[str]) -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows (sequences ordered like `columns`) as NDJSON objects.
+    One output chunk is produced per batch.
+    """
+    async for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n" for row in batch
+        ).encode("utf-8")
@@ -1,50 +1,142 @@
 import math
-from typing import Union
+import re
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import AsyncIterator, Sequence, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
+from sqlalchemy import Double, Integer, Row, cast, column, func, inspect, literal, or_, text, tuple_, union_all, values
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.pagination import decode_cursor, decode_search_cursor, encode_cursor, encode_search_cursor
+from app.crud.acl import acl as acl_crud
+from app.crud.balance import balance as balance_crud
 from app.crud.base import CRUDBase
+from app.crud.user import user as user_crud
 from app.models import AccountingRecord, User, Sphere, Location
-from app.models.accounting_record import OperationType
-from app.schemas.accounting_record import RecordCreate, RecordCreateIncome, RecordCreateSpend, RecordCreateTransfer
+from app.models.accounting_record import SEARCH_CONFIG, OperationType, accounting_id_seq
+from app.schemas.accounting_record import (
+    RecordCreate, RecordCreateIncome, RecordCreateSpend, RecordCreateTransfer, RecordFilter,
+)
+
+# Search terms; everything else (including tsquery operators) separates them
+_SEARCH_WORD = re.compile(r"\w+")
+
+
+def _search_tsquery(query: str) -> str:
+    """
+    All words of the query, in any grammatical form; the last one may also be incomplete.
+    Only the last word is a prefix match: prefix matches cannot use GIN fast scan and
+    a short prefix of a common word reads a large part of the index.
+    """
+    words = _SEARCH_WORD.findall(query)
+    return " & ".join(words[:-1] + [f"{word}:*" for word in words[-1:]])
 
 class CRUDAccountingRecord(CRUDBase[AccountingRecord, RecordCreate]):
     
     async def get_next_accounting_id(self, db: AsyncSession) -> int:
-        result = await db.execute(select(func.max(self.model.accounting_id)))
-        max_id = result.scalar_one_or_none()
-        return (max_id or 0) + 1
+        result = await db.execute(select(accounting_id_seq.next_value()))
+        return result.scalar_one()
+
+    async def get_next_accounting_ids(self, db: AsyncSession, count: int) -> list[int]:
+        """ Allocates a block of accounting ids in a single round trip. """
+        if count < 1:
+            return []
+        result = await db.execute(
+            select(accounting_id_seq.next_value()).select_from(func.generate_series(1, count))
+        )
+        return list(result.scalars().all())
+
+    # Record columns of the compact view; spheres, locations and users are side-loaded by with_references
+    compact_columns = (
+        "id", "accounting_id", "date", "operation_type", "is_transfer", "sum", "description",
+        "owner_id", "sphere_id", "location_id",
+    )
+
+    def _items_query(self, *, compact: bool):
+        if compact:
+            return select(*(getattr(self.model, column) for column in self.compact_columns))
+        return select(self.model).options(
+            selectinload(self.model.sphere).selectinload(Sphere.owner),
+            selectinload(self.model.location).selectinload(Location.owner)
+        )
+
+    async def get_multi_by_ids(self, db: AsyncSession, ids: Sequence[int]) -> list[AccountingRecord]:
+        """ Records with their spheres and locations loaded, in no particular order. """
+        if not ids:
+            return []
+        # Fresh values even for records already in the session and changed with Core statements
+        result = await db.execute(
+            self._items_query(compact=False).where(self.model.id.in_(ids)).execution_options(populate_existing=True)
+        )
+        return list(result.scalars().all())
+
+    def _list_conditions(self, *, user_id: int, filters: RecordFilter | None) -> list:
+        """
+        WHERE clause of a user's record list: the owner plus only the filters that are set,
+        so that the planner can use the index matching them (see AccountingRecord.__table_args__).
+        """
+        conditions = [self.model.owner_id == user_id]
+        if filters is None:
+            return conditions
+        if filters.sphere_id is not None:
+            conditions.append(self.model.sphere_id == filters.sphere_id)
+        if filters.location_id is not None:
+            conditions.append(self.model.location_id == filters.location_id)
+        if filters.operation_type is not None:
+            conditions.append(self.model.operation_type == filters.operation_type)
+        if filters.is_transfer is not None:
+            # Rendered without a bind parameter, so that the partial index applies to generic plans too
+            conditions.append(self.model.is_transfer if filters.is_transfer else ~self.model.is_transfer)
+        if filters.date_from is not None:
+            conditions.append(self.model.date >= filters.date_from)
+        if filters.date_to is not None:
+            conditions.append(self.model.date < filters.date_to)
+        if filters.sum_min is not None:
+            conditions.append(self.model.sum >= filters.sum_min)
+        if filters.sum_max is not None:
+            conditions.append(self.model.sum <= filters.sum_max)
+        return conditions
+
+    async def count_for_user(self, db: AsyncSession, *, user_id: int, filters: RecordFilter | None = None) -> int:
+        """ Number of a user's records matching the filters. """
+        conditions = self._list_conditions(user_id=user_id, filters=filters)
+        return (await db.execute(select(func.count(self.model.id)).where(*conditions))).scalar_one()
 
     async def get_multi_for_user_paginated(
-        self, db: AsyncSession, *, user_id: int, page: int = 1, size: int = 20
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        page: int = 1,
+        size: int = 20,
+        compact: bool = False,
+        filters: RecordFilter | None = None,
     ) -> dict:
         """
-        Get paginated records for a user.
+        Get paginated records for a user, optionally narrowed by filters.
+        With compact=True the items are rows of compact_columns instead of ORM objects.
         """
         if page < 1: page = 1
         if size < 1: size = 1
-
-        # Query for total count
-        count_query = select(func.count(self.model.id)).where(self.model.owner_id == user_id)
-        total_count = (await db.execute(count_query)).scalar_one()
+        conditions = self._list_conditions(user_id=user_id, filters=filters)
+        total_count = await self.count_for_user(db, user_id=user_id, filters=filters)
 
         # Query for items
         offset = (page - 1) * size
         query = (
-            select(self.model)
-            .where(self.model.owner_id == user_id)
-            .options(
-                selectinload(self.model.sphere).selectinload(Sphere.owner), 
-                selectinload(self.model.location).selectinload(Location.owner)
-            )
+            self._items_query(compact=compact)
+            .where(*conditions)
             .order_by(self.model.date.desc(), self.model.id.desc())
             .offset(offset)
             .limit(size)
         )
         result = await db.execute(query)
-        items = result.scalars().all()
+        items = result.all() if compact else result.scalars().all()
 
         return {
             "total": total_count,
@@ -54,111 +146,438 @@ class CRUDAccountingRecord(CRUDBase[AccountingRecord, RecordCreate]):
             "items": items
         }
 
-    async def create_record(
-        self, db: AsyncSession, *, obj_in: RecordCreate, owner_id: int
-    ) -> list[AccountingRecord]:
-        
-        acc_id = await self.get_next_accounting_id(db)
-        created_records = []
+    async def get_multi_for_user_keyset(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        size: int = 20,
+        cursor: str | None = None,
+        with_total: bool = False,
+        compact: bool = False,
+        filters: RecordFilter | None = None,
+    ) -> dict:
+        """
+        Get records for a user using keyset pagination over (date desc, id desc).
+        Every page costs the same regardless of depth; the total count is only
+        computed when explicitly requested. compact and filters work as in
+        get_multi_for_user_paginated. Raises ValueError if the cursor cannot be decoded.
+        """
+        if size < 1: size = 1
+        conditions = self._list_conditions(user_id=user_id, filters=filters)
+
+        direction, position = "next", None
+        if cursor:
+            direction, cursor_date, cursor_id = decode_cursor(cursor)
+            position = tuple_(cursor_date, cursor_id)
+
+        keyset = tuple_(self.model.date, self.model.id)
+        query = (
+            self._items_query(compact=compact)
+            .where(*conditions)
+            .limit(size + 1)
+        )
+        if direction == "next":
+            if position is not None:
+                query = query.where(keyset < position)
+            query = query.order_by(self.model.date.desc(), self.model.id.desc())
+        else:
+            # Walk backwards in ascending order, then flip the page into display order
+            query = query.where(keyset > position).order_by(self.model.date.asc(), self.model.id.asc())
+
+        result = await db.execute(query)
+        items = list(result.all() if compact else result.scalars().all())
+        has_more = len(items) > size
+        items = items[:size]
+
+        if direction == "next":
+            has_next, has_prev = has_more, position is not None
+        else:
+            items.reverse()
+            has_next, has_prev = True, has_more
+
+        total_count = None
+        if with_total:
+            total_count = await self.count_for_user(db, user_id=user_id, filters=filters)
+
+        return {
+            "total": total_count,
+            "size": size,
+            "next_cursor": encode_cursor("next", items[-1].date, items[-1].id) if items and has_next else None,
+            "prev_cursor": encode_cursor("prev", items[0].date, items[0].id) if items and has_prev else None,
+            "items": items
+        }
+
+    # Whether pg_trgm is installed (see the add_record_search migration); checked once per process
+    _trigram: bool | None = None
+
+    async def _has_trigram(self, db: AsyncSession) -> bool:
+        if self._trigram is None:
+            self._trigram = (await db.execute(
+                text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            )).scalar_one()
+        return self._trigram
+
+    async def search_for_user(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        query: str,
+        size: int = 20,
+        cursor: str | None = None,
+        compact: bool = False,
+    ) -> dict:
+        """
+        Search a user's records by description and by the names of their spheres and locations,
+        best matches first, with keyset pagination over (rank desc, date desc, id desc).
+        Every word has to match in some grammatical form, the last one possibly as a prefix of
+        a longer word (see _search_tsquery). With pg_trgm installed, descriptions and names that
+        are merely similar to the query match as well, and the similarity of the description
+        adds to the rank. compact works as in get_multi_for_user_paginated.
+        Raises ValueError if the cursor cannot be decoded.
+        """
+        if size < 1: size = 1
+        position = tuple_(*decode_search_cursor(cursor)) if cursor else None
+
+        trigram = await self._has_trigram(db)
+        config = cast(SEARCH_CONFIG, REGCONFIG)
+        tsquery = func.to_tsquery(config, _search_tsquery(query))
+
+        # Spheres and locations are matched by name first, among the ones the user has access to;
+        # records are then filtered by plain id lists, so that every condition can use its index
+        name_queries = []
+        for kind, model in (("sphere", Sphere), ("location", Location)):
+            accessible = await acl_crud.get_levels(db, user_id=user_id, kind=kind)
+            if not accessible:
+                continue
+            conditions = [func.to_tsvector(config, model.name).bool_op("@@")(tsquery)]
+            if trigram:
+                conditions.append(literal(query).bool_op("<%")(model.name))
+            name_queries.append(select(literal(kind), model.id).where(model.id.in_(list(accessible)), or_(*conditions)))
+        named = {"sphere": [], "location": []}
+        if name_queries:
+            for kind, resource_id in (await db.execute(union_all(*name_queries))).all():
+                named[kind].append(resource_id)
+
+        matches = [self.model.search_vector.bool_op("@@")(tsquery)]
+        if named["sphere"]:
+            matches.append(self.model.sphere_id.in_(named["sphere"]))
+        if named["location"]:
+            matches.append(self.model.location_id.in_(named["location"]))
+        rank = func.ts_rank_cd(self.model.search_vector, tsquery)
+        if trigram:
+            matches.append(literal(query).bool_op("<%")(self.model.description))
+            rank = rank + func.word_similarity(query, func.coalesce(self.model.description, ""))
+        # Double precision, so that the rank round-trips through the cursor exactly
+        rank = cast(rank, Double)
+
+        statement = (
+            self._items_query(compact=compact)
+            .add_columns(rank.label("rank"))
+            .where(self.model.owner_id == user_id, or_(*matches))
+            .order_by(rank.desc(), self.model.date.desc(), self.model.id.desc())
+            .limit(size + 1)
+        )
+        if position is not None:
+            statement = statement.where(tuple_(rank, self.model.date, self.model.id) < position)
+
+        rows = (await db.execute(statement)).all()
+        has_next = len(rows) > size
+        rows = rows[:size]
+        items = rows if compact else [row[0] for row in rows]
+
+        return {
+            "total": None,
+            "size": size,
+            "next_cursor": encode_search_cursor(rows[-1].rank, items[-1].date, items[-1].id) if has_next else None,
+            "prev_cursor": None,
+            "items": items
+        }
+
+    async def with_references(self, db: AsyncSession, page: dict) -> dict:
+        """
+        Turn a compact page into plain data: items become dicts and the spheres, locations
+        and users they reference are added once each, keyed by id.
+        """
+        items = [{name: row._mapping[name] for name in self.compact_columns} for row in page["items"]]
+        references = {}
+        user_ids = {item["owner_id"] for item in items}
+        for key, model in (("spheres", Sphere), ("locations", Location)):
+            ids = {item[f"{model.__tablename__}_id"] for item in items} - {None}
+            rows = (await db.execute(
+                select(model.id, model.name, model.description, model.owner_id).where(model.id.in_(ids))
+            )).all() if ids else []
+            references[key] = {row.id: row._asdict() for row in rows}
+            user_ids.update(row.owner_id for row in rows)
+        rows = (await db.execute(
+            select(User.id, User.login, User.description, User.is_admin).where(User.id.in_(user_ids))
+        )).all() if user_ids else []
+        references["users"] = {row.id: row._asdict() for row in rows}
+        return {**page, "items": items, **references}
+
+    export_columns = (
+        "id", "accounting_id", "date", "operation_type", "is_transfer", "sum", "description",
+        "sphere_id", "sphere_name", "location_id", "location_name",
+    )
+    export_batch_size = 2000
+
+    async def stream_for_export(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Yield a user's records in chronological order, in batches, through a server-side
+        cursor. Rows are flat tuples ordered like `export_columns`; only one batch is held
+        in memory at a time.
+        """
+        query = (
+            select(
+                self.model.id,
+                self.model.accounting_id,
+                self.model.date,
+                self.model.operation_type,
+                self.model.is_transfer,
+                self.model.sum,
+                self.model.description,
+                self.model.sphere_id,
+                Sphere.name.label("sphere_name"),
+                self.model.location_id,
+                Location.name.label("location_name"),
+            )
+            .outerjoin(Sphere, Sphere.id == self.model.sphere_id)
+            .outerjoin(Location, Location.id == self.model.location_id)
+            .where(self.model.owner_id == user_id)
+            .order_by(self.model.date.asc(), self.model.id.asc())
+            .execution_options(yield_per=self.export_batch_size)
+        )
+        if date_from is not None:
+            query = query.where(self.model.date >= date_from)
+        if date_to is not None:
+            query = query.where(self.model.date < date_to)
+
+        result = await db.stream(query)
+        async for batch in result.partitions():
+            yield batch
+
+    def build_record_values(
+        self, obj_in: RecordCreate, *, owner_id: int, accounting_id: int
+    ) -> list[dict]:
+        """
+        Column values of the rows described by obj_in: one record for income/spend,
+        a spend + income pair for a transfer.
+        """
+        # The date is always set here rather than left to the server default, since the rollups bucket by it
+        common_data = {"accounting_id": accounting_id, "owner_id": owner_id, "date": obj_in.date or datetime.now(timezone.utc)}
+        if obj_in.description: common_data["description"] = obj_in.description
 
         if isinstance(obj_in, (RecordCreateIncome, RecordCreateSpend)):
             op_type = OperationType.INCOME if isinstance(obj_in, RecordCreateIncome) else OperationType.SPEND
-            record = self.model(
-                accounting_id=acc_id,
-                owner_id=owner_id,
+            return [dict(
+                common_data,
                 operation_type=op_type,
                 sum=obj_in.sum,
                 location_id=obj_in.location_id,
                 sphere_id=obj_in.sphere_id,
                 is_transfer=False
-            )
-            created_records.append(record)
-        
-        elif isinstance(obj_in, RecordCreateTransfer):
-            common_data = {"accounting_id": acc_id, "owner_id": owner_id, "is_transfer": True}
-            if obj_in.description: common_data["description"] = obj_in.description
-            if obj_in.date: common_data["date"] = obj_in.date
+            )]
+
+        if isinstance(obj_in, RecordCreateTransfer):
+            common_data["is_transfer"] = True
+            common_data["sum"] = obj_in.sum
 
             if obj_in.transfer_type == 'location':
-                spend_rec = self.model(
-                    **common_data,
-                    operation_type=OperationType.SPEND,
-                    sum=obj_in.sum,
-                    location_id=obj_in.from_location_id,
-                    sphere_id=obj_in.sphere_id
-                )
-                income_rec = self.model(
-                    **common_data,
-                    operation_type=OperationType.INCOME,
-                    sum=obj_in.sum,
-                    location_id=obj_in.to_location_id,
-                    sphere_id=obj_in.sphere_id
-                )
-                created_records.extend([spend_rec, income_rec])
-            
-            elif obj_in.transfer_type == 'sphere':
-                spend_rec = self.model(
-                    **common_data,
-                    operation_type=OperationType.SPEND,
-                    sum=obj_in.sum,
-                    location_id=obj_in.location_id,
-                    sphere_id=obj_in.from_sphere_id
-                )
-                income_rec = self.model(
-                    **common_data,
-                    operation_type=OperationType.INCOME,
-                    sum=obj_in.sum,
-                    location_id=obj_in.location_id,
-                    sphere_id=obj_in.to_sphere_id
-                )
-                created_records.extend([spend_rec, income_rec])
+                return [
+                    dict(common_data, operation_type=OperationType.SPEND, location_id=obj_in.from_location_id, sphere_id=obj_in.sphere_id),
+                    dict(common_data, operation_type=OperationType.INCOME, location_id=obj_in.to_location_id, sphere_id=obj_in.sphere_id),
+                ]
+            if obj_in.transfer_type == 'sphere':
+                return [
+                    dict(common_data, operation_type=OperationType.SPEND, location_id=obj_in.location_id, sphere_id=obj_in.from_sphere_id),
+                    dict(common_data, operation_type=OperationType.INCOME, location_id=obj_in.location_id, sphere_id=obj_in.to_sphere_id),
+                ]
+
+        return [] # Should not happen if validation passes
+
+    async def _attach_references(self, db: AsyncSession, records: Sequence[AccountingRecord]) -> None:
+        """
+        Set sphere and location, with their owners, on written records instead of refreshing
+        them after the commit. Objects already in the session are reused and the rest is loaded
+        with one query per kind; owners come from the principal cache.
+        """
+        for model, name in ((Sphere, "sphere"), (Location, "location")):
+            ids = {getattr(record, f"{name}_id") for record in records} - {None}
+            resources = {}
+            for resource_id in ids:
+                obj = db.identity_map.get(identity_key(model, resource_id))
+                if obj is not None and not inspect(obj).expired_attributes:
+                    resources[resource_id] = obj
+            if missing := ids - resources.keys():
+                result = await db.execute(select(model).where(model.id.in_(missing)))
+                resources.update((obj.id, obj) for obj in result.scalars().all())
+            for resource in resources.values():
+                if "owner" in inspect(resource).unloaded:
+                    set_committed_value(resource, "owner", await user_crud.get_cached(db, id=resource.owner_id))
+            for record in records:
+                set_committed_value(record, name, resources.get(getattr(record, f"{name}_id")))
+
+    def get_resource_ids(self, obj_in: RecordCreate) -> tuple[list[int], list[int]]:
+        """ Sphere and location ids referenced by obj_in, as (sphere_ids, location_ids). """
+        if isinstance(obj_in, (RecordCreateIncome, RecordCreateSpend)):
+            return [obj_in.sphere_id], [obj_in.location_id]
+        if obj_in.transfer_type == "location":
+            return [obj_in.sphere_id], [obj_in.from_location_id, obj_in.to_location_id]
+        return [obj_in.from_sphere_id, obj_in.to_sphere_id], [obj_in.location_id]
+
+    async def create_record(
+        self, db: AsyncSession, *, obj_in: RecordCreate, owner_id: int
+    ) -> list[AccountingRecord]:
+        
+        acc_id = await self.get_next_accounting_id(db)
+        created_records = [
+            self.model(**values)
+            for values in self.build_record_values(obj_in, owner_id=owner_id, accounting_id=acc_id)
+        ]
 
         if not created_records:
-            return [] # Should not happen if validation passes
+            return []
 
         db.add_all(created_records)
+        await balance_crud.apply(db, created_records)
+        await self._attach_references(db, created_records)
         await db.commit()
-        for rec in created_records:
-            await db.refresh(rec, ["sphere", "location"])
         return created_records
 
-    async def remove_by_accounting_id(self, db: AsyncSession, *, accounting_id: int, user_id: int) -> int:
+    # Record columns the balance ledger and rollups are computed from
+    ledger_columns = ("owner_id", "operation_type", "is_transfer", "sphere_id", "location_id", "sum", "date")
+
+    async def remove_by_accounting_id(
+        self, db: AsyncSession, *, accounting_id: int, user_id: int, commit: bool = True
+    ) -> int:
         """ Deletes all records for a given accounting_id and user_id. Returns number of deleted rows. """
-        query = self.model.__table__.delete().where(
+        table = self.model.__table__
+        query = table.delete().where(
             self.model.accounting_id == accounting_id,
             self.model.owner_id == user_id
+        ).returning(*(table.c[column] for column in self.ledger_columns))
+        deleted = (await db.execute(query)).all()
+        await balance_crud.apply(db, deleted, sign=-1)
+        if commit:
+            await db.commit()
+        return len(deleted)
+
+    async def update_transfer_legs(
+        self, db: AsyncSession, updates: Sequence[tuple[int, int, RecordCreateTransfer]]
+    ) -> dict[int, dict[int, Row]]:
+        """
+        Rewrite both legs of existing transfers in place, for every (accounting_id, owner_id, obj_in),
+        with one UPDATE ... RETURNING; ids and accounting ids are kept, and so is the date unless
+        obj_in sets one. The ledger is adjusted from the returned old and new values.
+        Returns the updated rows per accounting id and record id; a transfer missing from it, or
+        with fewer than two rows, was not a complete transfer. Does not commit.
+        """
+        if not updates:
+            return {}
+        table = self.model.__table__
+        new = values(
+            column("accounting_id", Integer),
+            column("owner_id", Integer),
+            column("operation_type", table.c.operation_type.type),
+            column("sphere_id", Integer),
+            column("location_id", Integer),
+            column("sum", table.c.sum.type),
+            column("description", table.c.description.type),
+            column("date", table.c.date.type),
+            name="new",
+        ).data([
+            (accounting_id, owner_id, leg["operation_type"], leg["sphere_id"], leg["location_id"],
+             Decimal(str(obj_in.sum)), obj_in.description, obj_in.date)
+            for accounting_id, owner_id, obj_in in updates
+            for leg in self.build_record_values(obj_in, owner_id=owner_id, accounting_id=accounting_id)
+        ])
+        # Joined copy of the row: RETURNING reads the values from before the update from it
+        old = table.alias("old")
+        query = (
+            table.update()
+            .where(
+                table.c.accounting_id == new.c.accounting_id,
+                table.c.owner_id == new.c.owner_id,
+                table.c.operation_type == new.c.operation_type,
+                table.c.is_transfer,
+                old.c.id == table.c.id,
+                old.c.date == table.c.date,
+            )
+            .values(
+                sphere_id=new.c.sphere_id,
+                location_id=new.c.location_id,
+                sum=new.c.sum,
+                # NULLs are rendered as untyped literals in VALUES
+                description=cast(new.c.description, table.c.description.type),
+                date=func.coalesce(cast(new.c.date, table.c.date.type), table.c.date),
+            )
+            .returning(
+                table.c.id, table.c.accounting_id, table.c.description,
+                *(table.c[column] for column in self.ledger_columns),
+                *(old.c[column].label(f"old_{column}") for column in self.ledger_columns),
+            )
         )
-        result = await db.execute(query)
-        await db.commit()
-        return result.rowcount
+        rows = (await db.execute(query)).all()
+        await balance_crud.apply(db, [
+            SimpleNamespace(**{column: getattr(row, f"old_{column}") for column in self.ledger_columns}) for row in rows
+        ], sign=-1)
+        await balance_crud.apply(db, rows)
+
+        updated: dict[int, dict[int, Row]] = {}
+        for row in rows:
+            updated.setdefault(row.accounting_id, {})[row.id] = row
+        return updated
+
+    async def remove(self, db: AsyncSession, *, id: int) -> AccountingRecord | None:
+        obj = await self.get(db, id=id)
+        if obj:
+            await balance_crud.apply(db, [obj], sign=-1)
+            await db.delete(obj)
+            await db.commit()
+        return obj
 
     async def update_record(
         self, db: AsyncSession, *, db_obj: AccountingRecord, obj_in: RecordCreate
     ) -> AccountingRecord:
         """
         Update a single record. For transfers, this will update both related records.
+        Returns the updated record; its id only changes when a non-transfer record becomes a transfer.
         """
         if isinstance(obj_in, (RecordCreateIncome, RecordCreateSpend)):
-            # Update single record
+            # Update single record, moving its amount in the ledger from the old to the new resources
+            await balance_crud.apply(db, [db_obj], sign=-1)
             db_obj.operation_type = OperationType.INCOME if isinstance(obj_in, RecordCreateIncome) else OperationType.SPEND
             db_obj.sum = obj_in.sum
             db_obj.location_id = obj_in.location_id
             db_obj.sphere_id = obj_in.sphere_id
-            if hasattr(obj_in, 'description'):
-                db_obj.description = obj_in.description
-            if hasattr(obj_in, 'date'):
+            db_obj.description = obj_in.description
+            if obj_in.date:
                 db_obj.date = obj_in.date
-            
+            await balance_crud.apply(db, [db_obj])
+            await self._attach_references(db, [db_obj])
             await db.commit()
-            await db.refresh(db_obj, ["sphere", "location", "sphere.owner", "location.owner"])
             return db_obj
         
         elif isinstance(obj_in, RecordCreateTransfer):
-            # For transfers, we need to update both records with the same accounting_id
-            # First, delete existing records for this accounting_id
-            await self.remove_by_accounting_id(db, accounting_id=db_obj.accounting_id, user_id=db_obj.owner_id)
-            
-            # Then create new records
+            # Both legs are updated in place and keep their ids
+            legs = (await self.update_transfer_legs(db, [(db_obj.accounting_id, db_obj.owner_id, obj_in)])).get(db_obj.accounting_id, {})
+            if len(legs) == 2:
+                for name in ("sphere_id", "location_id", "sum", "description", "date"):
+                    set_committed_value(db_obj, name, getattr(legs[db_obj.id], name))
+                await self._attach_references(db, [db_obj])
+                await db.commit()
+                return db_obj
+
+            # Not a transfer pair (an income/spend record turned into a transfer): replace it with a new pair
+            await self.remove_by_accounting_id(db, accounting_id=db_obj.accounting_id, user_id=db_obj.owner_id, commit=False)
             return (await self.create_record(db, obj_in=obj_in, owner_id=db_obj.owner_id))[0]
         
         return db_obj
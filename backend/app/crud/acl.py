@@ -0,0 +1,76 @@
+from typing import Iterable, Literal
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import is_replica_session
+from app.models import Location, Sphere, UserDataVersion
+from app.models.location import location_editors_association, location_readers_association
+from app.models.sphere import sphere_editors_association, sphere_readers_association
+
+ResourceKind = Literal["sphere", "location"]
+PermissionLevel = Literal["read", "edit", "owner"]
+
+LEVEL_RANK = {"read": 1, "edit": 2, "owner": 3}
+
+_SOURCES = {
+    "sphere": (Sphere, sphere_readers_association.c.sphere_id, sphere_readers_association.c.user_id,
+               sphere_editors_association.c.sphere_id, sphere_editors_association.c.user_id),
+    "location": (Location, location_readers_association.c.location_id, location_readers_association.c.user_id,
+                 location_editors_association.c.location_id, location_editors_association.c.user_id),
+}
+
+class ACLIndex:
+    """
+    Per-user map of resource id -> permission level for spheres and locations.
+    A user's map for one kind is loaded with a single query and cached together with the
+    user's data version (userdataversion), which every membership change bumps for all users
+    it affects. A cached map is only used while that version is unchanged, so a revoked grant
+    stops working in every worker process as soon as the revoking write commits; checking
+    costs one primary key lookup instead of the map query. CRUD writes also invalidate the
+    maps of this process right away. Maps read from a replica are not cached.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache("acl", max_size=settings.ACL_CACHE_MAX_SIZE, ttl_seconds=settings.ACL_CACHE_TTL_SECONDS)
+
+    async def get_levels(self, db: AsyncSession, *, user_id: int, kind: ResourceKind) -> dict[int, PermissionLevel]:
+        if is_replica_session(db):
+            # A lagging replica may still have a revoked grant: use it for this read, never cache it
+            return await self._load(db, user_id=user_id, kind=kind)
+        # Read before the map, so a concurrent change can only leave the map newer than its version
+        version = (await db.execute(
+            select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+        )).scalar_one_or_none() or 0
+        cached = self._cache.get((kind, user_id))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        levels = await self._load(db, user_id=user_id, kind=kind)
+        self._cache.set((kind, user_id), (version, levels))
+        return levels
+
+    async def get_level(
+        self, db: AsyncSession, *, user_id: int, kind: ResourceKind, resource_id: int
+    ) -> PermissionLevel | None:
+        return (await self.get_levels(db, user_id=user_id, kind=kind)).get(resource_id)
+
+    def invalidate(self, kind: ResourceKind, user_ids: Iterable[int]) -> None:
+        for user_id in set(user_ids):
+            self._cache.invalidate((kind, user_id))
+
+    async def _load(self, db: AsyncSession, *, user_id: int, kind: ResourceKind) -> dict[int, PermissionLevel]:
+        model, reader_resource, reader_user, editor_resource, editor_user = _SOURCES[kind]
+        query = union_all(
+            select(model.id, literal("owner")).where(model.owner_id == user_id),
+            select(editor_resource, literal("edit")).where(editor_user == user_id),
+            select(reader_resource, literal("read")).where(reader_user == user_id),
+        )
+        levels: dict[int, PermissionLevel] = {}
+        for resource_id, level in (await db.execute(query)).all():
+            if LEVEL_RANK[level] > LEVEL_RANK.get(levels.get(resource_id), 0):
+                levels[resource_id] = level
+        return levels
+
+acl = ACLIndex()
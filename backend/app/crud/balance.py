@@ -0,0 +1,163 @@
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Iterable
+
+from sqlalchemy import case, delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.data_version import data_version as data_version_crud
+from app.crud.rollup import rollup as rollup_crud
+from app.models import AccountingRecord, LocationBalance, SphereBalance, UserDataVersion
+from app.models.accounting_record import OperationType
+
+signed_sum = case(
+    (AccountingRecord.operation_type == OperationType.INCOME, AccountingRecord.sum),
+    (AccountingRecord.operation_type == OperationType.SPEND, -AccountingRecord.sum),
+)
+
+class CRUDBalance:
+    """
+    Incrementally maintained per-location and per-sphere balances.
+    Sphere balances only include non-transfer records, matching the dashboard semantics.
+    The daily/monthly rollups (crud/rollup.py) and the owners' data versions are maintained alongside.
+    """
+
+    async def apply(self, db: AsyncSession, records: Iterable[Any], *, sign: int = 1) -> None:
+        """
+        Add (sign=1) or subtract (sign=-1) the effect of records on the ledger and rollups
+        and bump the data version of their owners.
+        Accepts ORM objects or rows with the record columns, date included. Does not commit:
+        call it inside the transaction that writes the records.
+        """
+        records = list(records)
+        location_deltas: dict[tuple[int, int], list] = defaultdict(lambda: [Decimal(0), 0])
+        sphere_deltas: dict[tuple[int, int], list] = defaultdict(lambda: [Decimal(0), 0])
+
+        for rec in records:
+            amount = Decimal(str(rec.sum))
+            if rec.operation_type == OperationType.SPEND:
+                amount = -amount
+            amount *= sign
+
+            delta = location_deltas[(rec.owner_id, rec.location_id)]
+            delta[0] += amount
+            delta[1] += sign
+            if not rec.is_transfer and rec.sphere_id is not None:
+                delta = sphere_deltas[(rec.owner_id, rec.sphere_id)]
+                delta[0] += amount
+                delta[1] += sign
+
+        await self._upsert(db, LocationBalance, "location_id", location_deltas)
+        await self._upsert(db, SphereBalance, "sphere_id", sphere_deltas)
+        await rollup_crud.apply(db, records, sign=sign)
+        await data_version_crud.bump(db, {rec.owner_id for rec in records})
+
+    async def _upsert(self, db: AsyncSession, model: type, key: str, deltas: dict) -> None:
+        if not deltas:
+            return
+        # Sorted keys keep row lock order stable between concurrent writers
+        values = [
+            {"owner_id": owner_id, key: resource_id, "balance": balance, "record_count": count}
+            for (owner_id, resource_id), (balance, count) in sorted(deltas.items())
+        ]
+        stmt = insert(model).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["owner_id", key],
+            set_={
+                "balance": model.balance + stmt.excluded.balance,
+                "record_count": model.record_count + stmt.excluded.record_count,
+            },
+        )
+        await db.execute(stmt)
+
+    def _location_totals_query(self, owner_id: int | None = None):
+        query = (
+            select(
+                AccountingRecord.owner_id,
+                AccountingRecord.location_id,
+                func.sum(signed_sum).label("balance"),
+                func.count(AccountingRecord.id).label("record_count"),
+            )
+            .where(AccountingRecord.location_id.is_not(None))
+            .group_by(AccountingRecord.owner_id, AccountingRecord.location_id)
+        )
+        if owner_id is not None:
+            query = query.where(AccountingRecord.owner_id == owner_id)
+        return query
+
+    def _sphere_totals_query(self, owner_id: int | None = None):
+        query = (
+            select(
+                AccountingRecord.owner_id,
+                AccountingRecord.sphere_id,
+                func.sum(signed_sum).label("balance"),
+                func.count(AccountingRecord.id).label("record_count"),
+            )
+            .where(AccountingRecord.sphere_id.is_not(None), AccountingRecord.is_transfer == False)
+            .group_by(AccountingRecord.owner_id, AccountingRecord.sphere_id)
+        )
+        if owner_id is not None:
+            query = query.where(AccountingRecord.owner_id == owner_id)
+        return query
+
+    async def rebuild(self, db: AsyncSession, *, owner_id: int | None = None) -> None:
+        """
+        Recompute the ledger and rollups from accountingrecord for one owner or everyone.
+        Record writes are blocked while the rebuild runs; reads are not.
+        """
+        await db.execute(text("LOCK TABLE accountingrecord IN SHARE MODE"))
+        for model, key, totals in (
+            (LocationBalance, "location_id", self._location_totals_query(owner_id)),
+            (SphereBalance, "sphere_id", self._sphere_totals_query(owner_id)),
+        ):
+            clear = delete(model)
+            if owner_id is not None:
+                clear = clear.where(model.owner_id == owner_id)
+            await db.execute(clear)
+            await db.execute(
+                insert(model).from_select(["owner_id", key, "balance", "record_count"], totals)
+            )
+        await rollup_crud.rebuild(db, owner_id=owner_id)
+        if owner_id is not None:
+            await data_version_crud.bump(db, [owner_id])
+        else:
+            await db.execute(update(UserDataVersion).values(version=UserDataVersion.version + 1))
+        await db.commit()
+
+    async def verify(self, db: AsyncSession, *, owner_id: int | None = None) -> list[dict]:
+        """
+        Compare the ledger with balances recomputed from accountingrecord.
+        Returns one entry per mismatching (owner, location/sphere) pair, followed by rollup mismatches.
+        """
+        mismatches = []
+        for model, key, totals in (
+            (LocationBalance, "location_id", self._location_totals_query(owner_id)),
+            (SphereBalance, "sphere_id", self._sphere_totals_query(owner_id)),
+        ):
+            expected = {
+                (row.owner_id, row[1]): (row.balance, row.record_count)
+                for row in (await db.execute(totals)).all()
+            }
+            stored_query = select(model)
+            if owner_id is not None:
+                stored_query = stored_query.where(model.owner_id == owner_id)
+            # Emptied rows are kept around with zero totals; they match "no records"
+            stored = {
+                (row.owner_id, getattr(row, key)): (row.balance, row.record_count)
+                for row in (await db.execute(stored_query)).scalars().all()
+                if row.record_count != 0 or row.balance != 0
+            }
+            for pair in sorted(expected.keys() | stored.keys()):
+                if expected.get(pair) != stored.get(pair):
+                    mismatches.append({
+                        "kind": key,
+                        "owner_id": pair[0],
+                        "id": pair[1],
+                        "expected": expected.get(pair),
+                        "stored": stored.get(pair),
+                    })
+        mismatches.extend(await rollup_crud.verify(db, owner_id=owner_id))
+        return mismatches
+
+balance = CRUDBalance()
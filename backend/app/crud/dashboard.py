@@ -1,66 +1,37 @@
-from sqlalchemy import func, select, case
+from datetime import date
+
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased
 
-from app.models import AccountingRecord, Location, Sphere
+from app.crud.rollup import ROLLUPS, Granularity, bucket
+from app.models import Location, LocationBalance, Sphere, SphereBalance
 from app.models.accounting_record import OperationType
-from app.schemas.dashboard import DashboardData, BalanceItem
+from app.schemas.dashboard import DashboardData, BalanceItem, DashboardTimeseries, TimeseriesPoint
 
 class CRUDDashboard:
     async def get_dashboard_data(self, db: AsyncSession, *, user_id: int) -> DashboardData:
-        # 1. Calculate total balance across all locations
-        total_balance_query = (
-            select(
-                func.sum(
-                    case(
-                        (AccountingRecord.operation_type == OperationType.INCOME, AccountingRecord.sum),
-                        (AccountingRecord.operation_type == OperationType.SPEND, -AccountingRecord.sum),
-                    )
-                )
-            )
-            .where(AccountingRecord.owner_id == user_id)
-        )
-        total_balance_res = await db.execute(total_balance_query)
-        total_balance = total_balance_res.scalar_one_or_none() or 0.0
+        # Balances are read from the ledger maintained by record writes (see crud/balance.py),
+        # so the cost depends on the number of locations and spheres, not records.
 
-        # 2. Calculate balance per location
+        # 1. Balance per location
         location_balance_query = (
-            select(
-                Location.id,
-                Location.name,
-                func.sum(
-                    case(
-                        (AccountingRecord.operation_type == OperationType.INCOME, AccountingRecord.sum),
-                        (AccountingRecord.operation_type == OperationType.SPEND, -AccountingRecord.sum),
-                    )
-                ).label("balance")
-            )
-            .join(AccountingRecord, AccountingRecord.location_id == Location.id)
-            .where(AccountingRecord.owner_id == user_id)
-            .group_by(Location.id, Location.name)
+            select(Location.id, Location.name, LocationBalance.balance)
+            .join(LocationBalance, LocationBalance.location_id == Location.id)
+            .where(LocationBalance.owner_id == user_id, LocationBalance.record_count > 0)
             .order_by(Location.name)
         )
         location_balances_res = await db.execute(location_balance_query)
-        locations_balance = [BalanceItem(id=row.id, name=row.name, balance=float(row.balance)) for row in location_balances_res.all()]
-        
-        # 3. Calculate balance per sphere (Income - Spend, non-transfers)
+        location_rows = location_balances_res.all()
+        locations_balance = [BalanceItem(id=row.id, name=row.name, balance=float(row.balance)) for row in location_rows]
+
+        # 2. Total balance across all locations
+        total_balance = sum((row.balance for row in location_rows), 0)
+
+        # 3. Balance per sphere (Income - Spend, non-transfers)
         sphere_balance_query = (
-            select(
-                Sphere.id,
-                Sphere.name,
-                func.sum(
-                     case(
-                        (AccountingRecord.operation_type == OperationType.INCOME, AccountingRecord.sum),
-                        (AccountingRecord.operation_type == OperationType.SPEND, -AccountingRecord.sum),
-                    )
-                ).label("balance")
-            )
-            .join(AccountingRecord, AccountingRecord.sphere_id == Sphere.id)
-            .where(
-                AccountingRecord.owner_id == user_id,
-                AccountingRecord.is_transfer == False
-            )
-            .group_by(Sphere.id, Sphere.name)
+            select(Sphere.id, Sphere.name, SphereBalance.balance)
+            .join(SphereBalance, SphereBalance.sphere_id == Sphere.id)
+            .where(SphereBalance.owner_id == user_id, SphereBalance.record_count > 0)
             .order_by(Sphere.name)
         )
         sphere_balances_res = await db.execute(sphere_balance_query)
@@ -72,4 +43,64 @@ class CRUDDashboard:
             spheres_balance=spheres_balance
         )
 
-dashboard = CRUDDashboard()
\ No newline at end of file
+    async def get_timeseries(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        granularity: Granularity,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        group_by: str | None = None,
+        include_transfers: bool = False,
+    ) -> DashboardTimeseries:
+        """
+        Income and spend per period (optionally per sphere or location), read only from the
+        rollups: a 5-year monthly chart costs at most 60 rows per sphere/location.
+        Includes every period overlapping [date_from, date_to).
+        """
+        model = ROLLUPS[granularity]
+        income = func.sum(case((model.operation_type == OperationType.INCOME, model.total), else_=0))
+        spend = func.sum(case((model.operation_type == OperationType.SPEND, model.total), else_=0))
+
+        dimensions = []
+        if group_by == "sphere":
+            dimensions = [model.sphere_id, Sphere.name]
+        elif group_by == "location":
+            dimensions = [model.location_id, Location.name]
+
+        query = (
+            select(model.period, *dimensions, income.label("income"), spend.label("spend"))
+            .where(model.owner_id == user_id)
+            .group_by(model.period, *dimensions)
+            .having(func.sum(model.record_count) > 0)
+            .order_by(model.period, *dimensions[1:])
+        )
+        if group_by == "sphere":
+            query = query.outerjoin(Sphere, Sphere.id == model.sphere_id)
+        elif group_by == "location":
+            query = query.join(Location, Location.id == model.location_id)
+        if date_from is not None:
+            query = query.where(model.period >= bucket(date_from, granularity))
+        if date_to is not None:
+            query = query.where(model.period < date_to)
+        if not include_transfers:
+            query = query.where(model.is_transfer == False)
+
+        rows = (await db.execute(query)).all()
+        return DashboardTimeseries(
+            granularity=granularity,
+            group_by=group_by,
+            points=[
+                TimeseriesPoint(
+                    period=row.period,
+                    id=row[1] if dimensions else None,
+                    name=row.name if dimensions else None,
+                    income=float(row.income),
+                    spend=float(row.spend),
+                )
+                for row in rows
+            ],
+        )
+
+dashboard = CRUDDashboard()
@@ -0,0 +1,48 @@
+from typing import Iterable
+
+from sqlalchemy import select, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.acl import ResourceKind, _SOURCES
+from app.models import MonthlyRollup, UserDataVersion
+
+class CRUDDataVersion:
+    """
+    Per-user data version behind the ETags of list and dashboard endpoints.
+    Every write that changes a user's records, or a sphere or location the user can see
+    or has records in, bumps the version inside the writing transaction.
+    """
+
+    async def get(self, db: AsyncSession, *, user_id: int) -> int:
+        version = (await db.execute(
+            select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+        )).scalar_one_or_none()
+        return version or 0
+
+    async def bump(self, db: AsyncSession, user_ids: Iterable[int]) -> None:
+        """ Does not commit: call it inside the transaction that makes the change. """
+        # Sorted ids keep row lock order stable between concurrent writers
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        stmt = insert(UserDataVersion).values([{"user_id": user_id, "version": 1} for user_id in user_ids])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={"version": UserDataVersion.version + 1},
+        )
+        await db.execute(stmt)
+
+    async def resource_user_ids(self, db: AsyncSession, *, kind: ResourceKind, resource_id: int) -> set[int]:
+        """ Users whose data shows the resource: its owner, readers, editors and anyone with records in it. """
+        model, reader_resource, reader_user, editor_resource, editor_user = _SOURCES[kind]
+        query = union(
+            select(model.owner_id).where(model.id == resource_id),
+            select(reader_user).where(reader_resource == resource_id),
+            select(editor_user).where(editor_resource == resource_id),
+            # Rollups have a row for every owner with records in the resource, without scanning records
+            select(MonthlyRollup.owner_id).where(getattr(MonthlyRollup, f"{kind}_id") == resource_id),
+        )
+        return set((await db.execute(query)).scalars().all())
+
+data_version = CRUDDataVersion()
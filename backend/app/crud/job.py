@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Sequence
+
+from sqlalchemy import case, delete, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models import Job, JobResultChunk
+from app.models.job import JobStatus
+
+# Serializes job claims across workers, so that per-kind concurrency limits hold
+_CLAIM_LOCK_KEY = 0x6A6F6273
+
+FINISHED = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+class CRUDJob(CRUDBase[Job, Any]):
+    """
+    The job table is the queue: workers claim queued rows, report progress and the outcome
+    on them, and clients poll them. Every method commits.
+    """
+
+    async def enqueue(self, db: AsyncSession, *, kind: str, owner_id: int, params: dict) -> Job:
+        job = Job(kind=kind, owner_id=owner_id, params=params, status=JobStatus.QUEUED, progress=0, cancel_requested=False)
+        db.add(job)
+        await db.commit()
+        return job
+
+    async def get_multi_for_owner(self, db: AsyncSession, *, owner_id: int, limit: int = 50) -> Sequence[Job]:
+        result = await db.execute(
+            select(Job).where(Job.owner_id == owner_id).order_by(Job.id.desc()).limit(limit)
+        )
+        return result.scalars().all()
+
+    async def claim(self, db: AsyncSession, *, limits: dict[str, int], worker: str) -> Job | None:
+        """
+        Mark the oldest queued job whose kind has fewer running jobs than its limit as running
+        by `worker`, and return it. Kinds missing from `limits` are left to other workers.
+        """
+        await db.execute(select(func.pg_advisory_xact_lock(_CLAIM_LOCK_KEY)))
+        running = dict((await db.execute(
+            select(Job.kind, func.count()).where(Job.status == JobStatus.RUNNING).group_by(Job.kind)
+        )).all())
+        kinds = [kind for kind, limit in limits.items() if running.get(kind, 0) < limit]
+        job = None
+        if kinds:
+            job = (await db.execute(
+                select(Job)
+                .where(Job.status == JobStatus.QUEUED, Job.kind.in_(kinds))
+                .order_by(Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).scalar_one_or_none()
+        if job is not None:
+            now = datetime.now(timezone.utc)
+            job.status, job.worker, job.started_at, job.heartbeat_at = JobStatus.RUNNING, worker, now, now
+        await db.commit()
+        return job
+
+    # The methods a worker calls on its jobs only apply while the job is still running on it:
+    # once fail_stale has given up on a job, a late update from its worker must not revive it.
+    def _owned(self, worker: str):
+        return (Job.status == JobStatus.RUNNING, Job.worker == worker)
+
+    async def report_progress(
+        self, db: AsyncSession, *, job_id: int, worker: str, progress: float, message: str | None
+    ) -> bool:
+        """
+        Store the progress of a running job; returns whether the worker should stop it
+        (its cancellation was requested, or it is no longer running on `worker`).
+        """
+        cancel_requested = (await db.execute(
+            update(Job)
+            .where(Job.id == job_id, *self._owned(worker))
+            .values(progress=progress, progress_message=message, heartbeat_at=func.now())
+            .returning(Job.cancel_requested)
+        )).scalar_one_or_none()
+        await db.commit()
+        return cancel_requested is not False
+
+    async def heartbeat(self, db: AsyncSession, *, job_ids: Sequence[int], worker: str) -> set[int]:
+        """
+        Refresh the heartbeat of `worker`'s running jobs; returns the ids of those to stop:
+        cancelled ones and those no longer running on `worker`.
+        """
+        rows = (await db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), *self._owned(worker))
+            .values(heartbeat_at=func.now())
+            .returning(Job.id, Job.cancel_requested)
+        )).all()
+        await db.commit()
+        return (set(job_ids) - {row.id for row in rows}) | {row.id for row in rows if row.cancel_requested}
+
+    async def finish(
+        self,
+        db: AsyncSession,
+        *,
+        job_id: int,
+        worker: str,
+        status: JobStatus,
+        result: dict | None = None,
+        error: str | None = None,
+    ) -> bool:
+        """ Store the outcome of a job running on `worker`; returns False if it no longer was. """
+        values = {"status": status, "result": result, "error": error, "finished_at": func.now()}
+        if status == JobStatus.SUCCEEDED:
+            values["progress"] = 1
+        finished = (await db.execute(
+            update(Job).where(Job.id == job_id, *self._owned(worker)).values(**values).returning(Job.id)
+        )).scalar_one_or_none()
+        await db.commit()
+        return finished is not None
+
+    async def requeue(self, db: AsyncSession, *, job_ids: Sequence[int], worker: str) -> None:
+        """ Put `worker`'s running jobs back in the queue, e.g. when it shuts down. """
+        await db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), *self._owned(worker))
+            .values(status=JobStatus.QUEUED, worker=None, started_at=None, heartbeat_at=None, progress=0, progress_message=None)
+        )
+        await db.commit()
+
+    async def request_cancel(self, db: AsyncSession, *, job_id: int) -> Job | None:
+        """
+        Cancel a queued job right away, or ask the worker of a running job to stop it.
+        Returns the updated job, or None if it had already finished.
+        """
+        job = (await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status.in_((JobStatus.QUEUED, JobStatus.RUNNING)))
+            .values(
+                cancel_requested=True,
+                status=case((Job.status == JobStatus.QUEUED, literal(JobStatus.CANCELLED, Job.status.type)), else_=Job.status),
+                finished_at=case((Job.status == JobStatus.QUEUED, func.now()), else_=Job.finished_at),
+            )
+            .returning(Job)
+            .execution_options(populate_existing=True)
+        )).scalar_one_or_none()
+        await db.commit()
+        return job
+
+    async def fail_stale(self, db: AsyncSession, *, timeout_seconds: float) -> list[int]:
+        """ Mark running jobs whose worker stopped sending heartbeats as failed. """
+        ids = (await db.execute(
+            update(Job)
+            .where(Job.status == JobStatus.RUNNING, Job.heartbeat_at < func.now() - timedelta(seconds=timeout_seconds))
+            .values(status=JobStatus.FAILED, error="The worker running the job stopped", finished_at=func.now())
+            .returning(Job.id)
+        )).scalars().all()
+        await db.commit()
+        return list(ids)
+
+    async def add_result_chunk(self, db: AsyncSession, *, job_id: int, seq: int, data: bytes) -> None:
+        """ Append a piece of a job's result file. Does not commit. """
+        await db.execute(insert(JobResultChunk).values(job_id=job_id, seq=seq, data=data))
+
+    async def stream_result(self, db: AsyncSession, *, job_id: int) -> AsyncIterator[bytes]:
+        """ Yield a job's result file piece by piece; only one piece is held in memory at a time. """
+        result = await db.stream(
+            select(JobResultChunk.data)
+            .where(JobResultChunk.job_id == job_id)
+            .order_by(JobResultChunk.seq)
+            .execution_options(yield_per=1)
+        )
+        async for data in result.scalars():
+            yield data
+
+    async def purge(self, db: AsyncSession, *, older_than: timedelta) -> list[int]:
+        """ Delete jobs (with their result files) that finished longer ago than `older_than`; returns their ids. """
+        ids = (await db.execute(
+            delete(Job)
+            .where(Job.status.in_(FINISHED), Job.finished_at < func.now() - older_than)
+            .returning(Job.id)
+        )).scalars().all()
+        await db.commit()
+        return list(ids)
+
+job = CRUDJob(Job)
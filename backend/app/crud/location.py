@@ -1,9 +1,12 @@
-from sqlalchemy import or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.crud.acl import acl as acl_crud
 from app.crud.base import CRUDBase
+from app.crud.data_version import data_version as data_version_crud
+from app.crud.user import user as user_crud
 from app.models import Location, User
 from app.schemas.location import LocationCreate, LocationUpdate
 
@@ -12,20 +15,17 @@ class CRUDLocation(CRUDBase[Location, LocationCreate]):
         """
         Get all locations a user has access to (owner, reader, or editor).
         """
+        accessible_ids = await acl_crud.get_levels(db, user_id=user_id, kind="location")
+        if not accessible_ids:
+            return []
         query = (
             select(self.model)
             .options(selectinload(self.model.owner))
-            .where(
-                or_(
-                    self.model.owner_id == user_id,
-                    self.model.readers.any(User.id == user_id),
-                    self.model.editors.any(User.id == user_id)
-                )
-            )
+            .where(self.model.id.in_(accessible_ids))
             .order_by(self.model.name)
         )
         result = await db.execute(query)
-        return result.scalars().unique().all()
+        return result.scalars().all()
 
     async def create_with_owner(
         self, db: AsyncSession, *, obj_in: LocationCreate, owner_id: int
@@ -49,8 +49,10 @@ class CRUDLocation(CRUDBase[Location, LocationCreate]):
             editors=editors,
         )
         db.add(db_obj)
+        await data_version_crud.bump(db, [owner_id, *(u.id for u in readers), *(u.id for u in editors)])
         await db.commit()
-        await db.refresh(db_obj, ["owner"])
+        acl_crud.invalidate("location", [owner_id, *(u.id for u in readers), *(u.id for u in editors)])
+        await self._attach_owner(db, db_obj)
         return db_obj
 
     async def update(
@@ -58,6 +60,13 @@ class CRUDLocation(CRUDBase[Location, LocationCreate]):
     ) -> Location:
         update_data = obj_in.model_dump(exclude_unset=True)
 
+        # Users whose access may change: current and new readers/editors
+        affected_user_ids = set()
+        if update_data.get("reader_ids") is not None or update_data.get("editor_ids") is not None:
+            affected_user_ids = await self._member_ids(db, db_obj)
+        # Everyone who sees the resource now; new members are added to affected_user_ids below
+        versioned_user_ids = await data_version_crud.resource_user_ids(db, kind="location", resource_id=db_obj.id)
+
         # Handle relationships separately
         if "reader_ids" in update_data:
             reader_ids = update_data.pop("reader_ids")
@@ -75,10 +84,36 @@ class CRUDLocation(CRUDBase[Location, LocationCreate]):
         for field, value in update_data.items():
             setattr(db_obj, field, value)
 
+        if affected_user_ids:
+            affected_user_ids |= {u.id for u in (*db_obj.readers, *db_obj.editors)}
+
+        await data_version_crud.bump(db, versioned_user_ids | affected_user_ids)
         db.add(db_obj)
         await db.commit()
-        await db.refresh(db_obj, ["owner"])
+        acl_crud.invalidate("location", affected_user_ids)
+        await self._attach_owner(db, db_obj)
         return db_obj
 
+    async def remove(self, db: AsyncSession, *, id: int) -> Location | None:
+        obj = await self.get(db, id=id)
+        if obj:
+            affected_user_ids = await self._member_ids(db, obj)
+            await data_version_crud.bump(
+                db, await data_version_crud.resource_user_ids(db, kind="location", resource_id=obj.id)
+            )
+            await db.delete(obj)
+            await db.commit()
+            acl_crud.invalidate("location", affected_user_ids)
+        return obj
+
+    async def _attach_owner(self, db: AsyncSession, db_obj: Location) -> None:
+        """ Set db_obj.owner from the principal cache rather than refreshing it after a write. """
+        set_committed_value(db_obj, "owner", await user_crud.get_cached(db, id=db_obj.owner_id))
+
+    async def _member_ids(self, db: AsyncSession, db_obj: Location) -> set[int]:
+        """ Owner, reader and editor ids of db_obj; loads the reader/editor collections. """
+        await db.refresh(db_obj, ["readers", "editors"])
+        return {db_obj.owner_id, *(u.id for u in db_obj.readers), *(u.id for u in db_obj.editors)}
+
 
 location = CRUDLocation(Location)
\ No newline at end of file
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from typing import Iterable, Literal
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Location, Sphere, User
+
+ResourceKind = Literal["sphere", "location"]
+
+@dataclass(frozen=True)
+class AccessDenial:
+    reason: Literal["not_found", "forbidden"]
+    detail: str
+
+class CRUDPermission:
+    """
+    Set-based edit permission checks for spheres and locations.
+    Any number of ids is resolved with a single query, editor membership included.
+    """
+
+    async def resolve_edit(
+        self,
+        db: AsyncSession,
+        *,
+        user: User,
+        sphere_ids: Iterable[int] = (),
+        location_ids: Iterable[int] = (),
+    ) -> dict[ResourceKind, dict[int, AccessDenial | None]]:
+        """
+        Map every requested id to None if the user may edit the resource,
+        otherwise to the reason it may not.
+        """
+        requested: dict[ResourceKind, set[int]] = {"sphere": set(sphere_ids), "location": set(location_ids)}
+        resolved: dict[ResourceKind, dict[int, AccessDenial | None]] = {"sphere": {}, "location": {}}
+
+        selects = [
+            select(
+                literal(kind).label("kind"),
+                model.id,
+                model.name,
+                model.owner_id,
+                model.editors.any(User.id == user.id).label("is_editor"),
+            ).where(model.id.in_(requested[kind]))
+            for kind, model in (("sphere", Sphere), ("location", Location))
+            if requested[kind]
+        ]
+        if selects:
+            query = selects[0] if len(selects) == 1 else union_all(*selects)
+            for row in (await db.execute(query)).all():
+                can_edit = user.is_admin or row.owner_id == user.id or row.is_editor
+                resolved[row.kind][row.id] = None if can_edit else AccessDenial(
+                    "forbidden", f"You don't have edit permissions for {row.kind} '{row.name}'."
+                )
+
+        for kind, ids in requested.items():
+            for missing in ids - resolved[kind].keys():
+                resolved[kind][missing] = AccessDenial("not_found", f"{kind.capitalize()} with id {missing} not found.")
+        return resolved
+
+    async def check_edit(
+        self,
+        db: AsyncSession,
+        *,
+        user: User,
+        sphere_ids: Iterable[int] = (),
+        location_ids: Iterable[int] = (),
+    ) -> AccessDenial | None:
+        """ First denial among the requested resources (spheres first), or None if all are editable. """
+        resolved = await self.resolve_edit(db, user=user, sphere_ids=sphere_ids, location_ids=location_ids)
+        for kind in ("sphere", "location"):
+            for resource_id in sorted(resolved[kind]):
+                if resolved[kind][resource_id]:
+                    return resolved[kind][resource_id]
+        return None
+
+permission = CRUDPermission()
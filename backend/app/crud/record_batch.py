@@ -0,0 +1,195 @@
+from types import SimpleNamespace
+from typing import Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.accounting_record import record as record_crud
+from app.crud.balance import balance as balance_crud
+from app.crud.permission import permission as permission_crud
+from app.models import AccountingRecord, User
+from app.models.accounting_record import OperationType
+from app.schemas.accounting_record import RecordBatchOperation, RecordCreate, RecordCreateIncome, RecordCreateTransfer
+
+class CRUDRecordBatch:
+    """
+    Mixed create/update/delete of records in a single transaction, with the semantics of the
+    single-record endpoints. Target records and edit permissions are each resolved with one
+    query, accounting ids are allocated in one step, transfers are rewritten in place with one
+    statement, removed rows are deleted with one statement and new rows inserted with one
+    multi-row statement.
+    Either every operation is applied or, if any of them fails its checks, none is.
+    """
+
+    async def execute(self, db: AsyncSession, *, operations: Sequence[RecordBatchOperation], user: User) -> dict:
+        results = [
+            {"index": i, "op": op.op, "status": "not_applied", "records": [], "detail": None}
+            for i, op in enumerate(operations)
+        ]
+        targets, legs = await self._load_targets(db, {op.id for op in operations if op.op != "create"})
+
+        sphere_ids, location_ids = set(), set()
+        for op in operations:
+            if op.op != "delete":
+                op_sphere_ids, op_location_ids = record_crud.get_resource_ids(op.record)
+                sphere_ids.update(op_sphere_ids)
+                location_ids.update(op_location_ids)
+        permissions = await permission_crud.resolve_edit(db, user=user, sphere_ids=sphere_ids, location_ids=location_ids)
+
+        # Records already removed or rewritten by an earlier operation of the batch
+        claimed: set[int] = set()
+        for op, result in zip(operations, results):
+            detail = self._check(op, user=user, targets=targets, legs=legs, permissions=permissions, claimed=claimed)
+            if detail:
+                result.update(status="failed", detail=detail)
+        if any(result["status"] == "failed" for result in results):
+            await db.rollback()
+            return {"applied": False, "results": results}
+
+        removed_ids: list[int] = []
+        # (result, record, new values)
+        updated: list[tuple[dict, AccountingRecord, RecordCreate]] = []
+        # (result, accounting id, owner id, new values) of transfers rewritten in place
+        transfers: list[tuple[dict, int, int, RecordCreateTransfer]] = []
+        # (result, record to create, owner id)
+        created: list[tuple[dict, RecordCreate, int]] = []
+        for op, result in zip(operations, results):
+            if op.op == "create":
+                created.append((result, op.record, user.id))
+            elif op.op == "delete":
+                removed_ids.append(op.id)
+            elif isinstance(op.record, RecordCreateTransfer):
+                target = targets[op.id]
+                if self._is_transfer_pair(legs[target.accounting_id]):
+                    transfers.append((result, target.accounting_id, target.owner_id, op.record))
+                else:
+                    # As in update_record: a non-transfer record is replaced by a new pair
+                    removed_ids.extend(leg.id for leg in legs[target.accounting_id])
+                    created.append((result, op.record, target.owner_id))
+            else:
+                updated.append((result, targets[op.id], op.record))
+
+        await self._update_in_place(db, [(record, obj_in) for _, record, obj_in in updated])
+        rewritten = await record_crud.update_transfer_legs(
+            db, [(accounting_id, owner_id, obj_in) for _, accounting_id, owner_id, obj_in in transfers]
+        )
+        await self._delete(db, removed_ids)
+        created_ids = await self._create(db, [(obj_in, owner_id) for _, obj_in, owner_id in created])
+        await db.commit()
+
+        for op, result in zip(operations, results):
+            if op.op == "delete":
+                result["status"] = "deleted"
+        transfer_ids = [sorted(rewritten[accounting_id]) for _, accounting_id, _, _ in transfers]
+        by_id = {r.id: r for r in await record_crud.get_multi_by_ids(
+            db,
+            [record.id for _, record, _ in updated]
+            + [i for ids in transfer_ids + created_ids for i in ids],
+        )}
+        for result, record, _ in updated:
+            result.update(status="updated", records=[by_id[record.id]])
+        for (result, _, _, _), ids in zip(transfers, transfer_ids):
+            result.update(status="updated", records=[by_id[i] for i in ids])
+        for (result, _, _), ids in zip(created, created_ids):
+            result.update(status="created" if result["op"] == "create" else "updated", records=[by_id[i] for i in ids])
+        return {"applied": True, "results": results}
+
+    async def _load_targets(
+        self, db: AsyncSession, ids: set[int]
+    ) -> tuple[dict[int, AccountingRecord], dict[int, list[AccountingRecord]]]:
+        """ Targeted records by id, and every record sharing an accounting id with one of them. """
+        if not ids:
+            return {}, {}
+        model = AccountingRecord
+        result = await db.execute(
+            select(model).where(model.accounting_id.in_(select(model.accounting_id).where(model.id.in_(ids))))
+        )
+        legs: dict[int, list[AccountingRecord]] = {}
+        for record in result.scalars().all():
+            legs.setdefault(record.accounting_id, []).append(record)
+        targets = {record.id: record for records in legs.values() for record in records if record.id in ids}
+        return targets, legs
+
+    def _is_transfer_pair(self, legs: list[AccountingRecord]) -> bool:
+        return len(legs) == 2 and all(leg.is_transfer for leg in legs) \
+            and {leg.operation_type for leg in legs} == {OperationType.INCOME, OperationType.SPEND}
+
+    def _check(
+        self, op: RecordBatchOperation, *, user: User, targets: dict, legs: dict, permissions: dict, claimed: set[int]
+    ) -> str | None:
+        """ Why op cannot be applied, or None; claims the records op removes or rewrites. """
+        if op.op != "create":
+            target = targets.get(op.id)
+            if target is None:
+                return "Record not found"
+            if target.owner_id != user.id and not user.is_admin:
+                return "Not enough permissions"
+            touched = {op.id}
+            if op.op == "update" and isinstance(op.record, RecordCreateTransfer):
+                touched = {leg.id for leg in legs[target.accounting_id]}
+            if touched & claimed:
+                return "Record is already changed by an earlier operation of the batch"
+            claimed.update(touched)
+
+        if op.op != "delete":
+            sphere_ids, location_ids = record_crud.get_resource_ids(op.record)
+            denial = next(
+                (permissions["sphere"][i] for i in sphere_ids if permissions["sphere"][i]),
+                None,
+            ) or next(
+                (permissions["location"][i] for i in location_ids if permissions["location"][i]),
+                None,
+            )
+            if denial:
+                return denial.detail
+        return None
+
+    async def _update_in_place(self, db: AsyncSession, updates: list[tuple[AccountingRecord, RecordCreate]]) -> None:
+        """ Income/spend updates, as in update_record; flushed together at commit. """
+        if not updates:
+            return
+        await balance_crud.apply(db, [record for record, _ in updates], sign=-1)
+        for record, obj_in in updates:
+            record.operation_type = OperationType.INCOME if isinstance(obj_in, RecordCreateIncome) else OperationType.SPEND
+            record.sum = obj_in.sum
+            record.location_id = obj_in.location_id
+            record.sphere_id = obj_in.sphere_id
+            record.description = obj_in.description
+            if obj_in.date:
+                record.date = obj_in.date
+        await balance_crud.apply(db, [record for record, _ in updates])
+
+    async def _delete(self, db: AsyncSession, ids: list[int]) -> None:
+        if not ids:
+            return
+        table = AccountingRecord.__table__
+        deleted = (await db.execute(
+            table.delete()
+            .where(table.c.id.in_(ids))
+            .returning(table.c.owner_id, table.c.operation_type, table.c.is_transfer, table.c.sphere_id, table.c.location_id, table.c.sum, table.c.date)
+        )).all()
+        await balance_crud.apply(db, deleted, sign=-1)
+
+    async def _create(self, db: AsyncSession, creates: list[tuple[RecordCreate, int]]) -> list[list[int]]:
+        """ Insert the records of every (obj_in, owner_id); returns the new ids per entry. """
+        if not creates:
+            return []
+        accounting_ids = await record_crud.get_next_accounting_ids(db, len(creates))
+        values = [
+            # Every row of a multi-row VALUES needs the same columns
+            {"description": None, **record_values}
+            for (obj_in, owner_id), accounting_id in zip(creates, accounting_ids)
+            for record_values in record_crud.build_record_values(obj_in, owner_id=owner_id, accounting_id=accounting_id)
+        ]
+        table = AccountingRecord.__table__
+        rows = (await db.execute(
+            insert(table).values(values).returning(table.c.id, table.c.accounting_id)
+        )).all()
+        await balance_crud.apply(db, [SimpleNamespace(**v) for v in values])
+
+        ids_by_accounting_id: dict[int, list[int]] = {}
+        for row in sorted(rows):
+            ids_by_accounting_id.setdefault(row.accounting_id, []).append(row.id)
+        return [ids_by_accounting_id[accounting_id] for accounting_id in accounting_ids]
+
+record_batch = CRUDRecordBatch()
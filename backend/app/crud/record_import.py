@@ -0,0 +1,138 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Annotated, Any, AsyncIterator
+
+from pydantic import Field, TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.streaming import RowParseError
+from app.crud.accounting_record import record as record_crud
+from app.crud.balance import balance as balance_crud
+from app.crud.permission import AccessDenial, permission as permission_crud
+from app.models import AccountingRecord, User
+from app.schemas.accounting_record import RecordCreate
+
+RecordCreateAdapter = TypeAdapter(Annotated[RecordCreate, Field(discriminator="type")])
+
+COPY_COLUMNS = (
+    "accounting_id", "owner_id", "operation_type", "is_transfer",
+    "sphere_id", "location_id", "sum", "description", "date",
+)
+
+class CRUDRecordImport:
+    """
+    Bulk record import: rows are validated with the regular create schemas, permissions
+    are checked once per distinct sphere/location, and records are loaded with COPY
+    in chunks inside a single transaction.
+    """
+    chunk_size = 5000
+    max_reported_errors = 1000
+
+    async def import_rows(
+        self,
+        db: AsyncSession,
+        *,
+        rows: AsyncIterator[tuple[int, dict[str, Any] | RowParseError]],
+        user: User,
+    ) -> dict:
+        report = {"rows": 0, "imported": 0, "records_created": 0, "errors": [], "errors_truncated": False}
+        # Per distinct resource id: None if the user may write to it, otherwise why not
+        permissions: dict[str, dict[int, AccessDenial | None]] = {"sphere": {}, "location": {}}
+
+        chunk = []
+        async for row_no, raw in rows:
+            report["rows"] += 1
+            chunk.append((row_no, raw))
+            if len(chunk) >= self.chunk_size:
+                await self._load_chunk(db, chunk, user=user, permissions=permissions, report=report)
+                chunk = []
+        if chunk:
+            await self._load_chunk(db, chunk, user=user, permissions=permissions, report=report)
+
+        await db.commit()
+        return report
+
+    def _add_error(self, report: dict, row_no: int, detail: str) -> None:
+        if len(report["errors"]) >= self.max_reported_errors:
+            report["errors_truncated"] = True
+            return
+        report["errors"].append({"row": row_no, "detail": detail})
+
+    async def _load_chunk(
+        self, db: AsyncSession, chunk: list, *, user: User, permissions: dict, report: dict
+    ) -> None:
+        valid = []
+        for row_no, raw in chunk:
+            if isinstance(raw, RowParseError):
+                self._add_error(report, row_no, str(raw))
+                continue
+            try:
+                obj_in = RecordCreateAdapter.validate_python(raw)
+            except ValidationError as e:
+                detail = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                self._add_error(report, row_no, detail)
+                continue
+            valid.append((row_no, obj_in, *record_crud.get_resource_ids(obj_in)))
+
+        # Only ids not seen in earlier chunks are looked up
+        resolved = await permission_crud.resolve_edit(
+            db,
+            user=user,
+            sphere_ids={i for _, _, sphere_ids, _ in valid for i in sphere_ids} - permissions["sphere"].keys(),
+            location_ids={i for _, _, _, location_ids in valid for i in location_ids} - permissions["location"].keys(),
+        )
+        for kind, denials in resolved.items():
+            permissions[kind].update(denials)
+
+        allowed = []
+        for row_no, obj_in, sphere_ids, location_ids in valid:
+            denial = next(
+                (permissions["sphere"][i] for i in sphere_ids if permissions["sphere"][i]),
+                None,
+            ) or next(
+                (permissions["location"][i] for i in location_ids if permissions["location"][i]),
+                None,
+            )
+            if denial:
+                self._add_error(report, row_no, denial.detail)
+                continue
+            allowed.append(obj_in)
+
+        if not allowed:
+            return
+
+        accounting_ids = await record_crud.get_next_accounting_ids(db, len(allowed))
+        values = [
+            record_values
+            for obj_in, accounting_id in zip(allowed, accounting_ids)
+            for record_values in record_crud.build_record_values(obj_in, owner_id=user.id, accounting_id=accounting_id)
+        ]
+        await self._copy(db, values)
+        await balance_crud.apply(db, [SimpleNamespace(**v) for v in values])
+
+        report["imported"] += len(allowed)
+        report["records_created"] += len(values)
+
+    async def _copy(self, db: AsyncSession, values: list[dict]) -> None:
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            AccountingRecord.__tablename__,
+            columns=COPY_COLUMNS,
+            records=[
+                (
+                    v["accounting_id"],
+                    v["owner_id"],
+                    v["operation_type"].name,
+                    v["is_transfer"],
+                    v["sphere_id"],
+                    v["location_id"],
+                    Decimal(str(v["sum"])),
+                    v.get("description"),
+                    v["date"],
+                )
+                for v in values
+            ],
+        )
+
+record_import = CRUDRecordImport()
@@ -0,0 +1,163 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Iterable, Literal
+
+from sqlalchemy import Date, cast, delete, func, null, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import AccountingRecord, DailyRollup, MonthlyRollup
+
+Granularity = Literal["day", "month"]
+
+ROLLUPS: dict[Granularity, type] = {"day": DailyRollup, "month": MonthlyRollup}
+
+KEY_COLUMNS = ["owner_id", "period", "sphere_id", "location_id", "operation_type", "is_transfer"]
+
+def bucket(value: date | datetime, granularity: Granularity) -> date:
+    """ Rollup period containing value: its UTC day, or the first day of its UTC month. """
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return value if granularity == "day" else value.replace(day=1)
+
+def _bucket_column(granularity: Granularity):
+    """ SQL counterpart of `bucket` for AccountingRecord.date. """
+    return cast(func.date_trunc(granularity, func.timezone("UTC", AccountingRecord.date)), Date)
+
+def _lock_order(key: tuple) -> tuple:
+    owner_id, period, sphere_id, location_id, operation_type, is_transfer = key
+    return owner_id, period, sphere_id or 0, location_id, operation_type.name, is_transfer
+
+class CRUDRollup:
+    """
+    Daily and monthly totals per owner, sphere, location, operation type and transfer flag,
+    maintained together with the balance ledger (see CRUDBalance.apply).
+    """
+
+    async def apply(self, db: AsyncSession, records: Iterable[Any], *, sign: int = 1) -> None:
+        """
+        Add (sign=1) or subtract (sign=-1) records in both rollups. Records need a date.
+        Does not commit.
+        """
+        records = list(records)
+        for granularity, model in ROLLUPS.items():
+            deltas: dict[tuple, list] = defaultdict(lambda: [Decimal(0), 0])
+            for rec in records:
+                key = (
+                    rec.owner_id, bucket(rec.date, granularity), rec.sphere_id,
+                    rec.location_id, rec.operation_type, rec.is_transfer,
+                )
+                delta = deltas[key]
+                delta[0] += Decimal(str(rec.sum)) * sign
+                delta[1] += sign
+            await self._upsert(db, model, deltas)
+
+    async def _upsert(self, db: AsyncSession, model: type, deltas: dict) -> None:
+        if not deltas:
+            return
+        # Sorted keys keep row lock order stable between concurrent writers
+        values = [
+            dict(zip(KEY_COLUMNS, key), total=total, record_count=count)
+            for key, (total, count) in sorted(deltas.items(), key=lambda item: _lock_order(item[0]))
+        ]
+        stmt = insert(model).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={
+                "total": model.total + stmt.excluded.total,
+                "record_count": model.record_count + stmt.excluded.record_count,
+            },
+        )
+        await db.execute(stmt)
+
+    async def detach_sphere(self, db: AsyncSession, *, sphere_id: int) -> None:
+        """
+        Move a sphere's rollup rows to the "no sphere" rows before the sphere is deleted,
+        mirroring ON DELETE SET NULL on the records. Does not commit.
+        """
+        for model in ROLLUPS.values():
+            detached = (
+                select(
+                    model.owner_id, model.period, null(), model.location_id,
+                    model.operation_type, model.is_transfer, model.total, model.record_count,
+                )
+                .where(model.sphere_id == sphere_id)
+            )
+            stmt = insert(model).from_select([*KEY_COLUMNS, "total", "record_count"], detached)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=KEY_COLUMNS,
+                set_={
+                    "total": model.total + stmt.excluded.total,
+                    "record_count": model.record_count + stmt.excluded.record_count,
+                },
+            )
+            await db.execute(stmt)
+            await db.execute(delete(model).where(model.sphere_id == sphere_id))
+
+    def _totals_query(self, granularity: Granularity, owner_id: int | None = None):
+        period = _bucket_column(granularity)
+        query = (
+            select(
+                AccountingRecord.owner_id,
+                period.label("period"),
+                AccountingRecord.sphere_id,
+                AccountingRecord.location_id,
+                AccountingRecord.operation_type,
+                AccountingRecord.is_transfer,
+                func.sum(AccountingRecord.sum).label("total"),
+                func.count(AccountingRecord.id).label("record_count"),
+            )
+            .group_by(
+                AccountingRecord.owner_id, period, AccountingRecord.sphere_id,
+                AccountingRecord.location_id, AccountingRecord.operation_type, AccountingRecord.is_transfer,
+            )
+        )
+        if owner_id is not None:
+            query = query.where(AccountingRecord.owner_id == owner_id)
+        return query
+
+    async def rebuild(self, db: AsyncSession, *, owner_id: int | None = None) -> None:
+        """
+        Recompute both rollups from accountingrecord. Does not commit or lock;
+        CRUDBalance.rebuild runs it under its table lock.
+        """
+        for granularity, model in ROLLUPS.items():
+            clear = delete(model)
+            if owner_id is not None:
+                clear = clear.where(model.owner_id == owner_id)
+            await db.execute(clear)
+            await db.execute(
+                insert(model).from_select([*KEY_COLUMNS, "total", "record_count"], self._totals_query(granularity, owner_id))
+            )
+
+    async def verify(self, db: AsyncSession, *, owner_id: int | None = None) -> list[dict]:
+        """ Rollup rows that differ from totals recomputed from accountingrecord. """
+        mismatches = []
+        for granularity, model in ROLLUPS.items():
+            expected = {
+                tuple(row[:6]): (row.total, row.record_count)
+                for row in (await db.execute(self._totals_query(granularity, owner_id))).all()
+            }
+            stored_query = select(*(getattr(model, c) for c in KEY_COLUMNS), model.total, model.record_count)
+            if owner_id is not None:
+                stored_query = stored_query.where(model.owner_id == owner_id)
+            stored = {
+                tuple(row[:6]): (row.total, row.record_count)
+                for row in (await db.execute(stored_query)).all()
+                if row.record_count != 0 or row.total != 0
+            }
+            for key in expected.keys() | stored.keys():
+                if expected.get(key) != stored.get(key):
+                    mismatches.append({
+                        "kind": f"{granularity}_rollup",
+                        "owner_id": key[0],
+                        "id": key[1:],
+                        "expected": expected.get(key),
+                        "stored": stored.get(key),
+                    })
+        return mismatches
+
+rollup = CRUDRollup()
@@ -1,30 +1,106 @@
+from sqlalchemy import event, inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import password_hasher
+
+# Authenticated principals, keyed by ("login", login) and ("id", id)
+principal_cache = TTLCache(
+    "principals",
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+def _snapshot(user: User) -> User:
+    """ Session-independent copy of the user's column attributes. """
+    copy = User(
+        id=user.id,
+        login=user.login,
+        hashed_password=user.hashed_password,
+        description=user.description,
+        is_admin=user.is_admin,
+    )
+    make_transient_to_detached(copy)
+    return copy
+
+def invalidate_principal(user: User) -> None:
+    principal_cache.invalidate(("id", user.id))
+    principal_cache.invalidate(("login", user.login))
+    # A renamed user must not stay reachable under the old login
+    for old_login in inspect(user).attrs.login.history.deleted:
+        principal_cache.invalidate(("login", old_login))
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_principals(session: Session, flush_context) -> None:
+    changed = [obj for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)]
+    for user in changed:
+        invalidate_principal(user)
+    # Invalidate again on commit, in case a concurrent request re-cached the old row meanwhile
+    session.info.setdefault("changed_principals", []).extend((user.id, user.login) for user in changed)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session: Session) -> None:
+    for user_id, login in session.info.pop("changed_principals", []):
+        principal_cache.invalidate(("id", user_id))
+        principal_cache.invalidate(("login", login))
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_principals(session: Session) -> None:
+    session.info.pop("changed_principals", None)
 
 class CRUDUser(CRUDBase[User, UserCreate]):
     async def get_by_login(self, db: AsyncSession, *, login: str) -> User | None:
         result = await db.execute(select(self.model).filter(self.model.login == login))
         return result.scalars().first()
 
+    async def get_by_login_cached(self, db: AsyncSession, *, login: str) -> User | None:
+        """
+        Same as `get_by_login`, served from the principal cache when possible.
+        The returned user is attached to `db` without querying the database.
+        """
+        cached = principal_cache.get(("login", login))
+        if cached is None:
+            user = await self.get_by_login(db, login=login)
+            if user:
+                self._remember(user)
+            return user
+        return await db.merge(cached, load=False)
+
+    async def get_cached(self, db: AsyncSession, *, id: int) -> User | None:
+        """ Same as `get`, served from the principal cache when possible. """
+        cached = principal_cache.get(("id", id))
+        if cached is None:
+            user = await self.get(db, id=id)
+            if user:
+                self._remember(user)
+            return user
+        return await db.merge(cached, load=False)
+
+    def _remember(self, user: User) -> None:
+        snapshot = _snapshot(user)
+        principal_cache.set(("login", user.login), snapshot)
+        principal_cache.set(("id", user.id), snapshot)
+
     async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
         db_obj = self.model(
             login=obj_in.login,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await password_hasher.hash(obj_in.password),
             description=obj_in.description,
             is_admin=False
         )
         db.add(db_obj)
+        # The id comes back from the INSERT and the other columns are known: no refresh needed
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
-    
+
     async def get_all(self, db: AsyncSession) -> list[User]:
         result = await db.execute(select(self.model).order_by(self.model.login))
         return result.scalars().all()
 
-user = CRUDUser(User)
\ No newline at end of file
+user = CRUDUser(User)
@@ -2,4 +2,8 @@ from app.db.base_class import Base
 from app.models.user import User
 from app.models.sphere import Sphere
 from app.models.location import Location
-from app.models.accounting_record import AccountingRecord
\ No newline at end of file
+from app.models.accounting_record import AccountingRecord
+from app.models.balance import LocationBalance, SphereBalance
+from app.models.rollup import DailyRollup, MonthlyRollup
+from app.models.data_version import UserDataVersion
+from app.models.job import Job, JobResultChunk
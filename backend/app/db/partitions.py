@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# accountingrecord is range-partitioned by date into yearly partitions (UTC years).
+# Rows outside every yearly partition land in the default partition until maintenance
+# creates their year and moves them over.
+RECORD_TABLE = "accountingrecord"
+DEFAULT_PARTITION = "accountingrecord_default"
+# Stored columns; generated ones (search_vector) are computed again when rows are moved
+RECORD_COLUMNS = "id, accounting_id, owner_id, operation_type, is_transfer, sphere_id, location_id, sum, description, date"
+
+# Serializes partition maintenance across workers
+_LOCK_KEY = 0x61636374
+
+def record_partition_name(year: int) -> str:
+    return f"{RECORD_TABLE}_y{year}"
+
+def _bounds(year: int) -> tuple[str, str]:
+    return f"{year}-01-01 00:00:00+00", f"{year + 1}-01-01 00:00:00+00"
+
+async def get_record_partition_years(db: AsyncSession) -> set[int]:
+    result = await db.execute(
+        text("""
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = CAST(:parent AS regclass)
+        """),
+        {"parent": RECORD_TABLE},
+    )
+    pattern = re.compile(rf"^{RECORD_TABLE}_y(\d{{4}})$")
+    return {int(m.group(1)) for (name,) in result.all() if (m := pattern.match(name))}
+
+async def ensure_record_partitions(db: AsyncSession, *, years_ahead: int | None = None) -> list[int]:
+    """
+    Create the yearly partitions from the current year up to `years_ahead` years later,
+    plus a partition for every year that has rows in the default partition (moving them).
+    Does not commit. Returns the years created.
+    """
+    if years_ahead is None:
+        years_ahead = settings.RECORD_PARTITION_YEARS_AHEAD
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+
+    existing = await get_record_partition_years(db)
+    current_year = datetime.now(timezone.utc).year
+    stray_years = {
+        int(year) for year in (await db.execute(text(
+            f"SELECT DISTINCT extract(year FROM date AT TIME ZONE 'UTC') FROM {DEFAULT_PARTITION}"
+        ))).scalars().all()
+    }
+
+    created = []
+    for year in sorted((set(range(current_year, current_year + years_ahead + 1)) | stray_years) - existing):
+        await _create_partition(db, year, move_rows=year in stray_years)
+        created.append(year)
+    return created
+
+async def _create_partition(db: AsyncSession, year: int, *, move_rows: bool) -> None:
+    # Attaching a standalone table (rather than CREATE TABLE ... PARTITION OF) lets rows
+    # already sitting in the default partition be moved in first
+    name = record_partition_name(year)
+    lower, upper = _bounds(year)
+    await db.execute(text(f"CREATE TABLE {name} (LIKE {RECORD_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"))
+    if move_rows:
+        in_range = f"date >= '{lower}' AND date < '{upper}'"
+        await db.execute(text(f"INSERT INTO {name} ({RECORD_COLUMNS}) SELECT {RECORD_COLUMNS} FROM {DEFAULT_PARTITION} WHERE {in_range}"))
+        await db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"))
+    await db.execute(text(
+        f"ALTER TABLE {RECORD_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    logger.info("Created record partition %s", name)
+
+async def run_partition_maintenance() -> None:
+    """ Keep future partitions in place for as long as the process runs. """
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await ensure_record_partitions(db)
+                await db.commit()
+        except Exception:
+            logger.exception("Record partition maintenance failed")
+        await asyncio.sleep(settings.PARTITION_MAINTENANCE_INTERVAL_SECONDS)
@@ -0,0 +1,73 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Metrics of all engine pools by name, for stats reporting
+pools: dict[str, "PoolMetrics"] = {}
+
+
+class PoolMetrics:
+    """
+    Checkout counters of one engine's connection pool in this worker process.
+    Survives pool recreation (engine.dispose()), so the counters cover the process lifetime.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: "MeteredQueuePool | None" = None
+        self.checkouts = 0
+        self.timeouts = 0
+        self.overflow_events = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def stats(self) -> dict:
+        pool = self.pool
+        return {
+            "name": self.name,
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "overflow_events": self.overflow_events,
+            "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long checkouts wait (including connecting and pre-ping),
+    checkouts that time out and connections opened beyond pool_size.
+    Metrics are registered under the engine's pool_logging_name.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        name = self._orig_logging_name or f"pool-{id(self):x}"
+        self.metrics = pools.setdefault(name, PoolMetrics(name))
+        self.metrics.pool = self
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.metrics.checkouts += 1
+            self.metrics.wait_seconds_total += waited
+            self.metrics.wait_seconds_max = max(self.metrics.wait_seconds_max, waited)
+
+    def _create_connection(self):
+        connection = super()._create_connection()
+        if self._overflow > 0:
+            self.metrics.overflow_events += 1
+        return connection
@@ -1,14 +1,63 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, sessionmaker
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.db.pool import MeteredQueuePool
 
-async_engine = create_async_engine(
-    str(settings.ASYNC_DATABASE_URI),
-    pool_pre_ping=True,
-    echo=False, # Set to True for debugging SQL queries
-)
+logger = logging.getLogger(__name__)
+
+def create_db_engine(uri: str, name: str) -> AsyncEngine:
+    """ Engine with the pool configured from settings; pool metrics are reported under `name`. """
+    engine = create_async_engine(
+        uri,
+        poolclass=MeteredQueuePool,
+        pool_logging_name=name,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING == "always",
+        connect_args={
+            # asyncpg's cache and SQLAlchemy's prepared statement cache on top of it
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+        echo=False, # Set to True for debugging SQL queries
+    )
+    if settings.DB_POOL_PRE_PING == "idle":
+        _ping_idle_connections(engine)
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine.sync_engine, name)
+    return engine
+
+def _ping_idle_connections(engine: AsyncEngine) -> None:
+    # Only connections that sat in the pool for a while are pinged; a failed ping
+    # makes the pool discard the connection and check out another one
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _checked_in(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _ping(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < settings.DB_POOL_PRE_PING_IDLE_SECONDS:
+            return
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError() from e
+
+async_engine = create_db_engine(str(settings.ASYNC_DATABASE_URI), "primary")
 
 AsyncSessionLocal = sessionmaker(
     bind=async_engine,
@@ -20,4 +69,161 @@ AsyncSessionLocal = sessionmaker(
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+# --- Read replicas ---
+
+# Users who committed a write recently; their reads stay on the primary (read-your-writes).
+# Per worker process, like the other in-process caches.
+recent_writers = TTLCache(
+    "recent_writers",
+    max_size=100000,
+    ttl_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+# Replication delay of a standby (0 when it has replayed everything it received or is not a standby)
+# and the WAL position it has replayed up to, as a byte offset
+REPLICA_LAG_QUERY = text("""
+    SELECT
+        CASE
+            WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END AS lag,
+        CAST(CASE WHEN pg_is_in_recovery() THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END - '0/0' AS bigint) AS replayed
+""")
+CURRENT_LSN_QUERY = text("SELECT CAST(pg_current_wal_lsn() - '0/0' AS bigint)")
+
+class ReplicaRouter:
+    """
+    Round-robin over the replica engines that passed their last health check.
+    A replica is unhealthy if it cannot be reached or lags more than REPLICA_MAX_LAG_SECONDS.
+    The health check also records how far each replica has replayed the WAL, so that a
+    client that wrote at a given LSN is only sent to replicas that already have its write.
+    """
+
+    def __init__(self, engines: list[AsyncEngine]):
+        self.engines = engines
+        self.healthy: list[AsyncEngine] = list(engines)
+        self.replayed: dict[AsyncEngine, int] = {}
+        self._counter = itertools.count()
+
+    def choose(self, min_lsn: int | None = None) -> AsyncEngine | None:
+        healthy = self.healthy
+        if min_lsn is not None:
+            healthy = [engine for engine in healthy if self.replayed.get(engine, -1) >= min_lsn]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check_health(self) -> None:
+        results = await asyncio.gather(*(self._check(engine) for engine in self.engines))
+        self.replayed = {engine: replayed for engine, replayed in zip(self.engines, results) if replayed is not None}
+        self.healthy = [engine for engine in self.engines if engine in self.replayed]
+
+    async def _check(self, engine: AsyncEngine) -> int | None:
+        """ The replayed LSN of a healthy replica, None for an unhealthy one. """
+        try:
+            async with asyncio.timeout(settings.REPLICA_HEALTH_CHECK_TIMEOUT_SECONDS):
+                async with engine.connect() as conn:
+                    lag, replayed = (await conn.execute(REPLICA_LAG_QUERY)).one()
+        except Exception as e:
+            logger.warning("Replica %s is unreachable: %r", engine.url.render_as_string(), e)
+            return None
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning("Replica %s lags %.1fs behind", engine.url.render_as_string(), lag)
+            return None
+        return replayed
+
+replica_router = ReplicaRouter([
+    create_db_engine(uri, f"replica{i}") for i, uri in enumerate(settings.replica_uris)
+])
+
+def get_read_engine(user_id: int | None = None, min_lsn: int | None = None) -> AsyncEngine:
+    """
+    Engine for a read-only unit of work: a healthy replica that has replayed `min_lsn` (the
+    client's last write, see WriteLSNMiddleware), or the primary if there is none or the user
+    just wrote through this process.
+    """
+    if user_id is not None and recent_writers.get(user_id):
+        return async_engine
+    return replica_router.choose(min_lsn) or async_engine
+
+def is_replica_session(db: AsyncSession) -> bool:
+    return db.bind in replica_router.engines
+
+async def run_replica_health_checks() -> None:
+    while True:
+        try:
+            await replica_router.check_health()
+        except Exception:
+            logger.exception("Replica health check failed")
+        await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS)
+
+# Writes are attributed to the user that get_current_user stored in session.info["user_id"],
+# and to the HTTP request being served through committed_writes
+
+# Commits of the current request; set by WriteLSNMiddleware
+committed_writes: ContextVar[list | None] = ContextVar("committed_writes", default=None)
+
+# Cookie carrying the primary's WAL position after the client's last write. recent_writers only
+# covers the worker process that served the write; the cookie reaches whichever worker serves the read.
+WRITE_LSN_COOKIE = "write_lsn"
+
+def parse_write_lsn(value: str | None) -> int | None:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+class WriteLSNMiddleware:
+    """ Sets the write_lsn cookie on responses to requests that committed a write, while replicas are configured. """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not replica_router.engines:
+            await self.app(scope, receive, send)
+            return
+
+        writes: list = []
+        token = committed_writes.set(writes)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes:
+                async with async_engine.connect() as conn:
+                    lsn = (await conn.execute(CURRENT_LSN_QUERY)).scalar_one()
+                # Once it expires, every replica still considered healthy has replayed the write
+                max_age = int(settings.REPLICA_MAX_LAG_SECONDS + settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS) + 1
+                cookie = f"{WRITE_LSN_COOKIE}={lsn}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            committed_writes.reset(token)
+
+@event.listens_for(Session, "after_flush")
+def _flushed_write(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed_write(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    if not session.info.pop("wrote", False):
+        return
+    if session.info.get("user_id") is not None:
+        recent_writers.set(session.info["user_id"], True)
+    request_writes = committed_writes.get()
+    if request_writes is not None:
+        request_writes.append(True)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session: Session) -> None:
+    session.info.pop("wrote", None)
@@ -0,0 +1,54 @@
+"""Handlers of the background job kinds; importing this module registers them with the runner."""
+from datetime import datetime
+
+from app.core.jobs import JobContext, job_handler
+from app.core.streaming import encode_csv, encode_ndjson
+from app.crud.accounting_record import record as record_crud
+from app.crud.balance import balance as balance_crud
+from app.crud.job import job as job_crud
+from app.db.session import AsyncSessionLocal
+from app.schemas.accounting_record import RecordFilter
+
+
+@job_handler("balance_rebuild", max_concurrency=1)
+async def rebuild_balances(ctx: JobContext) -> dict:
+    """ Recompute the ledger and rollups from the records, then check them against the records again. """
+    owner_id = ctx.params.get("owner_id")
+    await ctx.progress(0, "Rebuilding balances", force=True)
+    async with AsyncSessionLocal() as db:
+        await balance_crud.rebuild(db, owner_id=owner_id)
+        await ctx.progress(0.8, "Verifying balances", force=True)
+        mismatches = await balance_crud.verify(db, owner_id=owner_id)
+    return {"mismatches": len(mismatches)}
+
+
+@job_handler("records_export", max_concurrency=2)
+async def export_records(ctx: JobContext) -> dict:
+    """ Store the owner's records as the job's result file, in the format of GET /records/export. """
+    format = ctx.params["format"]
+    date_from, date_to = (
+        datetime.fromisoformat(ctx.params[key]) if ctx.params.get(key) else None for key in ("date_from", "date_to")
+    )
+
+    # The result is written in one transaction of its own, so a failed or cancelled export leaves nothing behind
+    async with AsyncSessionLocal() as db, AsyncSessionLocal() as out:
+        total = await record_crud.count_for_user(
+            db, user_id=ctx.owner_id, filters=RecordFilter(date_from=date_from, date_to=date_to)
+        )
+        written = 0
+
+        async def batches():
+            nonlocal written
+            async for batch in record_crud.stream_for_export(db, user_id=ctx.owner_id, date_from=date_from, date_to=date_to):
+                yield batch
+                written += len(batch)
+                # Records written after the count make the stream longer than `total`
+                await ctx.progress(written / max(total, written, 1), f"{written} of {max(total, written)} records")
+
+        encode = encode_csv if format == "csv" else encode_ndjson
+        seq = 0
+        async for chunk in encode(batches(), record_crud.export_columns):
+            await job_crud.add_result_chunk(out, job_id=ctx.job_id, seq=seq, data=chunk)
+            seq += 1
+        await out.commit()
+    return {"format": format, "records": written}
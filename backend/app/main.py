@@ -1,11 +1,40 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from app import jobs as job_handlers  # noqa: F401 - registers the handlers with job_runner
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.jobs import job_runner
+from app.core.metrics import PrometheusMiddleware, mark_worker_dead, render_metrics
+from app.core.profiling import SQLProfilerMiddleware
+from app.core.security import PasswordHasherBusy
+from app.db.partitions import run_partition_maintenance
+from app.db.session import WriteLSNMiddleware, replica_router, run_replica_health_checks
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Создание будущих партиций accountingrecord
+    maintenance = asyncio.create_task(run_partition_maintenance())
+    # Проверка доступности и отставания реплик
+    health_checks = asyncio.create_task(run_replica_health_checks()) if replica_router.engines else None
+    # Фоновые задачи; при остановке выполняющиеся задачи возвращаются в очередь
+    runner = asyncio.create_task(job_runner.run()) if settings.JOB_RUNNER_ENABLED else None
+    yield
+    maintenance.cancel()
+    if health_checks:
+        health_checks.cancel()
+    if runner:
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+    mark_worker_dead()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Настройка CORS
@@ -17,8 +46,31 @@ app.add_middleware(
     allow_headers=["*"],  # Разрешаем все заголовки
 )
 
+# Checks SQL_PROFILER_ENABLED per request
+app.add_middleware(SQLProfilerMiddleware)
+
+# Read-your-writes across worker processes; a no-op without replicas
+app.add_middleware(WriteLSNMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(PrometheusMiddleware, excluded_paths=("/metrics",))
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many authentication requests in progress, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 @app.get("/", tags=["Root"])
 async def read_root():
-    return {"message": "Welcome to Financier API"}
\ No newline at end of file
+    return {"message": "Welcome to Financier API"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", tags=["Root"], include_in_schema=False)
+    async def read_metrics():
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
\ No newline at end of file
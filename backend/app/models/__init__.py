@@ -2,5 +2,9 @@ from .user import User
 from .sphere import Sphere
 from .location import Location
 from .accounting_record import AccountingRecord
+from .balance import LocationBalance, SphereBalance
+from .rollup import DailyRollup, MonthlyRollup
+from .data_version import UserDataVersion
+from .job import Job, JobResultChunk
 
-__all__ = ["User", "Sphere", "Location", "AccountingRecord"] 
\ No newline at end of file
+__all__ = ["User", "Sphere", "Location", "AccountingRecord", "LocationBalance", "SphereBalance", "DailyRollup", "MonthlyRollup", "UserDataVersion", "Job", "JobResultChunk"] 
\ No newline at end of file
@@ -1,7 +1,8 @@
 import enum
-from sqlalchemy import Column, Integer, String, Numeric, Boolean, ForeignKey, TIMESTAMP, Enum
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Computed, Integer, String, Numeric, Boolean, ForeignKey, TIMESTAMP, Enum, Index, Sequence
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
+from sqlalchemy.sql import func, text
 
 from app.db.base_class import Base
 
@@ -9,20 +10,50 @@ class OperationType(enum.Enum):
     INCOME = "Income"
     SPEND = "Spend"
 
+# Shared by both legs of a transfer, so it is allocated explicitly rather than as a column default
+accounting_id_seq = Sequence('accountingrecord_accounting_id_seq', metadata=Base.metadata)
+
+# Text search configuration of record search; its stemmer also handles Latin-script words
+SEARCH_CONFIG = "russian"
+
 class AccountingRecord(Base):
-    id = Column(Integer, primary_key=True, index=True)
+    # Range-partitioned by date, one partition per year (see app/db/partitions.py).
+    # The partition key has to be part of the primary key; the ORM still identifies records by id.
+    __table_args__ = (
+        # Record list / keyset pagination / export: WHERE owner_id = ? ORDER BY date, id
+        Index('ix_accountingrecord_owner_id_date_id', 'owner_id', 'date', 'id'),
+        # Filtered record lists (see CRUDAccountingRecord._list_conditions): WHERE owner_id = ? AND <filter> ORDER BY date, id
+        Index('ix_accountingrecord_owner_id_sphere_id_date_id', 'owner_id', 'sphere_id', 'date', 'id'),
+        Index('ix_accountingrecord_owner_id_location_id_date_id', 'owner_id', 'location_id', 'date', 'id'),
+        Index('ix_accountingrecord_owner_id_operation_type_date_id', 'owner_id', 'operation_type', 'date', 'id'),
+        # Sum ranges cannot follow the date order; matching rows are fetched through this index and sorted
+        Index('ix_accountingrecord_owner_id_sum', 'owner_id', 'sum'),
+        # Transfer legs are a small share of the records; the other value is served by the index above
+        Index('ix_accountingrecord_owner_id_date_id_transfers', 'owner_id', 'date', 'id', postgresql_where=text('is_transfer')),
+        # Record search: WHERE search_vector @@ ?
+        Index('ix_accountingrecord_search_vector', 'search_vector', postgresql_using='gin'),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     accounting_id = Column(Integer, nullable=False, index=True)
     owner_id = Column(Integer, ForeignKey('user.id'), nullable=False)
     
     operation_type = Column(Enum(OperationType), nullable=False)
     is_transfer = Column(Boolean, default=False, nullable=False)
 
-    sphere_id = Column(Integer, ForeignKey('sphere.id', ondelete='SET NULL'), nullable=True)
-    location_id = Column(Integer, ForeignKey('location.id', ondelete='SET NULL'), nullable=False)
+    sphere_id = Column(Integer, ForeignKey('sphere.id', ondelete='SET NULL'), nullable=True, index=True)
+    location_id = Column(Integer, ForeignKey('location.id', ondelete='SET NULL'), nullable=False, index=True)
     
     sum = Column(Numeric(12, 2), nullable=False)
     description = Column(String(255), nullable=True)
-    date = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    date = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False, primary_key=True)
+    # Maintained by Postgres; only used in WHERE/ORDER BY, so never loaded with the record
+    search_vector = deferred(Column(
+        TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', coalesce(description, ''))", persisted=True)
+    ))
+
+    __mapper_args__ = {"primary_key": [id]}
     
     owner = relationship("User", back_populates="records")
     sphere = relationship("Sphere")
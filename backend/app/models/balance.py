@@ -0,0 +1,19 @@
+from sqlalchemy import Column, ForeignKey, Integer, Numeric
+
+from app.db.base_class import Base
+
+class LocationBalance(Base):
+    """Running balance of an owner's records per location, maintained on every record write."""
+    owner_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    location_id = Column(Integer, ForeignKey('location.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+    balance = Column(Numeric(16, 2), nullable=False, default=0)
+    record_count = Column(Integer, nullable=False, default=0)
+
+class SphereBalance(Base):
+    """Running balance of an owner's non-transfer records per sphere."""
+    owner_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    sphere_id = Column(Integer, ForeignKey('sphere.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+    balance = Column(Numeric(16, 2), nullable=False, default=0)
+    record_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,8 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer
+
+from app.db.base_class import Base
+
+class UserDataVersion(Base):
+    """Counter bumped by every write that changes what a user's lists and dashboard show."""
+    user_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,40 @@
+import enum
+from sqlalchemy import Boolean, Column, Enum, Float, ForeignKey, Integer, LargeBinary, String, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class Job(Base):
+    """A background job: its queue entry, progress report and outcome (see app/core/jobs.py)."""
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    owner_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    params = Column(JSONB, nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED, index=True)
+
+    progress = Column(Float, nullable=False, default=0)
+    progress_message = Column(String(255), nullable=True)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+
+    # host:pid of the worker process running the job; heartbeat_at is refreshed while it runs
+    worker = Column(String(100), nullable=True)
+    heartbeat_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+class JobResultChunk(Base):
+    """A piece of the file a job produced (an export), in order of seq; deleted with the job."""
+    job_id = Column(Integer, ForeignKey('job.id', ondelete='CASCADE'), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    data = Column(LargeBinary, nullable=False)
@@ -0,0 +1,47 @@
+from sqlalchemy import Boolean, Column, Date, Enum, ForeignKey, Index, Integer, Numeric
+
+from app.db.base_class import Base
+from app.models.accounting_record import OperationType
+
+# Records are bucketed by their date in UTC.
+# sphere_id is NULL for records whose sphere was deleted, hence NULLS NOT DISTINCT in the unique keys.
+
+class DailyRollup(Base):
+    """Per-day totals of an owner's records by sphere, location, operation type and transfer flag."""
+    __table_args__ = (
+        Index(
+            'ux_dailyrollup_key', 'owner_id', 'period', 'sphere_id', 'location_id', 'operation_type', 'is_transfer',
+            unique=True, postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    period = Column(Date, nullable=False)
+    sphere_id = Column(Integer, ForeignKey('sphere.id', ondelete='SET NULL'), nullable=True, index=True)
+    location_id = Column(Integer, ForeignKey('location.id', ondelete='CASCADE'), nullable=False, index=True)
+    operation_type = Column(Enum(OperationType), nullable=False)
+    is_transfer = Column(Boolean, nullable=False)
+
+    total = Column(Numeric(16, 2), nullable=False, default=0)
+    record_count = Column(Integer, nullable=False, default=0)
+
+class MonthlyRollup(Base):
+    """Same as DailyRollup, bucketed by month; period is the first day of the month."""
+    __table_args__ = (
+        Index(
+            'ux_monthlyrollup_key', 'owner_id', 'period', 'sphere_id', 'location_id', 'operation_type', 'is_transfer',
+            unique=True, postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    period = Column(Date, nullable=False)
+    sphere_id = Column(Integer, ForeignKey('sphere.id', ondelete='SET NULL'), nullable=True, index=True)
+    location_id = Column(Integer, ForeignKey('location.id', ondelete='CASCADE'), nullable=False, index=True)
+    operation_type = Column(Enum(OperationType), nullable=False)
+    is_transfer = Column(Boolean, nullable=False)
+
+    total = Column(Numeric(16, 2), nullable=False, default=0)
+    record_count = Column(Integer, nullable=False, default=0)
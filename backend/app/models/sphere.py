@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Table
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -6,20 +6,23 @@ from app.db.base_class import Base
 sphere_readers_association = Table(
     'sphere_readers_association', Base.metadata,
     Column('sphere_id', Integer, ForeignKey('sphere.id'), primary_key=True),
-    Column('user_id', Integer, ForeignKey('user.id'), primary_key=True)
+    Column('user_id', Integer, ForeignKey('user.id'), primary_key=True),
+    # Lookups by user; the primary key only serves lookups by sphere
+    Index('ix_sphere_readers_association_user_id', 'user_id', 'sphere_id'),
 )
 
 sphere_editors_association = Table(
     'sphere_editors_association', Base.metadata,
     Column('sphere_id', Integer, ForeignKey('sphere.id'), primary_key=True),
-    Column('user_id', Integer, ForeignKey('user.id'), primary_key=True)
+    Column('user_id', Integer, ForeignKey('user.id'), primary_key=True),
+    Index('ix_sphere_editors_association_user_id', 'user_id', 'sphere_id'),
 )
 
 class Sphere(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True)
     description = Column(String(255), nullable=True)
-    owner_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    owner_id = Column(Integer, ForeignKey('user.id'), nullable=False, index=True)
 
     owner = relationship("User", back_populates="spheres")
 
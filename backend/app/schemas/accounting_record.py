@@ -1,13 +1,14 @@
 import math
 from datetime import datetime
-from typing import Literal, Union
+from typing import Annotated, Literal, Union
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 from app.models.accounting_record import OperationType
-from .location import LocationRead
-from .sphere import SphereRead
-from .utils import PaginatedResponse
+from .location import LocationInDBBase, LocationRead
+from .sphere import SphereInDBBase, SphereRead
+from .user import UserRead
+from .utils import CursorPaginatedResponse, PaginatedResponse
 
 
 # Base properties
@@ -17,14 +18,14 @@ class RecordBase(BaseModel):
 
 
 # Properties to receive on creation
-class RecordCreateIncome(BaseModel):
+class RecordCreateIncome(RecordBase):
     type: Literal["Income"]
     sum: float = Field(..., gt=0, description="Сумма должна быть положительной")
     location_id: int
     sphere_id: int
 
 
-class RecordCreateSpend(BaseModel):
+class RecordCreateSpend(RecordBase):
     type: Literal["Spend"]
     sum: float = Field(..., gt=0, description="Сумма должна быть положительной")
     location_id: int
@@ -84,5 +85,105 @@ class RecordRead(RecordBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RecordFilter(BaseModel):
+    """ Filters of the record list; only the ones that are set narrow the result. """
+    sphere_id: int | None = None
+    location_id: int | None = None
+    operation_type: OperationType | None = None
+    is_transfer: bool | None = None
+    date_from: datetime | None = None  # inclusive
+    date_to: datetime | None = None  # exclusive
+    sum_min: float | None = Field(None, ge=0)
+    sum_max: float | None = Field(None, ge=0)
+
+    @model_validator(mode='after')
+    def check_ranges(self) -> 'RecordFilter':
+        if self.date_from and self.date_to and self.date_from >= self.date_to:
+            raise ValueError("'date_from' must be before 'date_to'.")
+        if self.sum_min is not None and self.sum_max is not None and self.sum_min > self.sum_max:
+            raise ValueError("'sum_min' cannot be greater than 'sum_max'.")
+        return self
+
+
 class PaginatedRecordRead(PaginatedResponse[RecordRead]):
-    pass
\ No newline at end of file
+    pass
+
+
+class CursorPaginatedRecordRead(CursorPaginatedResponse[RecordRead]):
+    pass
+
+
+# Compact view: records reference spheres, locations and users by id;
+# each referenced object is sent once in the side-loaded maps
+class RecordCompact(RecordBase):
+    id: int
+    accounting_id: int
+    operation_type: OperationType
+    is_transfer: bool
+    sum: float
+    owner_id: int
+    location_id: int | None
+    sphere_id: int | None
+
+
+class RecordReferences(BaseModel):
+    spheres: dict[int, SphereInDBBase] = Field(..., description="Spheres of the page's records by id")
+    locations: dict[int, LocationInDBBase] = Field(..., description="Locations of the page's records by id")
+    users: dict[int, UserRead] = Field(..., description="Owners of the records, spheres and locations by id")
+
+
+class CompactPaginatedRecordRead(PaginatedResponse[RecordCompact], RecordReferences):
+    pass
+
+
+class CompactCursorPaginatedRecordRead(CursorPaginatedResponse[RecordCompact], RecordReferences):
+    pass
+
+
+class RecordBatchCreate(BaseModel):
+    op: Literal["create"]
+    record: Annotated[RecordCreate, Field(discriminator="type")]
+
+
+class RecordBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    record: Annotated[RecordCreate, Field(discriminator="type")]
+
+
+class RecordBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+RecordBatchOperation = Annotated[Union[RecordBatchCreate, RecordBatchUpdate, RecordBatchDelete], Field(discriminator="op")]
+
+
+class RecordBatch(BaseModel):
+    operations: list[RecordBatchOperation] = Field(..., min_length=1, max_length=500)
+
+
+class RecordBatchOperationResult(BaseModel):
+    index: int = Field(..., description="0-based position of the operation in the request")
+    op: Literal["create", "update", "delete"]
+    status: Literal["created", "updated", "deleted", "failed", "not_applied"]
+    records: list[RecordRead] = Field([], description="Created or updated records (a transfer has two)")
+    detail: str | None = None
+
+
+class RecordBatchResult(BaseModel):
+    applied: bool = Field(..., description="False if any operation failed; then none was applied")
+    results: list[RecordBatchOperationResult]
+
+
+class RecordImportError(BaseModel):
+    row: int = Field(..., description="1-based data row (CSV) or line (NDJSON) number")
+    detail: str
+
+
+class RecordImportResult(BaseModel):
+    rows: int = Field(..., description="Number of data rows read")
+    imported: int = Field(..., description="Number of rows imported")
+    records_created: int = Field(..., description="Number of records created (a transfer creates two)")
+    errors: list[RecordImportError]
+    errors_truncated: bool = Field(False, description="Only the first errors are reported")
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+
+class CacheStats(BaseModel):
+    name: str
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+class PasswordHasherStats(BaseModel):
+    max_workers: int
+    max_pending: int
+    waiting: int
+    calls: int
+    rejected: int
+    queue_seconds_avg: float
+    queue_seconds_max: float
+    run_seconds_avg: float
+
+class PoolStats(BaseModel):
+    name: str
+    size: int
+    max_overflow: int
+    timeout_seconds: float
+    checked_out: int
+    idle: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    overflow_events: int
+    wait_seconds_avg: float
+    wait_seconds_max: float
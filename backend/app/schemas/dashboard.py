@@ -1,3 +1,6 @@
+from datetime import date
+from typing import Literal
+
 from pydantic import BaseModel
 
 class BalanceItem(BaseModel):
@@ -8,4 +11,16 @@ class BalanceItem(BaseModel):
 class DashboardData(BaseModel):
     total_balance: float
     locations_balance: list[BalanceItem]
-    spheres_balance: list[BalanceItem] # Income - Spend
\ No newline at end of file
+    spheres_balance: list[BalanceItem] # Income - Spend
+
+class TimeseriesPoint(BaseModel):
+    period: date # First day of the day/month bucket (UTC)
+    id: int | None = None # Sphere or location id when grouped
+    name: str | None = None
+    income: float
+    spend: float
+
+class DashboardTimeseries(BaseModel):
+    granularity: Literal["day", "month"]
+    group_by: Literal["sphere", "location"] | None
+    points: list[TimeseriesPoint]
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Annotated, Any, Literal, Union
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.models.job import JobStatus
+
+
+# Parameters of each job kind; "kind" selects the handler (app/jobs.py)
+class BalanceRebuildJob(BaseModel):
+    kind: Literal["balance_rebuild"]
+    owner_id: int | None = Field(None, description="Only this user's balances; everyone's if omitted")
+
+
+class RecordExportJob(BaseModel):
+    kind: Literal["records_export"]
+    format: Literal["csv", "ndjson"] = "csv"
+    date_from: datetime | None = None  # inclusive
+    date_to: datetime | None = None  # exclusive
+
+    @model_validator(mode='after')
+    def check_range(self) -> 'RecordExportJob':
+        if self.date_from and self.date_to and self.date_from >= self.date_to:
+            raise ValueError("'date_from' must be before 'date_to'.")
+        return self
+
+
+JobCreate = Annotated[Union[BalanceRebuildJob, RecordExportJob], Field(discriminator="kind")]
+
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    owner_id: int
+    params: dict[str, Any]
+    status: JobStatus
+    progress: float
+    progress_message: str | None
+    result: dict[str, Any] | None
+    error: str | None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = ConfigDict(from_attributes=True)
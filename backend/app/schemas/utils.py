@@ -8,4 +8,11 @@ class PaginatedResponse(BaseModel, Generic[T]):
     page: int = Field(..., ge=1, description="Current page number")
     size: int = Field(..., ge=1, description="Number of items per page")
     pages: int = Field(..., ge=0, description="Total number of pages")
-    items: List[T]
\ No newline at end of file
+    items: List[T]
+
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    total: int | None = Field(None, description="Total number of items, only when requested")
+    size: int = Field(..., ge=1, description="Number of items per page")
+    next_cursor: str | None = Field(None, description="Opaque cursor for the following page")
+    prev_cursor: str | None = Field(None, description="Opaque cursor for the preceding page")
+    items: List[T]
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic data set for the benchmarks: users with spheres and locations,
+reader/editor shares between them and accounting records (including transfer pairs),
+bulk-loaded with COPY. Balances and rollups are rebuilt afterwards.
+
+Run from backend/: python -m benchmarks.generate_data --users 100 --records-per-user 10000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_password_hash
+from app.crud.balance import balance as balance_crud
+from app.crud.record_import import COPY_COLUMNS
+from app.db.partitions import ensure_record_partitions
+from app.db.session import AsyncSessionLocal
+from app.models import AccountingRecord
+
+DEFAULT_LOGIN_PREFIX = "bench"
+DEFAULT_PASSWORD = "benchmark-password"
+
+RECORD_BATCH_SIZE = 100_000
+
+# Share of records by kind; a transfer is a spend + income pair
+SPEND_SHARE = 0.6
+INCOME_SHARE = 0.3
+
+SPHERE_NAMES = ["Продукты", "Транспорт", "Жильё", "Здоровье", "Развлечения", "Одежда", "Связь", "Подарки"]
+LOCATION_NAMES = ["Наличные", "Карта", "Сберегательный счёт", "Кредитная карта", "Брокерский счёт", "Копилка"]
+
+
+def login_for(prefix: str, index: int) -> str:
+    return f"{prefix}-{index}"
+
+
+async def _reserve_ids(db: AsyncSession, table: str, count: int) -> list[int]:
+    result = await db.execute(
+        text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+        {"table": table, "count": count},
+    )
+    return list(result.scalars().all())
+
+
+async def _copy(db: AsyncSession, table: str, columns: tuple[str, ...], records: list[tuple]) -> None:
+    if not records:
+        return
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(table, columns=columns, records=records)
+
+
+class Generator:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.now = datetime.now(timezone.utc)
+        # (kind, user_id) -> ids of other users' resources that user may edit
+        self.editable: dict[tuple[str, int], list[int]] = {}
+
+    async def run(self, db: AsyncSession) -> dict:
+        args = self.args
+        existing = (await db.execute(
+            text('SELECT count(*) FROM "user" WHERE login LIKE :pattern'), {"pattern": f"{args.login_prefix}-%"}
+        )).scalar_one()
+        if existing:
+            raise SystemExit(
+                f"{existing} users with the login prefix '{args.login_prefix}' already exist; "
+                "use another --login-prefix or a fresh database"
+            )
+
+        started = time.perf_counter()
+        user_ids = await self._create_users(db)
+        spheres = await self._create_resources(db, "sphere", SPHERE_NAMES, user_ids, args.spheres)
+        locations = await self._create_resources(db, "location", LOCATION_NAMES, user_ids, args.locations)
+        shares = await self._share(db, "sphere", spheres, user_ids) + await self._share(db, "location", locations, user_ids)
+        records = await self._create_records(db, user_ids, spheres, locations)
+        loaded = time.perf_counter()
+
+        # Records older than the existing partitions landed in the default partition
+        await ensure_record_partitions(db)
+        await db.commit()
+        # Only the generated users have new records; everyone else's balances are left alone
+        for owner_id in user_ids:
+            await balance_crud.rebuild(db, owner_id=owner_id)
+        if args.analyze:
+            for table in ("user", "sphere", "location", AccountingRecord.__tablename__, "locationbalance", "spherebalance", "dailyrollup", "monthlyrollup"):
+                await db.execute(text(f'ANALYZE "{table}"'))
+            await db.commit()
+
+        return {
+            "users": len(user_ids),
+            "spheres": sum(len(ids) for ids in spheres.values()),
+            "locations": sum(len(ids) for ids in locations.values()),
+            "shares": shares,
+            "records": records,
+            "load_seconds": round(loaded - started, 1),
+            "total_seconds": round(time.perf_counter() - started, 1),
+        }
+
+    async def _create_users(self, db: AsyncSession) -> list[int]:
+        args = self.args
+        # One bcrypt hash for everyone: hashing is what makes ORM-created users slow
+        hashed_password = get_password_hash(args.password)
+        ids = await _reserve_ids(db, '"user"', args.users)
+        await _copy(db, "user", ("id", "login", "hashed_password", "description", "is_admin"), [
+            (user_id, login_for(args.login_prefix, i), hashed_password, "Benchmark user", False)
+            for i, user_id in enumerate(ids)
+        ])
+        return ids
+
+    async def _create_resources(
+        self, db: AsyncSession, table: str, names: list[str], user_ids: list[int], per_user: int
+    ) -> dict[int, list[int]]:
+        ids = iter(await _reserve_ids(db, table, len(user_ids) * per_user))
+        owned: dict[int, list[int]] = {}
+        rows = []
+        for owner_id in user_ids:
+            owned[owner_id] = []
+            for i in range(per_user):
+                resource_id = next(ids)
+                owned[owner_id].append(resource_id)
+                rows.append((resource_id, f"{names[i % len(names)]} {i // len(names) + 1}", None, owner_id))
+        await _copy(db, table, ("id", "name", "description", "owner_id"), rows)
+        return owned
+
+    async def _share(self, db: AsyncSession, kind: str, owned: dict[int, list[int]], user_ids: list[int]) -> int:
+        """ Share a fraction of every user's resources with a few other users, as readers or editors. """
+        args = self.args
+        readers, editors = set(), set()
+        share_with = min(args.share_with, len(user_ids) - 1)
+        for owner_id, resource_ids in owned.items():
+            for resource_id in resource_ids:
+                if share_with < 1 or self.rng.random() >= args.share_ratio:
+                    continue
+                candidates = self.rng.sample(user_ids, share_with + 1)
+                for user_id in [u for u in candidates if u != owner_id][:share_with]:
+                    if self.rng.random() < 0.5:
+                        readers.add((resource_id, user_id))
+                    else:
+                        editors.add((resource_id, user_id))
+                        self.editable.setdefault((kind, user_id), []).append(resource_id)
+        await _copy(db, f"{kind}_readers_association", (f"{kind}_id", "user_id"), sorted(readers))
+        await _copy(db, f"{kind}_editors_association", (f"{kind}_id", "user_id"), sorted(editors))
+        return len(readers) + len(editors)
+
+    async def _create_records(
+        self, db: AsyncSession, user_ids: list[int], spheres: dict[int, list[int]], locations: dict[int, list[int]]
+    ) -> int:
+        args = self.args
+        total = 0
+        # Operations, each a list of rows without accounting_id
+        batch: list[list[tuple]] = []
+        batch_rows = 0
+        for n, owner_id in enumerate(user_ids, 1):
+            # Mostly own resources; some records go to resources shared with the owner for editing
+            user_spheres = spheres[owner_id] + self.editable.get(("sphere", owner_id), [])
+            user_locations = locations[owner_id] + self.editable.get(("location", owner_id), [])
+            remaining = args.records_per_user
+            while remaining > 0:
+                rows = self._operation(owner_id, user_spheres, user_locations)
+                batch.append(rows)
+                batch_rows += len(rows)
+                remaining -= len(rows)
+                if batch_rows >= RECORD_BATCH_SIZE:
+                    total += await self._flush_records(db, batch)
+                    batch, batch_rows = [], 0
+            print(f"   records: {n}/{len(user_ids)} users", file=sys.stderr, end="\r")
+        total += await self._flush_records(db, batch)
+        print(file=sys.stderr)
+        return total
+
+    def _operation(self, owner_id: int, spheres: list[int], locations: list[int]) -> list[tuple]:
+        """ Rows of one operation without accounting_id: a spend, an income or a transfer pair. """
+        rng = self.rng
+        date = self.now - timedelta(seconds=rng.uniform(0, self.args.years * 365 * 86400))
+        # Log-normal amounts: mostly small, occasionally large
+        amount = Decimal(max(1, int(rng.lognormvariate(7, 1.2)))).scaleb(-2)
+        sphere_id, location_id = rng.choice(spheres), rng.choice(locations)
+        description = None if rng.random() < 0.5 else f"Операция {rng.randrange(1000)}"
+
+        kind = rng.random()
+        if kind < SPEND_SHARE:
+            return [(owner_id, "SPEND", False, sphere_id, location_id, amount, description, date)]
+        if kind < SPEND_SHARE + INCOME_SHARE or len(locations) < 2 or len(spheres) < 2:
+            return [(owner_id, "INCOME", False, sphere_id, location_id, amount, description, date)]
+        if rng.random() < 0.5:
+            to_location_id = rng.choice([l for l in locations if l != location_id])
+            return [
+                (owner_id, "SPEND", True, sphere_id, location_id, amount, description, date),
+                (owner_id, "INCOME", True, sphere_id, to_location_id, amount, description, date),
+            ]
+        to_sphere_id = rng.choice([s for s in spheres if s != sphere_id])
+        return [
+            (owner_id, "SPEND", True, sphere_id, location_id, amount, description, date),
+            (owner_id, "INCOME", True, to_sphere_id, location_id, amount, description, date),
+        ]
+
+    async def _flush_records(self, db: AsyncSession, operations: list[list[tuple]]) -> int:
+        if not operations:
+            return 0
+        # Both rows of a transfer share the accounting id
+        accounting_ids = (await db.execute(
+            text("SELECT nextval('accountingrecord_accounting_id_seq') FROM generate_series(1, :count)"),
+            {"count": len(operations)},
+        )).scalars().all()
+        rows = [
+            (accounting_id, *row)
+            for accounting_id, operation in zip(accounting_ids, operations)
+            for row in operation
+        ]
+        await _copy(db, AccountingRecord.__tablename__, COPY_COLUMNS, rows)
+        await db.commit()
+        return len(rows)
+
+
+async def main(args: argparse.Namespace) -> int:
+    async with AsyncSessionLocal() as db:
+        summary = await Generator(args).run(db)
+    print(f"✅ Generated {summary['records']} records for {summary['users']} users "
+          f"({summary['spheres']} spheres, {summary['locations']} locations, {summary['shares']} shares) "
+          f"in {summary['total_seconds']}s")
+    print(f"   Logins: {login_for(args.login_prefix, 0)} .. {login_for(args.login_prefix, args.users - 1)}, password: {args.password}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="Number of users")
+    parser.add_argument("--spheres", type=int, default=8, help="Spheres per user")
+    parser.add_argument("--locations", type=int, default=4, help="Locations per user")
+    parser.add_argument("--records-per-user", type=int, default=10_000, help="Accounting records per user (a transfer is two)")
+    parser.add_argument("--years", type=float, default=3, help="Records are spread over this many past years")
+    parser.add_argument("--share-ratio", type=float, default=0.2, help="Fraction of spheres/locations shared with other users")
+    parser.add_argument("--share-with", type=int, default=3, help="Number of users each shared resource is shared with")
+    parser.add_argument("--login-prefix", default=DEFAULT_LOGIN_PREFIX, help="Users are named <prefix>-0, <prefix>-1, ...")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password of every generated user")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed yields the same data set")
+    parser.add_argument("--no-analyze", dest="analyze", action="store_false", help="Skip ANALYZE of the loaded tables")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Drive the API with a fixed request mix against a data set created by benchmarks.generate_data
+and report throughput and latency percentiles per scenario as JSON.
+
+By default the FastAPI app is called in-process (no network, no uvicorn); --base-url targets
+a running server instead. Run from backend/:
+
+    python -m benchmarks.run --requests 500 --concurrency 8 --output results.json
+    python -m benchmarks.run --compare results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+import httpx
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.session import AsyncSessionLocal
+from benchmarks.generate_data import DEFAULT_LOGIN_PREFIX, DEFAULT_PASSWORD
+
+API = settings.API_V1_STR
+
+# Search terms matching generated descriptions ("Операция N") and sphere names
+SEARCH_TERMS = ["операция 12", "Продукты", "транспорт", "операц 7"]
+
+SCENARIOS = ["login", "records_list", "records_compact", "records_cursor", "records_filtered", "records_search", "dashboard", "create_transfer", "update_transfer"]
+
+
+class BenchUser:
+    def __init__(self, id: int, login: str, sphere_id: int, location_ids: list[int]):
+        self.id = id
+        self.login = login
+        self.sphere_id = sphere_id
+        self.location_ids = location_ids
+        self.headers = {"Authorization": f"Bearer {create_access_token(login)}"}
+
+    def transfer(self, amount: float) -> dict:
+        return {
+            "type": "Transfer", "transfer_type": "location", "sum": amount, "sphere_id": self.sphere_id,
+            "from_location_id": self.location_ids[0], "to_location_id": self.location_ids[1],
+            "description": "benchmark",
+        }
+
+
+async def load_users(prefix: str, limit: int) -> list[BenchUser]:
+    """ Generated users with one sphere and two locations each to run transfers in. """
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(text("""
+            SELECT u.id, u.login,
+                   (SELECT min(s.id) FROM sphere s WHERE s.owner_id = u.id) AS sphere_id,
+                   ARRAY(SELECT l.id FROM location l WHERE l.owner_id = u.id ORDER BY l.id LIMIT 2) AS location_ids
+            FROM "user" u
+            WHERE u.login LIKE :pattern
+            ORDER BY u.id
+            LIMIT :limit
+        """), {"pattern": f"{prefix}-%", "limit": limit})).all()
+    users = [BenchUser(*row) for row in rows if row.sphere_id and len(row.location_ids) == 2]
+    if not users:
+        raise SystemExit(f"No users with the login prefix '{prefix}'; run python -m benchmarks.generate_data first")
+    return users
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(
+    name: str, request: Callable[[int], Awaitable[httpx.Response]], *, requests: int, concurrency: int, warmup: int
+) -> dict:
+    for i in range(warmup):
+        await request(i)
+
+    counter = itertools.count()
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+
+    async def worker():
+        while (i := next(counter)) < requests:
+            started = time.perf_counter()
+            try:
+                response = await request(warmup + i)
+                failure = None if response.is_success else str(response.status_code)
+            except httpx.HTTPError as e:
+                failure = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if failure:
+                errors[failure] = errors.get(failure, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ms) / len(ms), 2) if ms else 0.0,
+            "p50": round(percentile(ms, 50), 2),
+            "p95": round(percentile(ms, 95), 2),
+            "p99": round(percentile(ms, 99), 2),
+            "max": round(ms[-1], 2) if ms else 0.0,
+        },
+    }
+
+
+def build_scenarios(
+    client: httpx.AsyncClient, users: list[BenchUser], password: str, transfers: asyncio.Queue
+) -> dict[str, Callable]:
+    def user(i: int) -> BenchUser:
+        return users[i % len(users)]
+
+    async def login(i):
+        return await client.post(f"{API}/auth/token", data={"username": user(i).login, "password": password})
+
+    async def records_list(i):
+        return await client.get(f"{API}/records/", params={"page": 1 + i % 5, "size": 20}, headers=user(i).headers)
+
+    async def records_compact(i):
+        return await client.get(
+            f"{API}/records/", params={"page": 1 + i % 5, "size": 20, "view": "compact"}, headers=user(i).headers
+        )
+
+    async def records_cursor(i):
+        return await client.get(f"{API}/records/", params={"pagination": "cursor", "size": 50}, headers=user(i).headers)
+
+    async def records_filtered(i):
+        return await client.get(
+            f"{API}/records/", params={"sphere_id": user(i).sphere_id, "is_transfer": False, "size": 20}, headers=user(i).headers
+        )
+
+    async def records_search(i):
+        return await client.get(
+            f"{API}/records/search", params={"q": SEARCH_TERMS[i % len(SEARCH_TERMS)], "size": 20}, headers=user(i).headers
+        )
+
+    async def dashboard(i):
+        return await client.get(f"{API}/dashboard/", headers=user(i).headers)
+
+    async def create_transfer(i):
+        return await client.post(f"{API}/records/", json=user(i).transfer(1 + i % 100), headers=user(i).headers)
+
+    async def update_transfer(i):
+        # Each transfer is updated by one request at a time
+        u, record_id = await transfers.get()
+        try:
+            response = await client.put(f"{API}/records/{record_id}", json=u.transfer(1 + i % 100), headers=u.headers)
+            if response.is_success:
+                record_id = response.json()["id"]
+            return response
+        finally:
+            transfers.put_nowait((u, record_id))
+
+    return {
+        "login": login, "records_list": records_list, "records_compact": records_compact, "records_cursor": records_cursor,
+        "records_filtered": records_filtered, "records_search": records_search, "dashboard": dashboard,
+        "create_transfer": create_transfer, "update_transfer": update_transfer,
+    }
+
+
+async def prepare_transfers(client: httpx.AsyncClient, users: list[BenchUser], count: int) -> asyncio.Queue:
+    """ Transfers for the update_transfer scenario, spread over the users. """
+    transfers = asyncio.Queue()
+    for i in range(count):
+        u = users[i % len(users)]
+        response = await client.post(f"{API}/records/", json=u.transfer(1), headers=u.headers)
+        response.raise_for_status()
+        transfers.put_nowait((u, response.json()[0]["id"]))
+    return transfers
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: dict, baseline: dict | None) -> None:
+    previous = {s["name"]: s for s in baseline["scenarios"]} if baseline else {}
+    print(f"{'scenario':<16} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}", file=sys.stderr)
+    for s in results["scenarios"]:
+        line = (
+            f"{s['name']:<16} {s['throughput_rps']:>8} {s['latency_ms']['p50']:>8} "
+            f"{s['latency_ms']['p95']:>8} {s['latency_ms']['p99']:>8} {s['errors']:>7}"
+        )
+        if (old := previous.get(s["name"])) and old["throughput_rps"] and old["latency_ms"]["p95"]:
+            rps = (s["throughput_rps"] / old["throughput_rps"] - 1) * 100
+            p95 = (s["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1) * 100
+            line += f"   vs {baseline.get('commit') or 'baseline'}: rps {rps:+.0f}%, p95 {p95:+.0f}%"
+        print(line, file=sys.stderr)
+
+
+async def main(args: argparse.Namespace) -> int:
+    users = await load_users(args.login_prefix, args.users)
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from app.main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://benchmark"
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60) as client:
+        transfers = asyncio.Queue()
+        if "update_transfer" in args.scenarios:
+            transfers = await prepare_transfers(client, users, max(len(users), args.concurrency))
+        scenarios = build_scenarios(client, users, args.password, transfers)
+        results = []
+        for name in args.scenarios:
+            # bcrypt dominates logins; fewer of them keep the run short
+            requests = max(1, args.requests // 10) if name == "login" else args.requests
+            results.append(await run_scenario(
+                name, scenarios[name], requests=requests, concurrency=args.concurrency, warmup=args.warmup
+            ))
+            print(f"   {name}: done", file=sys.stderr)
+
+    output = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "target": args.base_url or "in-process",
+        "config": {"users": len(users), "requests": args.requests, "concurrency": args.concurrency, "warmup": args.warmup},
+        "scenarios": results,
+    }
+    baseline = json.loads(open(args.compare).read()) if args.compare else None
+    print_table(output, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        print(json.dumps(output, indent=2))
+    return 1 if any(s["errors"] for s in results) else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS, help="Scenarios to run, in order")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario (a tenth of that for login)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests in flight")
+    parser.add_argument("--warmup", type=int, default=20, help="Requests per scenario before measuring")
+    parser.add_argument("--users", type=int, default=50, help="Number of generated users to spread requests over")
+    parser.add_argument("--login-prefix", default=DEFAULT_LOGIN_PREFIX, help="Login prefix used by generate_data")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password used by generate_data")
+    parser.add_argument("--base-url", default=None, help="Benchmark a running server (e.g. http://localhost:8000) instead of the app in-process")
+    parser.add_argument("--output", default=None, help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", default=None, help="Results JSON of an earlier run to compare with")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild or verify the balance ledger and rollups used by the dashboard
+"""
+import argparse
+import asyncio
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import AsyncSessionLocal
+from app.crud.balance import balance as balance_crud
+
+async def main(verify_only: bool, owner_id: int | None) -> int:
+    async with AsyncSessionLocal() as db:
+        if not verify_only:
+            await balance_crud.rebuild(db, owner_id=owner_id)
+            print("✅ Balance ledger and rollups rebuilt")
+
+        mismatches = await balance_crud.verify(db, owner_id=owner_id)
+        if not mismatches:
+            print("✅ Balance ledger and rollups match the records")
+            return 0
+
+        print(f"❌ Found {len(mismatches)} mismatching balances:")
+        for m in mismatches:
+            print(f"   owner={m['owner_id']} {m['kind']}={m['id']} expected={m['expected']} stored={m['stored']}")
+        return 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verify", action="store_true", help="Only compare the ledger with the records, do not rewrite it")
+    parser.add_argument("--owner-id", type=int, default=None, help="Limit to a single user")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.verify, args.owner_id)))
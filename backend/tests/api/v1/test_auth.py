@@ -1,10 +1,16 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.security import PasswordHasher, PasswordHasherBusy, get_password_hash
 from app.crud import user as user_crud
+from app.crud.user import principal_cache
+from app.models import User
 from app.schemas.user import UserCreate
+from tests.utils.user import create_random_user, user_authentication_headers
 
 pytestmark = pytest.mark.asyncio
 
@@ -34,7 +40,7 @@ async def test_get_access_token(client: AsyncClient, db_session: AsyncSession):
     login = "get.token.user@example.com"
     password = "testpassword123"
     user_in = UserCreate(login=login, password=password)
-    await user_crud.create(db_session, obj_in=user_in)
+    await user_crud.user.create(db_session, obj_in=user_in)
 
     response = await client.post(
         f"{settings.API_V1_STR}/auth/token",
@@ -57,4 +63,46 @@ async def test_get_me(authenticated_client: AsyncClient, test_user: User):
     response = await authenticated_client.get(f"{settings.API_V1_STR}/users/me")
     assert response.status_code == 200
     user_data = response.json()
-    assert user_data["login"] == test_user.login
\ No newline at end of file
+    assert user_data["login"] == test_user.login
+
+async def test_current_user_is_cached_and_invalidated(authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User):
+    response = await authenticated_client.get(f"{settings.API_V1_STR}/users/me")
+    assert response.status_code == 200
+    hits = principal_cache.hits
+    response = await authenticated_client.get(f"{settings.API_V1_STR}/users/me")
+    assert response.status_code == 200
+    assert principal_cache.hits == hits + 1
+
+    # Changing the user drops the cached principal
+    test_user.description = "changed"
+    await db_session.commit()
+    response = await authenticated_client.get(f"{settings.API_V1_STR}/users/me")
+    assert response.json()["description"] == "changed"
+
+async def test_admin_view_as_user_uses_cache(client: AsyncClient, db_session: AsyncSession, test_user: User):
+    admin = await create_random_user(db_session, is_admin=True)
+    headers = user_authentication_headers(login=admin.login)
+    for _ in range(2):
+        response = await client.get(
+            f"{settings.API_V1_STR}/users/me", headers=headers, params={"as_user_id": test_user.id}
+        )
+        assert response.status_code == 200
+        assert response.json()["id"] == test_user.id
+
+    response = await client.get(f"{settings.API_V1_STR}/admin/caches", headers=headers)
+    assert response.status_code == 200
+    assert any(c["name"] == "principals" and c["hits"] > 0 for c in response.json())
+
+async def test_password_hasher_bounds_pending_operations():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    hashed = get_password_hash("secret-password")
+
+    results = await asyncio.gather(
+        *(hasher.verify("secret-password", hashed) for _ in range(4)), return_exceptions=True
+    )
+    assert results.count(True) == 2
+    assert sum(isinstance(r, PasswordHasherBusy) for r in results) == 2
+    stats = hasher.stats()
+    assert stats["calls"] == 2
+    assert stats["rejected"] == 2
+    assert stats["queue_seconds_max"] > 0
@@ -0,0 +1,74 @@
+import argparse
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.balance import balance as balance_crud
+from app.main import app
+from benchmarks.generate_data import DEFAULT_PASSWORD, Generator
+from benchmarks.run import build_scenarios, load_users, prepare_transfers, run_scenario
+
+pytestmark = pytest.mark.asyncio
+
+
+def _owners(prefix: str) -> str:
+    return f"SELECT id FROM \"user\" WHERE login LIKE '{prefix}-%'"
+
+
+@pytest.fixture
+async def prefix(db_session: AsyncSession):
+    """ Login prefix of the generated users; everything they own is deleted afterwards. """
+    prefix = f"bench-test-{uuid.uuid4().hex[:8]}"
+    yield prefix
+    await db_session.rollback()
+    owners = _owners(prefix)
+    for statement in (
+        f"DELETE FROM accountingrecord WHERE owner_id IN ({owners})",
+        f"DELETE FROM dailyrollup WHERE owner_id IN ({owners})",
+        f"DELETE FROM monthlyrollup WHERE owner_id IN ({owners})",
+        *(
+            f"DELETE FROM {kind}_{role}_association WHERE user_id IN ({owners}) "
+            f"OR {kind}_id IN (SELECT id FROM {kind} WHERE owner_id IN ({owners}))"
+            for kind in ("sphere", "location") for role in ("readers", "editors")
+        ),
+        f"DELETE FROM sphere WHERE owner_id IN ({owners})",
+        f"DELETE FROM location WHERE owner_id IN ({owners})",
+        # Balances, data versions and jobs go with the users
+        f"DELETE FROM \"user\" WHERE id IN ({owners})",
+    ):
+        await db_session.execute(text(statement))
+    await db_session.commit()
+
+
+async def test_generated_data_set_drives_the_benchmark(db_session: AsyncSession, prefix: str):
+    args = argparse.Namespace(
+        users=3, spheres=2, locations=2, records_per_user=40, years=2, share_ratio=1.0, share_with=1,
+        login_prefix=prefix, password=DEFAULT_PASSWORD, seed=1, analyze=False,
+    )
+    summary = await Generator(args).run(db_session)
+    assert summary["users"] == 3
+    assert summary["shares"] == 3 * (2 + 2)
+
+    owners = _owners(prefix)
+    records = (await db_session.execute(text(
+        f"SELECT count(*), count(DISTINCT accounting_id), count(*) FILTER (WHERE is_transfer) "
+        f"FROM accountingrecord WHERE owner_id IN ({owners})"
+    ))).one()
+    assert records[0] == summary["records"] >= 3 * 40
+    # Transfers come in pairs sharing one accounting id
+    assert records[0] - records[1] == records[2] // 2
+    for owner_id in (await db_session.execute(text(owners))).scalars().all():
+        assert await balance_crud.verify(db_session, owner_id=owner_id) == []
+
+    users = await load_users(prefix, limit=10)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        transfers = await prepare_transfers(client, users, 2)
+        scenarios = build_scenarios(client, users, DEFAULT_PASSWORD, transfers)
+        for name in ("records_list", "dashboard", "update_transfer"):
+            result = await run_scenario(name, scenarios[name], requests=4, concurrency=2, warmup=1)
+            assert result["requests"] == 4
+            assert result["errors"] == 0, result["error_statuses"]
+            assert result["latency_ms"]["p50"] <= result["latency_ms"]["p99"]
@@ -0,0 +1,122 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.balance import balance as balance_crud
+from app.crud.location import location as location_crud
+from app.crud.sphere import sphere as sphere_crud
+from app.models import User
+from app.schemas.location import LocationCreate
+from app.schemas.sphere import SphereCreate
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_dashboard_balances_follow_record_writes(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User
+):
+    food = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Food"), owner_id=test_user.id)
+    salary = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Salary"), owner_id=test_user.id)
+    wallet = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Wallet"), owner_id=test_user.id)
+    bank = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Bank"), owner_id=test_user.id)
+    url = f"{settings.API_V1_STR}/records/"
+
+    response = await authenticated_client.post(url, json={"type": "Income", "sum": 1000, "sphere_id": salary.id, "location_id": bank.id})
+    assert response.status_code == 201
+    response = await authenticated_client.post(url, json={"type": "Spend", "sum": 150, "sphere_id": food.id, "location_id": bank.id})
+    spend_id = response.json()[0]["id"]
+    response = await authenticated_client.post(url, json={
+        "type": "Transfer", "transfer_type": "location", "sum": 200,
+        "sphere_id": food.id, "from_location_id": bank.id, "to_location_id": wallet.id,
+    })
+    transfer_id = response.json()[0]["id"]
+
+    response = await authenticated_client.get(f"{settings.API_V1_STR}/dashboard/")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_balance"] == 850
+    assert {b["name"]: b["balance"] for b in data["locations_balance"]} == {"Bank": 650, "Wallet": 200}
+    assert {b["name"]: b["balance"] for b in data["spheres_balance"]} == {"Food": -150, "Salary": 1000}
+
+    # Moving the spend to the wallet, editing the transfer and deleting the spend
+    response = await authenticated_client.put(f"{url}{spend_id}", json={"type": "Spend", "sum": 50, "sphere_id": food.id, "location_id": wallet.id})
+    assert response.status_code == 200
+    response = await authenticated_client.put(f"{url}{transfer_id}", json={
+        "type": "Transfer", "transfer_type": "location", "sum": 100,
+        "sphere_id": food.id, "from_location_id": bank.id, "to_location_id": wallet.id,
+    })
+    assert response.status_code == 200
+    data = (await authenticated_client.get(f"{settings.API_V1_STR}/dashboard/")).json()
+    assert data["total_balance"] == 950
+    assert {b["name"]: b["balance"] for b in data["locations_balance"]} == {"Bank": 900, "Wallet": 50}
+
+    response = await authenticated_client.delete(f"{url}{spend_id}")
+    assert response.status_code == 204
+
+    data = (await authenticated_client.get(f"{settings.API_V1_STR}/dashboard/")).json()
+    assert data["total_balance"] == 1000
+    assert {b["name"]: b["balance"] for b in data["locations_balance"]} == {"Bank": 900, "Wallet": 100}
+    assert {b["name"]: b["balance"] for b in data["spheres_balance"]} == {"Salary": 1000}
+
+    assert await balance_crud.verify(db_session, owner_id=test_user.id) == []
+
+
+async def test_dashboard_timeseries_from_rollups(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User
+):
+    food = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Food"), owner_id=test_user.id)
+    fun = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Fun"), owner_id=test_user.id)
+    wallet = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Wallet"), owner_id=test_user.id)
+    bank = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Bank"), owner_id=test_user.id)
+    url = f"{settings.API_V1_STR}/records/"
+    timeseries_url = f"{settings.API_V1_STR}/dashboard/timeseries"
+
+    for record in (
+        {"type": "Income", "sum": 1000, "sphere_id": food.id, "location_id": bank.id, "date": "2024-01-05T10:00:00Z"},
+        {"type": "Spend", "sum": 100, "sphere_id": food.id, "location_id": bank.id, "date": "2024-01-20T10:00:00Z"},
+        {"type": "Spend", "sum": 30, "sphere_id": fun.id, "location_id": wallet.id, "date": "2024-01-31T23:30:00Z"},
+        {"type": "Spend", "sum": 40, "sphere_id": food.id, "location_id": wallet.id, "date": "2024-02-10T10:00:00Z"},
+        {
+            "type": "Transfer", "transfer_type": "location", "sum": 500, "sphere_id": food.id,
+            "from_location_id": bank.id, "to_location_id": wallet.id, "date": "2024-01-06T10:00:00Z",
+        },
+    ):
+        response = await authenticated_client.post(url, json=record)
+        assert response.status_code == 201
+
+    response = await authenticated_client.get(timeseries_url, params={"granularity": "month"})
+    assert response.status_code == 200
+    points = response.json()["points"]
+    assert [(p["period"], p["income"], p["spend"]) for p in points] == [
+        ("2024-01-01", 1000, 130),
+        ("2024-02-01", 0, 40),
+    ]
+
+    response = await authenticated_client.get(timeseries_url, params={
+        "granularity": "month", "group_by": "sphere", "date_from": "2024-01-15", "date_to": "2024-02-01",
+    })
+    points = response.json()["points"]
+    assert [(p["period"], p["name"], p["income"], p["spend"]) for p in points] == [
+        ("2024-01-01", "Food", 1000, 100),
+        ("2024-01-01", "Fun", 0, 30),
+    ]
+
+    response = await authenticated_client.get(timeseries_url, params={
+        "granularity": "day", "group_by": "location", "include_transfers": True, "date_to": "2024-01-07",
+    })
+    points = response.json()["points"]
+    assert [(p["period"], p["name"], p["income"], p["spend"]) for p in points] == [
+        ("2024-01-05", "Bank", 1000, 0),
+        ("2024-01-06", "Bank", 0, 500),
+        ("2024-01-06", "Wallet", 500, 0),
+    ]
+
+    # Deleting a sphere keeps its records (without sphere) in the totals
+    response = await authenticated_client.delete(f"{settings.API_V1_STR}/spheres/{fun.id}")
+    assert response.status_code == 204
+    response = await authenticated_client.get(timeseries_url, params={"group_by": "sphere", "date_to": "2024-02-01"})
+    points = response.json()["points"]
+    assert [(p["id"], p["name"], p["spend"]) for p in points] == [(food.id, "Food", 100), (None, None, 30)]
+
+    assert await balance_crud.verify(db_session, owner_id=test_user.id) == []
@@ -0,0 +1,76 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.db.pool import MeteredQueuePool, pools
+from app.db.session import create_db_engine
+from tests.utils.user import create_random_user, user_authentication_headers
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_pool_metrics_count_overflow_and_timeouts():
+    engine = create_async_engine(
+        str(settings.ASYNC_DATABASE_URI),
+        poolclass=MeteredQueuePool, pool_logging_name="test-small",
+        pool_size=1, max_overflow=1, pool_timeout=0.1,
+    )
+    try:
+        async with engine.connect(), engine.connect():
+            stats = pools["test-small"].stats()
+            assert stats["checked_out"] == 2
+            assert stats["overflow"] == 1
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+        stats = pools["test-small"].stats()
+        assert stats["checked_out"] == 0
+        assert stats["checkouts"] == 3
+        assert stats["overflow_events"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["wait_seconds_max"] >= 0.1
+    finally:
+        await engine.dispose()
+        del pools["test-small"]
+
+
+async def test_idle_connections_are_pinged_on_checkout(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", "idle")
+    engine = create_db_engine(str(settings.ASYNC_DATABASE_URI), "test-idle")
+    admin_engine = create_async_engine(str(settings.ASYNC_DATABASE_URI))
+    try:
+        async with engine.connect() as conn:
+            pid = (await conn.execute(text("SELECT pg_backend_pid()"))).scalar_one()
+        async with admin_engine.connect() as conn:
+            await conn.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+
+        # The pooled connection is dead; once it counts as idle the ping replaces it
+        monkeypatch.setattr(settings, "DB_POOL_PRE_PING_IDLE_SECONDS", 0)
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT pg_backend_pid()"))).scalar_one() != pid
+    finally:
+        await admin_engine.dispose()
+        await engine.dispose()
+        del pools["test-idle"]
+
+
+async def test_admin_pool_stats(client: AsyncClient, db_session: AsyncSession):
+    admin = await create_random_user(db_session, is_admin=True)
+    headers = user_authentication_headers(login=admin.login)
+    # Read endpoints use the application's engine
+    assert (await client.get(f"{settings.API_V1_STR}/spheres/", headers=headers)).status_code == 200
+
+    response = await client.get(f"{settings.API_V1_STR}/admin/db-pools", headers=headers)
+    assert response.status_code == 200
+    primary = next(p for p in response.json() if p["name"] == "primary")
+    assert primary["size"] == settings.DB_POOL_SIZE
+    assert primary["checkouts"] > 0
+
+    user = await create_random_user(db_session)
+    response = await client.get(
+        f"{settings.API_V1_STR}/admin/db-pools", headers=user_authentication_headers(login=user.login)
+    )
+    assert response.status_code == 403
@@ -0,0 +1,100 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from tests.utils.user import create_random_user, user_authentication_headers
+
+pytestmark = pytest.mark.asyncio
+
+
+def _statements(response) -> int:
+    summary = dict(part.split("=") for part in response.headers["x-sql-profile"].split("; "))
+    return int(summary["statements"])
+
+
+async def test_unchanged_dashboard_is_not_recomputed(monkeypatch, authenticated_client: AsyncClient):
+    monkeypatch.setattr(settings, "SQL_PROFILER_ENABLED", True)
+    monkeypatch.setattr(settings, "SQL_PROFILE_HEADER", True)
+    url = f"{settings.API_V1_STR}/dashboard/"
+
+    response = await authenticated_client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    cached = await authenticated_client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    # Only the version lookup runs, not the balance aggregation
+    assert _statements(cached) < _statements(response)
+
+    # Weak comparison and lists of tags are accepted
+    response = await authenticated_client.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+    response = await authenticated_client.get(url, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+async def test_record_write_changes_list_and_dashboard_etags(authenticated_client: AsyncClient):
+    api = settings.API_V1_STR
+    sphere = (await authenticated_client.post(f"{api}/spheres/", json={"name": "ETag sphere"})).json()
+    location = (await authenticated_client.post(f"{api}/locations/", json={"name": "ETag location"})).json()
+
+    urls = [f"{api}/records/", f"{api}/records/?page=2", f"{api}/dashboard/", f"{api}/spheres/"]
+    etags = {url: (await authenticated_client.get(url)).headers["etag"] for url in urls}
+    # Different queries of the same data have different tags
+    assert len(set(etags.values())) == len(urls)
+    for url, etag in etags.items():
+        assert (await authenticated_client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+    response = await authenticated_client.post(f"{api}/records/", json={
+        "type": "Spend", "sum": 10, "sphere_id": sphere["id"], "location_id": location["id"],
+    })
+    assert response.status_code == 201
+
+    for url, etag in etags.items():
+        response = await authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+
+async def test_shared_resource_changes_bump_members(
+    authenticated_client: AsyncClient, client: AsyncClient, db_session: AsyncSession
+):
+    api = settings.API_V1_STR
+    reader = await create_random_user(db_session)
+    reader_headers = user_authentication_headers(login=reader.login)
+    outsider = await create_random_user(db_session)
+    outsider_headers = user_authentication_headers(login=outsider.login)
+
+    def spheres_etag(headers):
+        return client.get(f"{api}/spheres/", headers=headers)
+
+    reader_etag = (await spheres_etag(reader_headers)).headers["etag"]
+    outsider_etag = (await spheres_etag(outsider_headers)).headers["etag"]
+
+    response = await authenticated_client.post(f"{api}/spheres/", json={"name": "Shared", "reader_ids": [reader.id]})
+    sphere_id = response.json()["id"]
+    response = await spheres_etag(reader_headers)
+    assert response.headers["etag"] != reader_etag
+    reader_etag = response.headers["etag"]
+
+    response = await authenticated_client.put(f"{api}/spheres/{sphere_id}", json={"name": "Renamed"})
+    assert response.status_code == 200
+    response = await client.get(f"{api}/spheres/", headers={**reader_headers, "If-None-Match": reader_etag})
+    assert response.status_code == 200
+    assert "Renamed" in [s["name"] for s in response.json()]
+    reader_etag = response.headers["etag"]
+
+    # Losing access changes the list too
+    response = await authenticated_client.put(f"{api}/spheres/{sphere_id}", json={"reader_ids": []})
+    response = await client.get(f"{api}/spheres/", headers={**reader_headers, "If-None-Match": reader_etag})
+    assert response.status_code == 200
+    assert sphere_id not in [s["id"] for s in response.json()]
+
+    # Users unrelated to the sphere keep their tags
+    response = await client.get(f"{api}/spheres/", headers={**outsider_headers, "If-None-Match": outsider_etag})
+    assert response.status_code == 304
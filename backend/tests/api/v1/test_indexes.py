@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.accounting_record import record as record_crud
+from app.crud.acl import acl as acl_crud
+from app.models import User
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _capture(db: AsyncSession, call) -> list[tuple[str, tuple]]:
+    """ Run `call()` and return the (statement, parameters) pairs it sent to the database. """
+    statements = []
+    engine = db.bind.sync_engine
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        await call()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return statements
+
+
+async def _plan(db: AsyncSession, statement: str, parameters: tuple) -> str:
+    # Test tables are tiny, so steer the planner away from full/bitmap scans to see which indexes it can use
+    await db.execute(text("SET LOCAL enable_seqscan = off"))
+    await db.execute(text("SET LOCAL enable_bitmapscan = off"))
+    connection = await db.connection()
+    result = await connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+    return "\n".join(row[0] for row in result)
+
+
+async def test_record_list_uses_owner_date_index(db_session: AsyncSession, test_user: User):
+    statements = await _capture(
+        db_session,
+        lambda: record_crud.get_multi_for_user_keyset(
+            db_session, user_id=test_user.id, size=20, cursor=None, with_total=False
+        ),
+    )
+    statement, parameters = next((s, p) for s, p in statements if "FROM accountingrecord" in s)
+    plan = await _plan(db_session, statement, parameters)
+    # Each partition's copy of the index also yields rows in the requested order,
+    # so there is no separate sort step (only a merge of the partitions)
+    assert "owner_id_date_id_idx" in plan
+    assert "Seq Scan" not in plan
+    assert not any(line.strip(" ->").startswith("Sort  (") for line in plan.splitlines())
+
+
+async def test_acl_index_load_uses_user_indexes(db_session: AsyncSession, test_user: User):
+    acl_crud.invalidate("sphere", [test_user.id])
+    statements = await _capture(db_session, lambda: acl_crud.get_levels(db_session, user_id=test_user.id, kind="sphere"))
+    # The version lookup, then the map itself in one query
+    assert len(statements) == 2
+    plan = await _plan(db_session, *statements[1])
+    assert "ix_sphere_owner_id" in plan
+    assert "ix_sphere_readers_association_user_id" in plan
+    assert "ix_sphere_editors_association_user_id" in plan
+    assert "Seq Scan" not in plan
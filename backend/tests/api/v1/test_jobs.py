@@ -0,0 +1,173 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.jobs import JobContext, JobRunner, job_handler
+from app.crud.job import job as job_crud
+from app.crud.location import location as location_crud
+from app.crud.sphere import sphere as sphere_crud
+from app.models import Job, User
+from app.models.job import JobStatus
+from app.schemas.location import LocationCreate
+from app.schemas.sphere import SphereCreate
+from tests.utils.user import create_random_user, user_authentication_headers
+
+pytestmark = pytest.mark.asyncio
+
+url = f"{settings.API_V1_STR}/jobs/"
+
+# Handlers of test-only kinds; jobs of these kinds are only ever enqueued by these tests
+release = asyncio.Event()
+
+@job_handler("test_wait", max_concurrency=1)
+async def _wait(ctx: JobContext) -> dict:
+    await release.wait()
+    return {"waited": True}
+
+@job_handler("test_loop")
+async def _loop(ctx: JobContext) -> dict:
+    for i in range(1000):
+        await ctx.progress(i / 1000, force=True)
+        await asyncio.sleep(0.01)
+    return {}
+
+
+async def test_export_job_matches_streaming_export(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User
+):
+    sphere = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Food"), owner_id=test_user.id)
+    location = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Wallet"), owner_id=test_user.id)
+    for amount in (10, 20, 30):
+        response = await authenticated_client.post(f"{settings.API_V1_STR}/records/", json={
+            "type": "Spend", "sum": amount, "sphere_id": sphere.id, "location_id": location.id,
+        })
+        assert response.status_code == 201
+
+    response = await authenticated_client.post(url, json={"kind": "records_export", "format": "ndjson"})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued" and job["params"]["format"] == "ndjson"
+    response = await authenticated_client.get(f"{url}{job['id']}/result")
+    assert response.status_code == 409
+
+    runner = JobRunner()
+    await runner.poll()
+    await runner.wait()
+
+    job = (await authenticated_client.get(f"{url}{job['id']}")).json()
+    assert job["status"] == "succeeded"
+    assert job["progress"] == 1
+    assert job["result"] == {"format": "ndjson", "records": 3}
+    result = await authenticated_client.get(f"{url}{job['id']}/result")
+    assert result.status_code == 200
+    streamed = await authenticated_client.get(f"{settings.API_V1_STR}/records/export", params={"format": "ndjson"})
+    assert result.text == streamed.text
+    assert [j["id"] for j in (await authenticated_client.get(url)).json()][0] == job["id"]
+
+
+async def test_jobs_of_other_users_are_hidden(client: AsyncClient, db_session: AsyncSession, test_user: User):
+    job = await job_crud.enqueue(db_session, kind="records_export", owner_id=test_user.id, params={"format": "csv"})
+    await job_crud.request_cancel(db_session, job_id=job.id)
+
+    other_user = await create_random_user(db_session)
+    response = await client.get(f"{url}{job.id}", headers=user_authentication_headers(login=other_user.login))
+    assert response.status_code == 404
+    admin = await create_random_user(db_session, is_admin=True)
+    response = await client.get(f"{url}{job.id}", headers=user_authentication_headers(login=admin.login))
+    assert response.status_code == 200
+
+
+async def test_balance_rebuild_is_admin_only(client: AsyncClient, db_session: AsyncSession, test_user: User):
+    response = await client.post(
+        url, json={"kind": "balance_rebuild"}, headers=user_authentication_headers(login=test_user.login)
+    )
+    assert response.status_code == 403
+
+    admin = await create_random_user(db_session, is_admin=True)
+    headers = user_authentication_headers(login=admin.login)
+    response = await client.post(url, json={"kind": "balance_rebuild", "owner_id": admin.id}, headers=headers)
+    assert response.status_code == 202
+    runner = JobRunner()
+    await runner.poll()
+    await runner.wait()
+    job = (await client.get(f"{url}{response.json()['id']}", headers=headers)).json()
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"mismatches": 0}
+
+
+async def test_cancel_queued_and_running_jobs(authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User):
+    queued = await job_crud.enqueue(db_session, kind="test_loop", owner_id=test_user.id, params={})
+    response = await authenticated_client.post(f"{url}{queued.id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    response = await authenticated_client.post(f"{url}{queued.id}/cancel")
+    assert response.status_code == 409
+
+    running = await job_crud.enqueue(db_session, kind="test_loop", owner_id=test_user.id, params={})
+    runner = JobRunner()
+    await runner.poll()
+    await asyncio.sleep(0.05)
+    response = await authenticated_client.post(f"{url}{running.id}/cancel")
+    assert response.json()["status"] == "running" and response.json()["cancel_requested"]
+    await runner.wait()
+    job = (await authenticated_client.get(f"{url}{running.id}")).json()
+    assert job["status"] == "cancelled"
+    assert 0 < job["progress"] < 1
+
+
+async def test_concurrency_limit_per_kind(db_session: AsyncSession, test_user: User):
+    ids = [(await job_crud.enqueue(db_session, kind="test_wait", owner_id=test_user.id, params={})).id for _ in range(2)]
+    runner = JobRunner(concurrency=3)
+    release.clear()
+    await runner.poll()
+    db_session.expire_all()
+    statuses = [(await job_crud.get(db_session, id=job_id)).status for job_id in ids]
+    assert statuses == [JobStatus.RUNNING, JobStatus.QUEUED]
+
+    release.set()
+    await runner.wait()
+    await runner.poll()
+    await runner.wait()
+    db_session.expire_all()
+    assert [(await job_crud.get(db_session, id=job_id)).status for job_id in ids] == [JobStatus.SUCCEEDED] * 2
+
+
+async def test_jobs_of_dead_workers_fail(db_session: AsyncSession, test_user: User):
+    job_id = (await job_crud.enqueue(db_session, kind="test_dead", owner_id=test_user.id, params={})).id
+    assert (await job_crud.claim(db_session, limits={"test_dead": 1}, worker="gone:1")).id == job_id
+    await db_session.execute(
+        update(Job).where(Job.id == job_id).values(heartbeat_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    )
+    await db_session.commit()
+
+    assert job_id in await job_crud.fail_stale(db_session, timeout_seconds=60)
+    db_session.expire_all()
+    job = await job_crud.get(db_session, id=job_id)
+    assert job.status == JobStatus.FAILED
+    assert job.finished_at is not None
+
+
+async def test_job_failed_as_stale_is_not_overwritten_by_its_worker(db_session: AsyncSession, test_user: User):
+    job_id = (await job_crud.enqueue(db_session, kind="test_wait", owner_id=test_user.id, params={})).id
+    runner = JobRunner()
+    release.clear()
+    await runner.poll()
+    # The worker stalled long enough for another one to give up on the job
+    await db_session.execute(
+        update(Job).where(Job.id == job_id).values(heartbeat_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    )
+    await db_session.commit()
+    assert job_id in await job_crud.fail_stale(db_session, timeout_seconds=60)
+
+    # Its next poll stops the task instead of reporting an outcome
+    await runner.poll()
+    await runner.wait()
+    db_session.expire_all()
+    job = await job_crud.get(db_session, id=job_id)
+    assert job.status == JobStatus.FAILED
+    assert job.error == "The worker running the job stopped"
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+
+pytestmark = pytest.mark.asyncio
+
+
+def _sample(text: str, prefix: str) -> float:
+    return sum(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(prefix))
+
+
+async def test_metrics_cover_requests_statements_and_caches(authenticated_client: AsyncClient):
+    for _ in range(2):
+        assert (await authenticated_client.get(f"{settings.API_V1_STR}/spheres/")).status_code == 200
+    assert (await authenticated_client.get(f"{settings.API_V1_STR}/spheres/0")).status_code == 404
+    assert (await authenticated_client.get("/no-such-path")).status_code == 404
+
+    response = await authenticated_client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    # Labelled by route template, not by concrete path
+    assert _sample(body, 'http_requests_total{method="GET",route="/api/v1/spheres/",status="200"}') >= 2
+    assert _sample(body, 'http_requests_total{method="GET",route="/api/v1/spheres/{sphere_id}",status="404"}') >= 1
+    assert _sample(body, 'http_requests_total{method="GET",route="<unmatched>",status="404"}') >= 1
+    assert _sample(body, 'http_request_duration_seconds_count{method="GET",route="/api/v1/spheres/"}') >= 2
+    assert 'http_requests_in_progress{method="GET"}' in body
+    # The sphere list reads through the application's engine
+    assert _sample(body, 'db_statements_total{engine="primary",operation="SELECT"}') >= 1
+    assert _sample(body, 'cache_lookups_total{cache="principals",result="hit"}') >= 1
+    assert "/metrics" not in body
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    worker = (
+        "from app.core.metrics import HTTP_REQUESTS, HTTP_IN_PROGRESS\n"
+        "HTTP_REQUESTS.labels('GET', '/x', '200').inc(3)\n"
+        "HTTP_IN_PROGRESS.labels('GET').inc()\n"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+    scrape = "from app.core.metrics import render_metrics; print(render_metrics()[0].decode())"
+    body = subprocess.run([sys.executable, "-c", scrape], env=env, check=True, capture_output=True, text=True).stdout
+
+    assert _sample(body, 'http_requests_total{method="GET",route="/x",status="200"}') == 6
+    assert _sample(body, 'http_requests_in_progress{method="GET"}') == 2
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.accounting_record import record as record_crud
+from app.crud.location import location as location_crud
+from app.crud.sphere import sphere as sphere_crud
+from app.db.partitions import DEFAULT_PARTITION, ensure_record_partitions, get_record_partition_years, record_partition_name
+from app.models import User
+from app.schemas.accounting_record import RecordCreateSpend
+from app.schemas.location import LocationCreate
+from app.schemas.sphere import SphereCreate
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_future_partitions_exist(db_session: AsyncSession):
+    await ensure_record_partitions(db_session, years_ahead=1)
+    years = await get_record_partition_years(db_session)
+    current_year = datetime.now(timezone.utc).year
+    assert {current_year, current_year + 1} <= years
+
+
+async def test_rows_in_default_partition_get_their_own_partition(db_session: AsyncSession, test_user: User):
+    sphere = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Old"), owner_id=test_user.id)
+    location = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Old"), owner_id=test_user.id)
+    # Far enough in the past that no partition exists for it yet
+    [rec] = await record_crud.create_record(
+        db_session,
+        obj_in=RecordCreateSpend(type="Spend", sum=5, sphere_id=sphere.id, location_id=location.id, date=datetime(1971, 3, 1, tzinfo=timezone.utc)),
+        owner_id=test_user.id,
+    )
+    record_id, accounting_id, owner_id = rec.id, rec.accounting_id, rec.owner_id
+    in_default = text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE id = :id")
+    assert (await db_session.execute(in_default, {"id": record_id})).scalar_one() == 1
+
+    try:
+        assert 1971 in await ensure_record_partitions(db_session, years_ahead=0)
+        assert (await db_session.execute(in_default, {"id": record_id})).scalar_one() == 0
+        moved = text(f"SELECT count(*) FROM {record_partition_name(1971)} WHERE id = :id")
+        assert (await db_session.execute(moved, {"id": record_id})).scalar_one() == 1
+        assert (await record_crud.get(db_session, id=record_id)).sum == 5
+    finally:
+        # Partition DDL is transactional: leave the schema as the migrations created it
+        await db_session.rollback()
+        await record_crud.remove_by_accounting_id(db_session, accounting_id=accounting_id, user_id=owner_id)
+
+
+async def test_date_range_queries_prune_partitions(db_session: AsyncSession, test_user: User):
+    year = datetime.now(timezone.utc).year
+    result = await db_session.execute(
+        text("EXPLAIN SELECT id FROM accountingrecord WHERE owner_id = :owner_id AND date >= :date_from AND date < :date_to"),
+        {
+            "owner_id": test_user.id,
+            "date_from": datetime(year, 3, 1, tzinfo=timezone.utc),
+            "date_to": datetime(year, 4, 1, tzinfo=timezone.utc),
+        },
+    )
+    plan = "\n".join(row[0] for row in result)
+    assert record_partition_name(year) in plan
+    assert DEFAULT_PARTITION not in plan
+    assert record_partition_name(year + 1) not in plan
@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.profiling import SQLProfile, current_profile, statement_shape
+from app.crud.user import user as user_crud
+from app.models import User
+
+pytestmark = pytest.mark.asyncio
+
+
+def test_statement_shape_collapses_parameter_lists():
+    assert statement_shape("SELECT a FROM t WHERE id IN ($1::INTEGER, $2::INTEGER, $3::INTEGER)") == \
+        statement_shape("SELECT a FROM t WHERE id IN ($1::INTEGER)")
+    assert statement_shape("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)") == \
+        statement_shape("INSERT INTO t (a, b) VALUES ($1, $2)")
+
+
+async def test_profile_flags_repeated_statements_with_call_site(monkeypatch, db_session: AsyncSession, test_user: User):
+    monkeypatch.setattr(settings, "SQL_PROFILE_REPEAT_THRESHOLD", 3)
+    profile = SQLProfile()
+    token = current_profile.set(profile)
+    try:
+        for _ in range(3):
+            db_session.expunge_all()
+            await user_crud.get(db_session, id=test_user.id)
+    finally:
+        current_profile.reset(token)
+
+    assert len(profile.statements) == 3
+    [(shape, records)] = profile.repeated()
+    assert len(records) == 3
+    assert shape.startswith("SELECT")
+    assert records[0].call_site.startswith("crud/base.py:")
+    assert "repeated x3" in profile.report()
+
+
+async def test_profile_header_and_slow_request_log(
+    monkeypatch, caplog, authenticated_client: AsyncClient
+):
+    url = f"{settings.API_V1_STR}/records/"
+    response = await authenticated_client.get(url)
+    assert "x-sql-profile" not in response.headers
+
+    monkeypatch.setattr(settings, "SQL_PROFILER_ENABLED", True)
+    monkeypatch.setattr(settings, "SQL_PROFILE_HEADER", True)
+    monkeypatch.setattr(settings, "SQL_PROFILE_SLOW_REQUEST_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="app.core.profiling"):
+        response = await authenticated_client.get(url)
+    assert response.status_code == 200
+    summary = dict(part.split("=") for part in response.headers["x-sql-profile"].split("; "))
+    assert int(summary["statements"]) > 0
+    assert any("SQL profile of GET /api/v1/records/" in message for message in caplog.messages)
@@ -0,0 +1,553 @@
+import asyncio
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.accounting_record import record as record_crud
+from app.crud.balance import balance as balance_crud
+from app.crud.location import location as location_crud
+from app.crud.permission import permission as permission_crud
+from app.crud.sphere import sphere as sphere_crud
+from app.models import User, Sphere, Location
+from app.schemas.location import LocationCreate
+from app.schemas.sphere import SphereCreate
+from tests.conftest import TestingSessionLocal
+from tests.utils.user import create_random_user
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def sphere(db_session: AsyncSession, test_user: User) -> Sphere:
+    return await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Food"), owner_id=test_user.id)
+
+
+@pytest.fixture
+async def location(db_session: AsyncSession, test_user: User) -> Location:
+    return await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Wallet"), owner_id=test_user.id)
+
+
+async def _create_spends(client: AsyncClient, sphere: Sphere, location: Location, count: int) -> None:
+    for i in range(count):
+        response = await client.post(
+            f"{settings.API_V1_STR}/records/",
+            json={"type": "Spend", "sum": i + 1, "sphere_id": sphere.id, "location_id": location.id},
+        )
+        assert response.status_code == 201
+
+
+async def test_cursor_pagination_matches_page_pagination(
+    authenticated_client: AsyncClient, sphere: Sphere, location: Location
+):
+    await _create_spends(authenticated_client, sphere, location, 7)
+
+    response = await authenticated_client.get(f"{settings.API_V1_STR}/records/", params={"size": 100})
+    expected_ids = [r["id"] for r in response.json()["items"]]
+    assert len(expected_ids) == 7
+
+    # Walk forward
+    pages, cursor = [], None
+    while True:
+        params = {"pagination": "cursor", "size": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = await authenticated_client.get(f"{settings.API_V1_STR}/records/", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        pages.append(data)
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert [len(p["items"]) for p in pages] == [3, 3, 1]
+    assert [r["id"] for p in pages for r in p["items"]] == expected_ids
+    assert pages[0]["prev_cursor"] is None
+
+    # Walk back from the last page
+    response = await authenticated_client.get(
+        f"{settings.API_V1_STR}/records/",
+        params={"pagination": "cursor", "size": 3, "cursor": pages[-1]["prev_cursor"]},
+    )
+    data = response.json()
+    assert [r["id"] for r in data["items"]] == [r["id"] for r in pages[1]["items"]]
+    assert data["next_cursor"] is not None
+
+
+async def test_cursor_pagination_total_and_invalid_cursor(
+    authenticated_client: AsyncClient, sphere: Sphere, location: Location
+):
+    await _create_spends(authenticated_client, sphere, location, 2)
+
+    response = await authenticated_client.get(
+        f"{settings.API_V1_STR}/records/", params={"pagination": "cursor", "include_total": True}
+    )
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+
+    response = await authenticated_client.get(
+        f"{settings.API_V1_STR}/records/", params={"pagination": "cursor", "cursor": "garbage"}
+    )
+    assert response.status_code == 400
+
+
+async def test_list_filters_apply_to_pages_cursors_and_totals(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User, sphere: Sphere, location: Location
+):
+    salary = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Salary"), owner_id=test_user.id)
+    savings = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Savings"), owner_id=test_user.id)
+    url = f"{settings.API_V1_STR}/records/"
+    for record in [
+        {"type": "Spend", "sum": 5, "date": "2024-03-01T10:00:00Z"},
+        {"type": "Spend", "sum": 50, "date": "2024-06-01T10:00:00Z"},
+        {"type": "Income", "sum": 100, "sphere_id": salary.id, "date": "2024-06-02T10:00:00Z"},
+        {"type": "Spend", "sum": 20, "location_id": savings.id, "date": "2025-01-01T10:00:00Z"},
+        {"type": "Transfer", "transfer_type": "location", "sum": 30, "from_location_id": location.id,
+         "to_location_id": savings.id, "date": "2025-02-01T10:00:00Z"},
+    ]:
+        response = await authenticated_client.post(url, json={"sphere_id": sphere.id, "location_id": location.id, **record})
+        assert response.status_code == 201
+
+    async def sums(**params) -> list[float]:
+        response = await authenticated_client.get(url, params={"size": 100, **params})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == len(data["items"])
+        return sorted(r["sum"] for r in data["items"])
+
+    assert await sums() == [5, 20, 30, 30, 50, 100]
+    assert await sums(sphere_id=salary.id) == [100]
+    assert await sums(location_id=savings.id) == [20, 30]
+    assert await sums(operation_type="Income") == [30, 100]
+    assert await sums(is_transfer=True) == [30, 30]
+    assert await sums(is_transfer=False, operation_type="Spend") == [5, 20, 50]
+    assert await sums(date_from="2024-06-01T10:00:00Z", date_to="2025-01-01T10:00:00Z") == [50, 100]
+    assert await sums(sum_min=20, sum_max=50) == [20, 30, 30, 50]
+
+    # Cursor pages and their total see the same records
+    seen, cursor = [], None
+    while True:
+        params = {"pagination": "cursor", "size": 1, "include_total": True, "is_transfer": False, "operation_type": "Spend"}
+        data = (await authenticated_client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})).json()
+        assert data["total"] == 3
+        seen += [r["sum"] for r in data["items"]]
+        if not (cursor := data["next_cursor"]):
+            break
+    assert seen == [20, 50, 5]
+
+    for params in ({"sum_min": 10, "sum_max": 1}, {"date_from": "2025-01-01T00:00:00Z", "date_to": "2024-01-01T00:00:00Z"},
+                   {"operation_type": "Refund"}):
+        assert (await authenticated_client.get(url, params=params)).status_code == 422
+
+
+async def test_compact_view_side_loads_references(
+    authenticated_client: AsyncClient, sphere: Sphere, location: Location
+):
+    await _create_spends(authenticated_client, sphere, location, 3)
+    url = f"{settings.API_V1_STR}/records/"
+    await authenticated_client.post(url, json={
+        "type": "Income", "sum": 12.5, "sphere_id": sphere.id, "location_id": location.id, "description": "Salary",
+    })
+
+    full = (await authenticated_client.get(url, params={"size": 100})).json()
+    response = await authenticated_client.get(url, params={"size": 100, "view": "compact"})
+    assert response.status_code == 200
+    assert "etag" in response.headers
+    compact = response.json()
+    assert {k: compact[k] for k in ("total", "page", "size", "pages")} == {k: full[k] for k in ("total", "page", "size", "pages")}
+    assert list(compact["spheres"]) == [str(sphere.id)]
+    assert list(compact["locations"]) == [str(location.id)]
+
+    # Resolving the references gives back the full view
+    for item in compact["items"]:
+        sphere_data = compact["spheres"][str(item.pop("sphere_id"))]
+        location_data = compact["locations"][str(item.pop("location_id"))]
+        item["sphere"] = {**sphere_data, "owner": compact["users"][str(sphere_data["owner_id"])]}
+        item["location"] = {**location_data, "owner": compact["users"][str(location_data["owner_id"])]}
+    assert compact["items"] == full["items"]
+
+    cursor_page = (await authenticated_client.get(url, params={"pagination": "cursor", "size": 2, "view": "compact"})).json()
+    assert [item["id"] for item in cursor_page["items"]] == [item["id"] for item in full["items"][:2]]
+    assert cursor_page["next_cursor"] is not None
+
+
+async def test_search_matches_descriptions_and_names(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User, sphere: Sphere, location: Location
+):
+    travel = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Путешествия"), owner_id=test_user.id)
+    url = f"{settings.API_V1_STR}/records/"
+    for sphere_id, description in [
+        (sphere.id, "Аренда квартиры"), (sphere.id, "Продукты"), (sphere.id, "Аренду гаража и аренду места"),
+        (travel.id, "Билеты"), (travel.id, None),
+    ]:
+        response = await authenticated_client.post(url, json={
+            "type": "Spend", "sum": 1, "sphere_id": sphere_id, "location_id": location.id, "description": description,
+        })
+        assert response.status_code == 201
+
+    # Other word forms and prefixes match; more occurrences rank higher
+    response = await authenticated_client.get(f"{url}search", params={"q": "аренд"})
+    assert response.status_code == 200
+    assert "etag" in response.headers
+    assert [r["description"] for r in response.json()["items"]] == ["Аренду гаража и аренду места", "Аренда квартиры"]
+    assert (await authenticated_client.get(f"{url}search", params={"q": "аренда квартир"})).json()["items"][0]["description"] == "Аренда квартиры"
+
+    # Sphere and location names match too; pages follow the cursor without gaps or repeats
+    ids, cursor = [], None
+    while True:
+        params = {"q": "путешествие", "size": 1, **({"cursor": cursor} if cursor else {})}
+        data = (await authenticated_client.get(f"{url}search", params=params)).json()
+        ids += [r["id"] for r in data["items"]]
+        if not (cursor := data["next_cursor"]):
+            break
+    assert len(ids) == len(set(ids)) == 2
+
+    compact = (await authenticated_client.get(f"{url}search", params={"q": "wallet", "view": "compact"})).json()
+    assert len(compact["items"]) == 5
+    assert list(compact["locations"]) == [str(location.id)]
+
+    assert (await authenticated_client.get(f"{url}search", params={"q": "нет такого"})).json()["items"] == []
+    response = await authenticated_client.get(f"{url}search", params={"q": "аренда", "cursor": "garbage"})
+    assert response.status_code == 400
+
+
+async def test_concurrent_accounting_id_allocation_is_unique():
+    async def allocate() -> int:
+        async with TestingSessionLocal() as session:
+            return await record_crud.get_next_accounting_id(session)
+
+    ids = await asyncio.gather(*(allocate() for _ in range(10)))
+    assert len(set(ids)) == len(ids)
+
+
+async def test_transfer_legs_share_accounting_id(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User, sphere: Sphere, location: Location
+):
+    other = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Card"), owner_id=test_user.id)
+    response = await authenticated_client.post(f"{settings.API_V1_STR}/records/", json={
+        "type": "Transfer", "transfer_type": "location", "sum": 10,
+        "sphere_id": sphere.id, "from_location_id": location.id, "to_location_id": other.id,
+    })
+    assert response.status_code == 201
+    legs = response.json()
+    assert len(legs) == 2
+    assert legs[0]["accounting_id"] == legs[1]["accounting_id"]
+
+    await _create_spends(authenticated_client, sphere, location, 1)
+    response = await authenticated_client.get(f"{settings.API_V1_STR}/records/", params={"size": 1})
+    assert response.json()["items"][0]["accounting_id"] > legs[0]["accounting_id"]
+
+
+async def test_import_records_csv_reports_row_errors(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User, sphere: Sphere, location: Location
+):
+    other_user = await create_random_user(db_session)
+    foreign = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Foreign"), owner_id=other_user.id)
+    card = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Card"), owner_id=test_user.id)
+    body = "\n".join([
+        "type,sum,sphere_id,location_id,description,date,transfer_type,from_location_id,to_location_id",
+        f'Income,100,{sphere.id},{location.id},"Salary, July",2024-07-01,,,',
+        f"Spend,abc,{sphere.id},{location.id},,,,,",
+        f"Spend,5,{foreign.id},{location.id},,,,,",
+        f"Spend,5,{sphere.id},999999999,,,,,",
+        f"Transfer,30,{sphere.id},,,2024-07-02,location,{location.id},{card.id}",
+    ])
+
+    response = await authenticated_client.post(
+        f"{settings.API_V1_STR}/records/import", content=body, headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["rows"] == 5
+    assert report["imported"] == 2
+    assert report["records_created"] == 3
+    assert [e["row"] for e in report["errors"]] == [2, 3, 4]
+    assert "permissions" in report["errors"][1]["detail"]
+    assert "not found" in report["errors"][2]["detail"]
+
+    response = await authenticated_client.get(f"{settings.API_V1_STR}/records/", params={"size": 10})
+    items = response.json()["items"]
+    assert len(items) == 3
+    assert items[-1]["description"] == "Salary, July"
+    assert items[-1]["date"].startswith("2024-07-01")
+
+    dashboard = (await authenticated_client.get(f"{settings.API_V1_STR}/dashboard/")).json()
+    assert dashboard["total_balance"] == 100
+
+
+async def test_import_records_ndjson(authenticated_client: AsyncClient, sphere: Sphere, location: Location):
+    lines = [f'{{"type": "Spend", "sum": {i + 1}, "sphere_id": {sphere.id}, "location_id": {location.id}}}' for i in range(20)]
+    lines.insert(3, "{not json")
+    response = await authenticated_client.post(
+        f"{settings.API_V1_STR}/records/import", params={"format": "ndjson"}, content="\n".join(lines)
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 20
+    assert [e["row"] for e in report["errors"]] == [4]
+
+    response = await authenticated_client.get(f"{settings.API_V1_STR}/records/", params={"size": 1})
+    assert response.json()["total"] == 20
+
+
+async def test_export_records(authenticated_client: AsyncClient, sphere: Sphere, location: Location):
+    url = f"{settings.API_V1_STR}/records/"
+    for day, amount in (("2024-01-10", 10), ("2024-02-10", 20), ("2024-03-10", 30)):
+        response = await authenticated_client.post(url, json={
+            "type": "Spend", "sum": amount, "sphere_id": sphere.id, "location_id": location.id,
+            "description": f"Shop {amount}", "date": f"{day}T12:00:00Z",
+        })
+        assert response.status_code == 201
+
+    response = await authenticated_client.get(f"{url}export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0].split(",")[:3] == ["id", "accounting_id", "date"]
+    assert len(lines) == 4
+    assert "Shop 10" in lines[1] and "Food" in lines[1] and "Wallet" in lines[1]
+
+    response = await authenticated_client.get(f"{url}export", params={
+        "format": "ndjson", "date_from": "2024-02-01T00:00:00Z", "date_to": "2024-03-01T00:00:00Z",
+    })
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["sum"] == 20
+    assert rows[0]["operation_type"] == "Spend"
+    assert rows[0]["sphere_name"] == "Food"
+
+
+async def test_permission_resolution_is_a_single_query(db_session: AsyncSession, test_user: User, location: Location):
+    other_user = await create_random_user(db_session)
+    own = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Own"), owner_id=test_user.id)
+    foreign = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Foreign"), owner_id=other_user.id)
+
+    statements = []
+    engine = db_session.bind.sync_engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        resolved = await permission_crud.resolve_edit(
+            db_session, user=test_user, sphere_ids=[own.id, foreign.id, 999999], location_ids=[location.id]
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert resolved["sphere"][own.id] is None
+    assert resolved["sphere"][foreign.id].reason == "forbidden"
+    assert resolved["sphere"][999999].reason == "not_found"
+    assert resolved["location"][location.id] is None
+
+
+async def test_create_transfer_checks_every_resource(
+    authenticated_client: AsyncClient, db_session: AsyncSession, sphere: Sphere, location: Location
+):
+    other_user = await create_random_user(db_session)
+    foreign = await location_crud.create_with_owner(
+        db_session, obj_in=LocationCreate(name="Foreign"), owner_id=other_user.id
+    )
+    transfer = {"type": "Transfer", "transfer_type": "location", "sum": 10, "sphere_id": sphere.id}
+
+    response = await authenticated_client.post(
+        f"{settings.API_V1_STR}/records/",
+        json={**transfer, "from_location_id": location.id, "to_location_id": foreign.id},
+    )
+    assert response.status_code == 403
+    assert response.json()["detail"] == "You don't have edit permissions for location 'Foreign'."
+
+    response = await authenticated_client.post(
+        f"{settings.API_V1_STR}/records/",
+        json={**transfer, "from_location_id": location.id, "to_location_id": 999999},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Location with id 999999 not found."
+
+
+async def test_batch_applies_mixed_operations_in_one_transaction(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User, sphere: Sphere, location: Location
+):
+    url = f"{settings.API_V1_STR}/records/"
+    other = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Card"), owner_id=test_user.id)
+    await _create_spends(authenticated_client, sphere, location, 2)
+    to_update, to_delete = [r["id"] for r in (await authenticated_client.get(url)).json()["items"]]
+    transfer = (await authenticated_client.post(url, json={
+        "type": "Transfer", "transfer_type": "location", "sum": 5, "sphere_id": sphere.id,
+        "from_location_id": location.id, "to_location_id": other.id,
+    })).json()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    # The app's sessions may use another engine than db_session
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        response = await authenticated_client.post(f"{url}batch", json={"operations": [
+            {"op": "create", "record": {"type": "Spend", "sum": 30, "sphere_id": sphere.id, "location_id": location.id}},
+            {"op": "create", "record": {"type": "Income", "sum": 20, "sphere_id": sphere.id, "location_id": other.id}},
+            {"op": "update", "id": to_update, "record": {"type": "Income", "sum": 7, "sphere_id": sphere.id, "location_id": other.id}},
+            {"op": "update", "id": transfer[1]["id"], "record": {
+                "type": "Transfer", "transfer_type": "location", "sum": 8, "sphere_id": sphere.id,
+                "from_location_id": other.id, "to_location_id": location.id,
+            }},
+            {"op": "delete", "id": to_delete},
+        ]})
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["applied"] is True
+    assert [r["status"] for r in data["results"]] == ["created", "created", "updated", "updated", "deleted"]
+    assert data["results"][0]["records"][0]["sum"] == 30
+    assert data["results"][2]["records"][0]["operation_type"] == "Income"
+    assert data["results"][2]["records"][0]["location"]["name"] == "Card"
+    # The transfer is rewritten in place: same ids and accounting id
+    new_transfer = data["results"][3]["records"]
+    assert [r["id"] for r in new_transfer] == [r["id"] for r in transfer]
+    assert [r["location"]["id"] for r in new_transfer] == [other.id, location.id]
+    assert {r["accounting_id"] for r in new_transfer} == {transfer[0]["accounting_id"]}
+    assert [r["sum"] for r in new_transfer] == [8, 8]
+
+    # Both creates go in one INSERT, the transfer in one UPDATE, removals in one DELETE
+    assert sum(s.startswith("INSERT INTO accountingrecord") for s in statements) == 1
+    assert sum(s.startswith("UPDATE accountingrecord") and "FROM (VALUES" in s for s in statements) == 1
+    assert sum(s.startswith("DELETE FROM accountingrecord") for s in statements) == 1
+
+    ids = {r["id"] for r in (await authenticated_client.get(url, params={"size": 100})).json()["items"]}
+    assert to_delete not in ids
+    assert {to_update, *(r["id"] for r in transfer)} <= ids
+    assert await balance_crud.verify(db_session, owner_id=test_user.id) == []
+
+
+async def test_batch_with_a_failing_operation_applies_nothing(
+    authenticated_client: AsyncClient, db_session: AsyncSession, sphere: Sphere, location: Location
+):
+    url = f"{settings.API_V1_STR}/records/"
+    other_user = await create_random_user(db_session)
+    foreign = await sphere_crud.create_with_owner(db_session, obj_in=SphereCreate(name="Foreign"), owner_id=other_user.id)
+    await _create_spends(authenticated_client, sphere, location, 1)
+    [record] = (await authenticated_client.get(url)).json()["items"]
+
+    response = await authenticated_client.post(f"{url}batch", json={"operations": [
+        {"op": "create", "record": {"type": "Spend", "sum": 1, "sphere_id": sphere.id, "location_id": location.id}},
+        {"op": "create", "record": {"type": "Spend", "sum": 1, "sphere_id": foreign.id, "location_id": location.id}},
+        {"op": "delete", "id": record["id"]},
+        {"op": "update", "id": record["id"], "record": {"type": "Spend", "sum": 2, "sphere_id": sphere.id, "location_id": location.id}},
+        {"op": "delete", "id": 999999},
+    ]})
+    assert response.status_code == 400
+    data = response.json()
+    assert data["applied"] is False
+    assert [(r["status"], r["detail"]) for r in data["results"]] == [
+        ("not_applied", None),
+        ("failed", "You don't have edit permissions for sphere 'Foreign'."),
+        ("not_applied", None),
+        ("failed", "Record is already changed by an earlier operation of the batch"),
+        ("failed", "Record not found"),
+    ]
+    assert (await authenticated_client.get(url)).json()["items"] == [record]
+
+    response = await authenticated_client.post(f"{url}batch", json={"operations": []})
+    assert response.status_code == 422
+
+
+async def test_transfer_update_keeps_ids(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User, sphere: Sphere, location: Location
+):
+    url = f"{settings.API_V1_STR}/records/"
+    other = await location_crud.create_with_owner(db_session, obj_in=LocationCreate(name="Card"), owner_id=test_user.id)
+    transfer = {"type": "Transfer", "transfer_type": "location", "sphere_id": sphere.id}
+    spend, income = (await authenticated_client.post(url, json={
+        **transfer, "sum": 5, "from_location_id": location.id, "to_location_id": other.id,
+    })).json()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    try:
+        response = await authenticated_client.put(f"{url}{income['id']}", json={
+            **transfer, "sum": 9, "description": "Moved back", "from_location_id": other.id, "to_location_id": location.id,
+        })
+    finally:
+        event.remove(Engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    updated = response.json()
+    assert updated["id"] == income["id"]
+    assert updated["accounting_id"] == income["accounting_id"]
+    assert (updated["sum"], updated["description"], updated["location"]["id"]) == (9, "Moved back", location.id)
+    assert updated["date"] == income["date"]
+    assert sum(s.startswith("UPDATE accountingrecord") for s in statements) == 1
+    assert not any(s.startswith(("INSERT INTO accountingrecord", "DELETE FROM accountingrecord")) for s in statements)
+
+    response = await authenticated_client.get(f"{url}{spend['id']}")
+    assert (response.json()["sum"], response.json()["location"]["id"]) == (9, other.id)
+    assert await balance_crud.verify(db_session, owner_id=test_user.id) == []
+
+    # An income record turned into a transfer is replaced by a new pair
+    single = (await authenticated_client.post(url, json={
+        "type": "Income", "sum": 3, "sphere_id": sphere.id, "location_id": location.id,
+    })).json()[0]
+    response = await authenticated_client.put(f"{url}{single['id']}", json={
+        **transfer, "sum": 3, "from_location_id": location.id, "to_location_id": other.id,
+    })
+    assert response.status_code == 200
+    assert response.json()["is_transfer"] is True
+    assert (await authenticated_client.get(f"{url}{single['id']}")).status_code == 404
+    assert await balance_crud.verify(db_session, owner_id=test_user.id) == []
+
+
+async def test_writes_do_not_query_after_commit(
+    authenticated_client: AsyncClient, db_session: AsyncSession, test_user: User, sphere: Sphere, location: Location
+):
+    url = f"{settings.API_V1_STR}/records/"
+    other_user = await create_random_user(db_session)
+    shared = await location_crud.create_with_owner(
+        db_session, obj_in=LocationCreate(name="Shared", editor_ids=[test_user.id]), owner_id=other_user.id
+    )
+    statements = []
+    listeners = {
+        "before_cursor_execute": lambda conn, cursor, statement, *args: statements.append(statement),
+        "commit": lambda conn: statements.append("COMMIT"),
+    }
+
+    async def after_commit(request):
+        statements.clear()
+        for name, listener in listeners.items():
+            event.listen(Engine, name, listener)
+        try:
+            response = await request
+        finally:
+            for name, listener in listeners.items():
+                event.remove(Engine, name, listener)
+        assert "COMMIT" in statements
+        return response, statements[statements.index("COMMIT") + 1:]
+
+    response, trailing = await after_commit(authenticated_client.post(url, json={
+        "type": "Transfer", "transfer_type": "location", "sum": 5, "sphere_id": sphere.id,
+        "from_location_id": location.id, "to_location_id": shared.id,
+    }))
+    assert response.status_code == 201
+    assert trailing == []
+    spend, income = response.json()
+    assert income["location"]["owner"]["login"] == other_user.login
+    assert spend["sphere"]["owner"]["id"] == test_user.id
+
+    response, trailing = await after_commit(authenticated_client.put(f"{url}{spend['id']}", json={
+        "type": "Spend", "sum": 6, "sphere_id": sphere.id, "location_id": shared.id,
+    }))
+    assert response.status_code == 200
+    assert trailing == []
+    assert response.json()["location"]["name"] == "Shared"
+
+    response, trailing = await after_commit(
+        authenticated_client.post(f"{settings.API_V1_STR}/spheres/", json={"name": "No refresh"})
+    )
+    assert response.status_code == 201
+    assert trailing == []
+    assert response.json()["owner"]["id"] == test_user.id
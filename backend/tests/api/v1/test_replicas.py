@@ -0,0 +1,114 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.v1 import deps
+from app.core.config import settings
+from app.crud.acl import acl as acl_crud
+from app.db import session as session_module
+from app.db.session import WRITE_LSN_COOKIE, ReplicaRouter, async_engine, get_read_engine, recent_writers
+from app.models import User
+
+pytestmark = pytest.mark.asyncio
+
+
+def _replica_engine():
+    # The test database doubles as a replica: it is not in recovery, so its lag is 0
+    return create_async_engine(str(settings.ASYNC_DATABASE_URI))
+
+def _unreachable_engine():
+    return create_async_engine(str(settings.ASYNC_DATABASE_URI).replace(f":{settings.POSTGRES_PORT}/", ":1/"))
+
+
+async def test_health_check_excludes_unreachable_and_lagging_replicas(monkeypatch):
+    good, other, down = _replica_engine(), _replica_engine(), _unreachable_engine()
+    router = ReplicaRouter([good, down, other])
+    try:
+        await router.check_health()
+        assert router.healthy == [good, other]
+        # Round-robin over the healthy ones only
+        assert {router.choose() for _ in range(4)} == {good, other}
+
+        monkeypatch.setattr(settings, "REPLICA_MAX_LAG_SECONDS", -1)
+        await router.check_health()
+        assert router.healthy == []
+        assert router.choose() is None
+    finally:
+        for engine in (good, other, down):
+            await engine.dispose()
+
+
+async def test_reads_fall_back_to_primary_after_a_write(monkeypatch, authenticated_client: AsyncClient, test_user: User):
+    replica = _replica_engine()
+    monkeypatch.setattr(session_module, "replica_router", ReplicaRouter([replica]))
+    recent_writers.invalidate(test_user.id)
+    try:
+        assert get_read_engine(test_user.id) is replica
+        response = await authenticated_client.get(f"{settings.API_V1_STR}/spheres/")
+        assert response.status_code == 200
+        # A read does not pin the user to the primary
+        assert get_read_engine(test_user.id) is replica
+
+        response = await authenticated_client.post(f"{settings.API_V1_STR}/spheres/", json={"name": "Replicated"})
+        assert response.status_code == 201
+        assert get_read_engine(test_user.id) is async_engine
+        # Other users keep reading from the replica
+        assert get_read_engine(test_user.id + 1) is replica
+
+        response = await authenticated_client.get(f"{settings.API_V1_STR}/spheres/")
+        assert "Replicated" in [s["name"] for s in response.json()]
+
+        recent_writers.invalidate(test_user.id)
+        assert get_read_engine(test_user.id) is replica
+    finally:
+        recent_writers.invalidate(test_user.id)
+        await replica.dispose()
+
+
+async def test_reads_wait_for_the_replica_after_a_write_on_another_worker(
+    monkeypatch, authenticated_client: AsyncClient, test_user: User
+):
+    replica = _replica_engine()
+    router = ReplicaRouter([replica])
+    monkeypatch.setattr(session_module, "replica_router", router)
+    chosen = []
+    def tracking_get_read_engine(*args):
+        chosen.append(get_read_engine(*args))
+        return chosen[-1]
+    monkeypatch.setattr(deps, "get_read_engine", tracking_get_read_engine)
+    try:
+        await router.check_health()
+        response = await authenticated_client.post(f"{settings.API_V1_STR}/spheres/", json={"name": "Elsewhere"})
+        assert response.status_code == 201
+        assert int(response.cookies[WRITE_LSN_COOKIE]) > router.replayed[replica]
+
+        # The read is served by another worker process, which did not see the write
+        recent_writers.invalidate(test_user.id)
+        response = await authenticated_client.get(f"{settings.API_V1_STR}/spheres/")
+        assert "Elsewhere" in [s["name"] for s in response.json()]
+        assert chosen[-1] is async_engine
+
+        # Once the replica has replayed the write, reads go back to it
+        await router.check_health()
+        response = await authenticated_client.get(f"{settings.API_V1_STR}/spheres/")
+        assert response.status_code == 200
+        assert chosen[-1] is replica
+    finally:
+        recent_writers.invalidate(test_user.id)
+        await replica.dispose()
+
+
+async def test_permission_maps_read_from_a_replica_are_not_cached(monkeypatch, test_user: User):
+    replica = _replica_engine()
+    monkeypatch.setattr(session_module, "replica_router", ReplicaRouter([replica]))
+    acl_crud.invalidate("sphere", [test_user.id])
+    try:
+        async with session_module.AsyncSessionLocal(bind=replica) as db:
+            assert await acl_crud.get_levels(db, user_id=test_user.id, kind="sphere") == {}
+        assert acl_crud._cache.get(("sphere", test_user.id)) is None
+
+        async with session_module.AsyncSessionLocal() as db:
+            await acl_crud.get_levels(db, user_id=test_user.id, kind="sphere")
+        assert acl_crud._cache.get(("sphere", test_user.id)) is not None
+    finally:
+        await replica.dispose()
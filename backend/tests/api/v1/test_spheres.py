@@ -3,6 +3,7 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.crud.acl import acl as acl_crud
 from app.crud.sphere import sphere as sphere_crud
 from app.models import User
 from app.schemas.sphere import SphereCreate
@@ -102,4 +103,59 @@ async def test_editor_can_edit_but_not_delete(client: AsyncClient, db_session: A
 
     # Editor CANNOT DELETE the sphere (our dependency is strict: only owner can delete)
     response = await client.delete(f"{settings.API_V1_STR}/spheres/{sphere.id}", headers=editor_headers)
-    assert response.status_code == 403 # Forbidden
\ No newline at end of file
+    assert response.status_code == 403 # Forbidden
+
+async def test_sharing_changes_are_visible_immediately(
+    authenticated_client: AsyncClient, client: AsyncClient, db_session: AsyncSession
+):
+    reader_user = await create_random_user(db_session)
+    reader_headers = user_authentication_headers(login=reader_user.login)
+
+    response = await authenticated_client.post(f"{settings.API_V1_STR}/spheres/", json={"name": "Later Shared"})
+    sphere_id = response.json()["id"]
+
+    # Warm the reader's permission index before the sphere is shared
+    response = await client.get(f"{settings.API_V1_STR}/spheres/", headers=reader_headers)
+    assert all(s["id"] != sphere_id for s in response.json())
+    response = await client.get(f"{settings.API_V1_STR}/spheres/{sphere_id}", headers=reader_headers)
+    assert response.status_code == 403
+
+    response = await authenticated_client.put(
+        f"{settings.API_V1_STR}/spheres/{sphere_id}", json={"reader_ids": [reader_user.id]}
+    )
+    assert response.status_code == 200
+
+    response = await client.get(f"{settings.API_V1_STR}/spheres/", headers=reader_headers)
+    assert any(s["id"] == sphere_id for s in response.json())
+    response = await client.get(f"{settings.API_V1_STR}/spheres/{sphere_id}", headers=reader_headers)
+    assert response.status_code == 200
+    # Readers cannot edit
+    response = await client.put(f"{settings.API_V1_STR}/spheres/{sphere_id}", headers=reader_headers, json={"name": "x"})
+    assert response.status_code == 403
+
+    response = await authenticated_client.put(f"{settings.API_V1_STR}/spheres/{sphere_id}", json={"reader_ids": []})
+    assert response.status_code == 200
+
+    response = await client.get(f"{settings.API_V1_STR}/spheres/{sphere_id}", headers=reader_headers)
+    assert response.status_code == 403
+
+
+async def test_revoked_editor_is_rejected_by_other_workers(
+    monkeypatch, authenticated_client: AsyncClient, client: AsyncClient, db_session: AsyncSession
+):
+    editor_user = await create_random_user(db_session)
+    editor_headers = user_authentication_headers(login=editor_user.login)
+    response = await authenticated_client.post(
+        f"{settings.API_V1_STR}/spheres/", json={"name": "Revoked", "editor_ids": [editor_user.id]}
+    )
+    sphere_id = response.json()["id"]
+    response = await client.put(f"{settings.API_V1_STR}/spheres/{sphere_id}", headers=editor_headers, json={"name": "Edited"})
+    assert response.status_code == 200
+
+    # The revoking write is served by another worker process: this one's cached map is not invalidated
+    monkeypatch.setattr(acl_crud._cache, "invalidate", lambda key: None)
+    response = await authenticated_client.put(f"{settings.API_V1_STR}/spheres/{sphere_id}", json={"editor_ids": []})
+    assert response.status_code == 200
+
+    response = await client.put(f"{settings.API_V1_STR}/spheres/{sphere_id}", headers=editor_headers, json={"name": "Again"})
+    assert response.status_code == 403
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import apiService from '../services/api';
-import type { RecordRead, RecordCreate, PaginatedRecordRead, SphereRead, LocationRead } from '../types/index';
+import type { RecordRead, RecordCreate, SphereRead, LocationRead } from '../types/index';
 
 interface RecordFormData {
   type: 'Income' | 'Spend' | 'Transfer';
@@ -23,7 +23,9 @@ export const RecordsPage: React.FC = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [currentPage, setCurrentPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [prevCursor, setPrevCursor] = useState<string | null>(null);
   const [showForm, setShowForm] = useState(false);
   const [editingRecord, setEditingRecord] = useState<RecordRead | null>(null);
   const [formData, setFormData] = useState<RecordFormData>({
@@ -40,12 +42,13 @@ export const RecordsPage: React.FC = () => {
     setError('');
     try {
       const [recordsData, spheresData, locationsData] = await Promise.all([
-        apiService.getRecords(currentPage, 20),
+        apiService.getRecordsByCursor(cursor, 20),
         apiService.getSpheres(),
         apiService.getLocations(),
       ]);
       setRecords(recordsData.items);
-      setTotalPages(recordsData.pages);
+      setNextCursor(recordsData.next_cursor);
+      setPrevCursor(recordsData.prev_cursor);
       setSpheres(spheresData);
       setLocations(locationsData);
     } catch (err) {
@@ -57,7 +60,12 @@ export const RecordsPage: React.FC = () => {
 
   useEffect(() => {
     fetchData();
-  }, [currentPage]);
+  }, [cursor]);
+
+  const goToPage = (pageCursor: string | null, page: number) => {
+    setCursor(pageCursor);
+    setCurrentPage(page);
+  };
 
   const resetForm = () => {
     setFormData({
@@ -492,22 +500,22 @@ export const RecordsPage: React.FC = () => {
           </div>
 
           {/* Пагинация */}
-          {totalPages > 1 && (
+          {(prevCursor || nextCursor) && (
             <div className="flex justify-center mt-6">
               <nav className="flex space-x-2">
                 <button
-                  onClick={() => setCurrentPage(Math.max(1, currentPage - 1))}
-                  disabled={currentPage === 1}
+                  onClick={() => goToPage(prevCursor, Math.max(1, currentPage - 1))}
+                  disabled={!prevCursor}
                   className="px-3 py-2 text-sm font-medium text-gray-500 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50"
                 >
                   Предыдущая
                 </button>
                 <span className="px-3 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md">
-                  {currentPage} из {totalPages}
+                  {currentPage}
                 </span>
                 <button
-                  onClick={() => setCurrentPage(Math.min(totalPages, currentPage + 1))}
-                  disabled={currentPage === totalPages}
+                  onClick={() => goToPage(nextCursor, currentPage + 1)}
+                  disabled={!nextCursor}
                   className="px-3 py-2 text-sm font-medium text-gray-500 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50"
                 >
                   Следующая
@@ -11,6 +11,7 @@ import type {
   RecordCreate,
   RecordRead,
   PaginatedRecordRead,
+  CursorPaginatedRecordRead,
   DashboardData
 } from '../types/index';
 
@@ -134,6 +135,13 @@ class ApiService {
     return response.data;
   }
 
+  async getRecordsByCursor(cursor: string | null = null, size: number = 20): Promise<CursorPaginatedRecordRead> {
+    const params: Record<string, string | number> = { pagination: 'cursor', size };
+    if (cursor) params.cursor = cursor;
+    const response: AxiosResponse<CursorPaginatedRecordRead> = await this.api.get('/records/', { params });
+    return response.data;
+  }
+
   async createRecord(recordData: RecordCreate): Promise<RecordRead> {
     const response: AxiosResponse<RecordRead> = await this.api.post('/records/', recordData);
     return response.data;
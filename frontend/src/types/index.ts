@@ -137,6 +137,16 @@ export interface PaginatedResponse<T> {
 
 export interface PaginatedRecordRead extends PaginatedResponse<RecordRead> {}
 
+export interface CursorPaginatedResponse<T> {
+  items: T[];
+  total: number | null;
+  size: number;
+  next_cursor: string | null;
+  prev_cursor: string | null;
+}
+
+export interface CursorPaginatedRecordRead extends CursorPaginatedResponse<RecordRead> {}
+
 // Auth types
 export interface Token {
   access_token: string;